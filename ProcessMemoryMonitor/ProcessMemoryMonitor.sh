@@ -3,9 +3,11 @@
 # 默认值
 output_dir=$(pwd)  # 默认输出目录为当前工作目录
 para_times=0        # 默认持续运行
+rotate_kb=0         # 分段大小上限（KB），0 表示不分段
+keep_segments=0     # 最多保留的分段数，0 表示不限制
 
 # 使用 getopts 解析命令行参数
-while getopts "t:d:" opt; do
+while getopts "t:d:s:k:" opt; do
     case $opt in
         t)
             para_times=$OPTARG  # 获取 -t 后的值作为运行次数
@@ -13,8 +15,14 @@ while getopts "t:d:" opt; do
         d)
             output_dir=$OPTARG  # 获取 -d 后的值作为输出目录路径
             ;;
+        s)
+            rotate_kb=$OPTARG   # 获取 -s 后的值作为分段大小上限（KB）
+            ;;
+        k)
+            keep_segments=$OPTARG  # 获取 -k 后的值作为最多保留的分段数
+            ;;
         *)
-            echo "用法: $0 [-t 次数] [-d 输出目录]"
+            echo "用法: $0 [-t 次数] [-d 输出目录] [-s 分段大小KB] [-k 保留分段数]"
             exit 1
             ;;
     esac
@@ -27,6 +35,7 @@ if [ ! -d "$output_dir" ]; then
 fi
 
 output_file=${output_dir}"/ProcessMemoryData.txt"
+index_file=${output_dir}"/ProcessMemoryData.index"
 # 创建临时文件存储数据
 temp_file=$(mktemp)
 
@@ -122,12 +131,41 @@ collect_memory_data() {
   echo "统计完成，结果已保存到 $output_file"
 }
 
+# 输出文件超过分段大小时压缩为分段文件，并登记到索引中（格式见 memtools/segments.py）
+rotate_output() {
+  [[ $rotate_kb -gt 0 && -f "$output_file" ]] || return 0
+  size_kb=$(( $(wc -c < "$output_file") / 1024 ))
+  [[ $size_kb -ge $rotate_kb ]] || return 0
+
+  start_time=$(grep -m 1 "^统计时间: " "$output_file" | sed 's/^统计时间: //')
+  end_time=$(grep "^统计时间: " "$output_file" | tail -n 1 | sed 's/^统计时间: //')
+  snapshots=$(grep -c "^统计时间: " "$output_file")
+  segment_name="ProcessMemoryData-$(echo "$start_time" | tr -d ':-' | tr ' ' '-').txt.gz"
+  gzip -c "$output_file" > "${output_dir}/${segment_name}" && rm -f "$output_file"
+
+  [[ -f "$index_file" ]] || printf "# segment\tstart\tend\tsnapshots\n" > "$index_file"
+  printf "%s\t%s\t%s\t%s\n" "$segment_name" "$start_time" "$end_time" "$snapshots" >> "$index_file"
+
+  # 删除超出保留数量的最早分段
+  if [[ $keep_segments -gt 0 ]]; then
+      segment_count=$(grep -vc "^#" "$index_file")
+      while [[ $segment_count -gt $keep_segments ]]; do
+          oldest=$(grep -v "^#" "$index_file" | head -n 1 | cut -f 1)
+          rm -f "${output_dir}/${oldest}"
+          grep -vF "$oldest" "$index_file" > "${index_file}.tmp" && mv "${index_file}.tmp" "$index_file"
+          segment_count=$((segment_count - 1))
+      done
+  fi
+  echo "已生成分段文件 ${output_dir}/${segment_name}"
+}
+
 # 执行内存监控
 if [ $para_times -eq 0 ]; then
     # 持续运行模式
     echo "开始持续监控进程内存，按 Ctrl+C 终止..."
     while true; do
         collect_memory_data
+        rotate_output
         sleep 5  # 每隔5秒检查一次状态
     done
 else
@@ -137,6 +175,7 @@ else
     while [ $para_times -gt 0 ]; do
         echo "第 $((original_para_times - para_times + 1)) 次运行 (共 $original_para_times 次)"
         collect_memory_data
+        rotate_output
         ((para_times--))
 
         # 如果不是最后一次运行，则等待5秒
@@ -0,0 +1 @@
+"""Linux内存分析工具公共模块"""
@@ -0,0 +1,297 @@
+"""采集过程中的在线异常检测
+
+采集器每轮把实际采样到的进程（或 cgroup）和系统内存交给 AlertMonitor，依次经过：
+- SpikeDetector：EWMA 均值/方差的 z-score 突变检测
+- GrowthDetector：持续增长检测，自上次明显回落以来增长超过阈值且持续超过窗口时长
+- ThresholdDetector：配置文件中的绝对阈值（上限 max / 下限 min）
+
+每个序列在每个检测器中只保存固定大小的状态，每次采样的检测开销为 O(1)。
+告警写入 JSON Lines 文件，同时以 ALERT 行追加在采集文件的快照末尾：
+
+    ALERT: <检测器> <名称> <指标> <值> <说明>
+
+配置文件为 JSON，未指定的项使用 DEFAULT_CONFIG 中的默认值：
+
+    {
+        "metrics": ["PSS"],
+        "spike": {"alpha": 0.1, "z": 4.0, "warmup": 12, "min_delta": 5.0},
+        "growth": {"window": 600, "min_growth": 20.0, "tolerance": 2.0, "smoothing": 0.2},
+        "thresholds": [
+            {"series": "hmi", "metric": "PSS", "max": 200},
+            {"series": "<system>", "metric": "AVAILABLE", "min": 100}
+        ]
+    }
+"""
+import json
+import math
+import os
+from fnmatch import fnmatchcase
+
+SYSTEM_SERIES = '<system>'
+SYSTEM_COLUMNS = ('USED', 'AVAILABLE', 'SWAP')
+ALERT_PREFIX = 'ALERT: '
+
+DEFAULT_CONFIG = {
+    # 参与突变和增长检测的指标（单位 MB），不存在的指标会被忽略
+    'metrics': ['PSS', 'CURRENT', 'USED'],
+    'spike': {'alpha': 0.1, 'z': 4.0, 'warmup': 12, 'min_delta': 5.0},
+    'growth': {'window': 600, 'min_growth': 20.0, 'tolerance': 2.0, 'smoothing': 0.2},
+    # 按顺序匹配，series 支持通配符，同一序列同一指标使用第一条匹配的规则
+    'thresholds': [],
+}
+
+
+def load_config(path=None):
+    """读取告警配置，path 为空时使用默认配置"""
+    config = {key: dict(value) if isinstance(value, dict) else list(value)
+              for key, value in DEFAULT_CONFIG.items()}
+    if not path:
+        return config
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"无法读取告警配置 '{path}': {e}") from e
+    if not isinstance(user_config, dict):
+        raise ValueError(f"告警配置 '{path}' 应为 JSON 对象")
+    for key, value in user_config.items():
+        if key not in config:
+            raise ValueError(f"未知的告警配置项: {key}")
+        if isinstance(config[key], dict):
+            config[key].update(_check_options(key, value))
+        elif key == 'metrics':
+            if not isinstance(value, list) or not all(isinstance(metric, str) for metric in value):
+                raise ValueError("告警配置项 metrics 应为指标名称的列表")
+            config[key] = list(value)
+        else:
+            if not isinstance(value, list):
+                raise ValueError("告警配置项 thresholds 应为规则的列表")
+            config[key] = [_check_rule(rule) for rule in value]
+    return config
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_options(key, options):
+    """检测器参数只允许 DEFAULT_CONFIG 中列出的项（即检测器构造函数的参数），值为数字"""
+    if not isinstance(options, dict):
+        raise ValueError(f"告警配置项 {key} 应为 JSON 对象")
+    for option, value in options.items():
+        if option not in DEFAULT_CONFIG[key]:
+            raise ValueError(f"未知的 {key} 参数: {option}（可用: {', '.join(DEFAULT_CONFIG[key])}）")
+        if not _is_number(value):
+            raise ValueError(f"{key} 参数 {option} 应为数字: {value!r}")
+    return options
+
+
+def _check_rule(rule):
+    """阈值规则需要 metric 和 min / max 中的至少一项"""
+    if not isinstance(rule, dict):
+        raise ValueError(f"阈值规则应为 JSON 对象: {rule!r}")
+    unknown = rule.keys() - {'series', 'metric', 'min', 'max'}
+    if unknown:
+        raise ValueError(f"阈值规则中有未知的项 {', '.join(sorted(unknown))}: {rule!r}")
+    if not isinstance(rule.get('metric'), str):
+        raise ValueError(f"阈值规则缺少 metric: {rule!r}")
+    if not isinstance(rule.get('series', '*'), str):
+        raise ValueError(f"阈值规则的 series 应为字符串: {rule!r}")
+    if 'min' not in rule and 'max' not in rule:
+        raise ValueError(f"阈值规则需要 min 或 max: {rule!r}")
+    for limit in ('min', 'max'):
+        if limit in rule and not _is_number(rule[limit]):
+            raise ValueError(f"阈值规则的 {limit} 应为数字: {rule!r}")
+    return rule
+
+
+def read_system_memory(proc_root='/proc'):
+    """读取系统内存 (已使用, 可用, 已使用交换空间)，单位MB"""
+    values = {}
+    with open(os.path.join(proc_root, 'meminfo'), 'rb') as f:
+        for line in f:
+            key, _, rest = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable', b'SwapTotal', b'SwapFree'):
+                values[key] = int(rest.split()[0]) / 1024
+    available = values.get(b'MemAvailable', 0.0)
+    return (values.get(b'MemTotal', 0.0) - available, available,
+            values.get(b'SwapTotal', 0.0) - values.get(b'SwapFree', 0.0))
+
+
+class SpikeDetector:
+    """EWMA z-score 突变检测，状态为 [均值, 方差, 样本数, 是否处于异常中]
+
+    偏离均值超过 z 倍标准差且超过 min_delta(MB) 视为突变，同一次突变只告警一次。
+    """
+
+    name = 'spike'
+
+    def __init__(self, alpha=0.1, z=4.0, warmup=12, min_delta=5.0):
+        self.alpha = alpha
+        self.z2 = z * z
+        self.warmup = warmup
+        self.min_delta = min_delta
+        self.state = {}
+
+    def update(self, key, value, timestamp):
+        state = self.state.get(key)
+        if state is None:
+            self.state[key] = [value, 0.0, 1, False]
+            return None
+        mean, var, count, active = state
+        diff = value - mean
+        message = None
+        if count >= self.warmup and abs(diff) >= self.min_delta and diff * diff > self.z2 * var:
+            if not active:
+                z = f"{diff / math.sqrt(var):.1f}" if var > 0 else 'inf'
+                message = f"z={z} 均值 {mean:.1f}"
+            state[3] = True
+        else:
+            state[3] = False
+        increment = self.alpha * diff
+        state[0] = mean + increment
+        state[1] = (1 - self.alpha) * (var + diff * increment)
+        state[2] = count + 1
+        return message
+
+
+class GrowthDetector:
+    """持续增长检测，状态为 [起点时间, 起点值, 平滑值]
+
+    使用平滑值（EWMA）判断，单次突变不会被当作增长。平滑值比起点回落超过 tolerance(MB)
+    时重新计算起点；自起点以来持续 window 秒以上且增长超过 min_growth(MB) 时告警，
+    并以当前平滑值作为新的起点。
+    """
+
+    name = 'growth'
+
+    def __init__(self, window=600, min_growth=20.0, tolerance=2.0, smoothing=0.2):
+        self.window = window
+        self.min_growth = min_growth
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.state = {}
+
+    def update(self, key, value, timestamp):
+        state = self.state.get(key)
+        if state is None:
+            self.state[key] = [timestamp, value, value]
+            return None
+        level = state[2] + self.smoothing * (value - state[2])
+        state[2] = level
+        if level < state[1] - self.tolerance:
+            state[0], state[1] = timestamp, level
+            return None
+        elapsed = timestamp - state[0]
+        growth = level - state[1]
+        if elapsed >= self.window and growth >= self.min_growth:
+            state[0], state[1] = timestamp, level
+            return f"{elapsed / 60:.0f}分钟增长 {growth:.1f}MB"
+        return None
+
+
+class ThresholdDetector:
+    """绝对阈值检测，超出阈值时告警一次，恢复后才会再次告警"""
+
+    name = 'threshold'
+
+    def __init__(self, rules):
+        self.rules = [(rule.get('series', '*'), rule['metric'], rule.get('min'), rule.get('max'))
+                      for rule in rules]
+        self.metrics = {rule[1] for rule in self.rules}
+        self.limits = {}     # (名称, 指标) -> (下限, 上限) 或 None，首次出现时匹配规则
+        self.state = set()   # 处于超限状态的 (序列, 指标)
+
+    def _limit(self, name, metric):
+        limit = self.limits.get((name, metric), False)
+        if limit is False:
+            limit = next(((low, high) for pattern, rule_metric, low, high in self.rules
+                          if rule_metric == metric and fnmatchcase(name, pattern)), None)
+            self.limits[(name, metric)] = limit
+        return limit
+
+    def update(self, key, name, metric, value):
+        limit = self._limit(name, metric)
+        if limit is None:
+            return None
+        low, high = limit
+        if high is not None and value > high:
+            message = f"超过上限 {high}MB"
+        elif low is not None and value < low:
+            message = f"低于下限 {low}MB"
+        else:
+            self.state.discard((key, metric))
+            return None
+        if (key, metric) in self.state:
+            return None
+        self.state.add((key, metric))
+        return message
+
+
+class AlertMonitor:
+    """对每轮采样结果运行各检测器，返回告警记录列表"""
+
+    def __init__(self, config=None):
+        config = config or load_config()
+        self.metrics = set(config['metrics'])
+        self.detectors = [SpikeDetector(**config['spike']), GrowthDetector(**config['growth'])]
+        self.thresholds = ThresholdDetector(config['thresholds'])
+        self.keys = set()
+
+    def observe(self, timestamp, samples, columns):
+        """samples 为 [(键, 名称, 各列的值)]，值的顺序与 columns 一致，单位MB；
+        键用于区分同名进程（如 PID），只传入本轮实际采样的序列"""
+        seconds = timestamp.timestamp()
+        tracked = [(index, column) for index, column in enumerate(columns) if column in self.metrics]
+        threshold_columns = [(index, column) for index, column in enumerate(columns)
+                             if column in self.thresholds.metrics]
+        alerts = []
+        for key, name, values in samples:
+            for index, column in tracked:
+                value = values[index]
+                for detector in self.detectors:
+                    message = detector.update((key, column), value, seconds)
+                    if message:
+                        alerts.append(self._alert(timestamp, detector.name, key, name, column, value, message))
+            for index, column in threshold_columns:
+                message = self.thresholds.update(key, name, column, values[index])
+                if message:
+                    alerts.append(self._alert(timestamp, ThresholdDetector.name, key, name, column,
+                                              values[index], message))
+        return alerts
+
+    def forget(self, alive):
+        """清理已退出序列的状态，alive 为当前仍存在的键"""
+        alive = set(alive)
+        gone = self.keys - alive
+        self.keys = alive
+        if not gone:
+            return
+        for detector in self.detectors:
+            detector.state = {key: state for key, state in detector.state.items() if key[0] not in gone}
+        self.thresholds.state = {key for key in self.thresholds.state if key[0] not in gone}
+
+    @staticmethod
+    def _alert(timestamp, detector, key, name, metric, value, message):
+        return {
+            'time': f"{timestamp:%Y-%m-%d %H:%M:%S}",
+            'detector': detector,
+            'series': name,
+            'pid': key if isinstance(key, int) else None,
+            'metric': metric,
+            'value': round(value, 1),
+            'message': message,
+        }
+
+
+def format_alert(alert):
+    """生成写入采集文件的 ALERT 行"""
+    return (f"{ALERT_PREFIX}{alert['detector']} {alert['series']} {alert['metric']} "
+            f"{alert['value']:.1f} {alert['message']}")
+
+
+def write_alerts(path, alerts):
+    """以 JSON Lines 追加写入告警"""
+    with open(path, 'a', encoding='utf-8') as f:
+        for alert in alerts:
+            f.write(json.dumps(alert, ensure_ascii=False) + '\n')
@@ -0,0 +1,242 @@
+"""采集文件的索引与按时间段随机读取
+
+首次打开 ProcessMemoryData.txt 时扫描一遍文件，建立从快照时间到文件偏移的稀疏索引
+（每个索引块约 BLOCK_SIZE 字节，记录块内快照的最早/最晚时间），并保存为同目录下的
+<文件名>.idx。之后再打开时直接加载索引；文件有追加时只扫描新增的部分。
+
+    capture = Capture('ProcessMemoryData.txt')
+    df = capture.range('2025-04-25 16:00:00', '2025-04-25 17:00:00',
+                       processes=['hmi'], metrics=['PSS'])
+
+range() 只读取与时间段相交的索引块并解析其中的行，不需要解析整个文件。
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from datetime import datetime
+
+from memtools.process_data import METRICS, iter_process_rows
+from memtools.profiling import profiled, add_profile_arguments, enable_from_args
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+BLOCK_SIZE = 256 * 1024
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIME_MARKER = '统计时间: '.encode('utf-8')
+TIME_LENGTH = 19  # 'YYYY-MM-DD HH:MM:SS'
+FINGERPRINT_SIZE = 4096
+
+
+def _time_text(value):
+    """将 datetime 或时间字符串统一为可直接按字符串比较的 'YYYY-MM-DD HH:MM:SS'"""
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime(TIME_FORMAT)
+
+
+class Capture:
+    """带稀疏索引的原始采集文件（未压缩的 ProcessMemoryData.txt）
+
+    索引块 blocks 为 [偏移, 块内第一个快照的序号, 最早时间, 最晚时间] 列表，
+    时间以 'YYYY-MM-DD HH:MM:SS' 字符串保存，可直接比较，且不要求文件中的时间单调递增。
+    """
+
+    def __init__(self, path, block_size=BLOCK_SIZE, persist=True):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.block_size = block_size
+        self.persist = persist
+        self.blocks = []
+        self.snapshots = 0
+        self.scanned_size = 0
+        self.fingerprint = None
+        self.refresh()
+
+    def _fingerprint(self, size):
+        """文件开头 size 字节的摘要，用于判断文件是否被替换"""
+        with open(self.path, 'rb') as f:
+            return hashlib.sha1(f.read(size)).hexdigest()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if index.get('version') != INDEX_VERSION or index.get('block_size') != self.block_size:
+            return False
+        self.blocks = index['blocks']
+        self.snapshots = index['snapshots']
+        self.scanned_size = index['scanned_size']
+        self.fingerprint = index['fingerprint']
+        return True
+
+    def _save_index(self):
+        if not self.persist:
+            return
+        index = {
+            'version': INDEX_VERSION,
+            'block_size': self.block_size,
+            'fingerprint': self.fingerprint,
+            'scanned_size': self.scanned_size,
+            'snapshots': self.snapshots,
+            'blocks': self.blocks,
+        }
+        temp_path = self.index_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, separators=(',', ':'))
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # 目录不可写时只在内存中使用索引
+            pass
+
+    def _reset(self):
+        self.blocks = []
+        self.snapshots = 0
+        self.scanned_size = 0
+        self.fingerprint = None
+
+    @profiled('capture.refresh')
+    def refresh(self):
+        """加载或更新索引：文件被替换时重建，文件有追加时只扫描新增部分"""
+        size = os.path.getsize(self.path)
+        if not self.blocks and not self._load_index():
+            self._reset()
+        if self.scanned_size and (size < self.scanned_size or self._fingerprint(
+                min(FINGERPRINT_SIZE, self.scanned_size)) != self.fingerprint):
+            self._reset()
+        if size > self.scanned_size:
+            self._scan(size)
+            self.fingerprint = self._fingerprint(min(FINGERPRINT_SIZE, self.scanned_size))
+            self._save_index()
+        return self
+
+    def _scan(self, size):
+        """从上次扫描位置开始查找快照时间行，更新索引块"""
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            # 只处理到最后一个完整行，未写完的行留到下次扫描
+            end = mm.rfind(b'\n', self.scanned_size, size) + 1
+            if end <= self.scanned_size:
+                return
+            position = self.scanned_size
+            while True:
+                position = mm.find(TIME_MARKER, position, end)
+                if position < 0:
+                    break
+                if position == 0 or mm[position - 1] == 0x0A:
+                    time_start = position + len(TIME_MARKER)
+                    timestamp = mm[time_start:time_start + TIME_LENGTH].decode('ascii', 'replace')
+                    self.snapshots += 1
+                    last = self.blocks[-1] if self.blocks else None
+                    if last is None or position - last[0] >= self.block_size:
+                        self.blocks.append([position, self.snapshots, timestamp, timestamp])
+                    else:
+                        last[2] = min(last[2], timestamp)
+                        last[3] = max(last[3], timestamp)
+                position += len(TIME_MARKER)
+            self.scanned_size = end
+
+    def time_range(self):
+        """返回整个文件的 (最早时间, 最晚时间)"""
+        if not self.blocks:
+            return None, None
+        start = min(block[2] for block in self.blocks)
+        end = max(block[3] for block in self.blocks)
+        return datetime.strptime(start, TIME_FORMAT), datetime.strptime(end, TIME_FORMAT)
+
+    def _block_spans(self, t0, t1):
+        """返回与时间段相交的连续索引块 [(起始偏移, 结束偏移, 起始序号)]"""
+        spans = []
+        for i, (offset, sequence, first, last) in enumerate(self.blocks):
+            if (t0 is not None and last < t0) or (t1 is not None and first > t1):
+                continue
+            end = self.blocks[i + 1][0] if i + 1 < len(self.blocks) else self.scanned_size
+            if spans and spans[-1][1] == offset:
+                spans[-1] = (spans[-1][0], end, spans[-1][2])
+            else:
+                spans.append((offset, end, sequence))
+        return spans
+
+    def iter_rows(self, t0=None, t1=None, processes=None, alerts=None, identities=None):
+        """逐行生成时间段内的 (时间, 序号, 进程名, PSS, RSS, VSS, 是否沿用)，序号与整文件解析一致
+
+        alerts 为列表时，时间段内的告警行也追加到其中；identities 为字典时每行追加 (PID, 启动时间)，
+        并收集时间段内的进程字典（格式见 iter_process_rows）。
+        """
+        t0, t1 = _time_text(t0), _time_text(t1)
+        start = datetime.strptime(t0, TIME_FORMAT) if t0 else None
+        end = datetime.strptime(t1, TIME_FORMAT) if t1 else None
+        wanted = set(processes) if processes else None
+        with open(self.path, 'rb') as f:
+            for offset, stop, sequence in self._block_spans(t0, t1):
+                f.seek(offset)
+                text = f.read(stop - offset).decode('utf-8', 'replace')
+                block_alerts = [] if alerts is not None else None
+                for row in iter_process_rows(text, block_alerts, identities):
+                    timestamp = row[0]
+                    if (start and timestamp < start) or (end and timestamp > end):
+                        continue
+                    if wanted is not None and row[2] not in wanted:
+                        continue
+                    yield (timestamp, row[1] + sequence - 1) + row[2:]
+                for alert in block_alerts or ():
+                    if not ((start and alert[0] < start) or (end and alert[0] > end)):
+                        alerts.append((alert[0], alert[1] + sequence - 1) + alert[2:])
+
+    @profiled('capture.range')
+    def range(self, t0=None, t1=None, processes=None, metrics=None, alerts=None, identities=None):
+        """读取时间段 [t0, t1] 内的数据，返回与 MemoryAnalyzer.parse_data 相同结构的 DataFrame
+
+        t0 / t1 可以是 datetime 或 'YYYY-MM-DD HH:MM:SS' 字符串，None 表示不限制；
+        processes 限定进程名，metrics 限定 PSS/RSS/VSS 中的列，alerts 为列表时收集时间段内的告警，
+        identities 为字典时增加 pid、start 列并收集进程字典。
+        """
+        import pandas as pd
+
+        identity_columns = ['pid', 'start'] if identities is not None else []
+        columns = ['timestamp', 'sequence', 'process', *METRICS, 'carried', *identity_columns]
+        df = pd.DataFrame(list(self.iter_rows(t0, t1, processes, alerts, identities)), columns=columns)
+        if metrics:
+            unknown = set(metrics) - set(METRICS)
+            if unknown:
+                raise ValueError(f"未知的指标: {', '.join(sorted(unknown))}")
+            df = df[['timestamp', 'sequence', 'process', *metrics, 'carried', *identity_columns]]
+        return df
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='按时间段查询进程内存采集文件（自动建立索引）')
+    parser.add_argument('input', help='采集文件（未压缩的 ProcessMemoryData.txt）')
+    parser.add_argument('--from', dest='start', help='开始时间 YYYY-MM-DD HH:MM:SS')
+    parser.add_argument('--to', dest='end', help='结束时间 YYYY-MM-DD HH:MM:SS')
+    parser.add_argument('-p', '--process', nargs='+', help='只输出这些进程')
+    parser.add_argument('-m', '--metric', nargs='+', choices=METRICS, help='只输出这些指标')
+    parser.add_argument('-o', '--output', help='CSV输出文件（默认输出到标准输出）')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    for option, value in (('--from', args.start), ('--to', args.end)):
+        try:
+            if value:
+                datetime.strptime(value, TIME_FORMAT)
+        except ValueError:
+            parser.error(f"{option} 的时间格式应为 YYYY-MM-DD HH:MM:SS：'{value}'")
+    enable_from_args(args)
+
+    try:
+        capture = Capture(args.input)
+    except FileNotFoundError:
+        print(f"错误：找不到文件 '{args.input}'", file=sys.stderr)
+        sys.exit(1)
+    start, end = capture.time_range()
+    print(f"{args.input}: {capture.snapshots} 个快照，{start} ~ {end}，索引块 {len(capture.blocks)} 个",
+          file=sys.stderr)
+    df = capture.range(args.start, args.end, args.process, args.metric)
+    df.to_csv(args.output if args.output else sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
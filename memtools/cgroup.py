@@ -0,0 +1,215 @@
+"""cgroup v2 内存采集
+
+按 cgroup 而不是按进程采集：遍历 cgroup v2 层级，每个 cgroup 只读取
+memory.current、memory.stat、memory.swap.current 和 memory.pressure 四个文件，
+开销与进程数量无关，且能直接看出每个服务占用的内存。
+
+输出格式与 ProcessMemoryData.txt 相同，表头为
+CGROUP CURRENT(MB) ANON(MB) SWAP(MB) FILE(MB) SOME10(%) FULL10(%)，
+前三列可直接用 MemoryAnalyzer 打开并绘图（cgroup 代替进程）：
+
+    python -m memtools.cgroup -d 输出目录 -i 5 --depth 2
+
+需要查看某个 cgroup 内的进程时再按需读取（只在调用时遍历该 cgroup 的进程）：
+
+    python -m memtools.cgroup --pids system.slice/foo.service
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from memtools.collector import (CollectorScheduler, SEPARATOR, add_output_arguments, boot_time, format_snapshot,
+                                read_identity, read_process, run_collector)
+from memtools.process_data import CGROUP_METRICS
+from memtools.profiling import add_profile_arguments, enable_from_args
+from memtools.stream import KIND_CGROUP, cgroup_stream_rows
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+OUTPUT_NAME = 'CgroupMemoryData.txt'
+STAT_KEYS = (b'anon', b'file')
+
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError, OSError):
+        return None
+
+
+def _read_int(path):
+    data = _read_bytes(path)
+    try:
+        return int(data) if data else 0
+    except ValueError:
+        return 0
+
+
+def parse_pressure(data):
+    """解析 memory.pressure，返回 (some avg10, full avg10)，单位 %"""
+    some = full = 0.0
+    for line in (data or b'').splitlines():
+        fields = line.split()
+        if len(fields) > 1 and fields[1].startswith(b'avg10='):
+            value = float(fields[1][6:])
+            if fields[0] == b'some':
+                some = value
+            elif fields[0] == b'full':
+                full = value
+    return some, full
+
+
+def parse_stat(data, keys=STAT_KEYS):
+    """从 memory.stat 中读取指定项（字节）"""
+    values = dict.fromkeys(keys, 0)
+    for line in (data or b'').splitlines():
+        key, _, value = line.partition(b' ')
+        if key in values:
+            values[key] = int(value)
+    return values
+
+
+def walk_cgroups(root=CGROUP_ROOT, depth=2):
+    """遍历 cgroup 层级，返回启用了内存控制器的 cgroup 相对路径（不含根 cgroup）"""
+    groups = []
+
+    def visit(path, relative, level):
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            child = f"{relative}/{entry.name}" if relative else entry.name
+            if os.path.exists(os.path.join(entry.path, 'memory.current')):
+                groups.append(child)
+            if depth == 0 or level < depth:
+                visit(entry.path, child, level + 1)
+
+    visit(root, '', 1)
+    return groups
+
+
+def read_cgroup(root, group):
+    """读取单个 cgroup 的 (名称, CURRENT, ANON, SWAP, FILE, SOME10, FULL10)，内存单位为字节；
+    cgroup 已被删除时返回 None"""
+    path = os.path.join(root, group)
+    current = _read_bytes(os.path.join(path, 'memory.current'))
+    if current is None:
+        return None
+    stat = parse_stat(_read_bytes(os.path.join(path, 'memory.stat')))
+    swap = _read_int(os.path.join(path, 'memory.swap.current'))
+    some, full = parse_pressure(_read_bytes(os.path.join(path, 'memory.pressure')))
+    return group, int(current or 0), stat[b'anon'], swap, stat[b'file'], some, full
+
+
+class CgroupSampler:
+    """每轮遍历 cgroup 层级并读取各 cgroup 的内存统计"""
+
+    def __init__(self, root=CGROUP_ROOT, depth=2):
+        self.root = root
+        self.depth = depth
+        self.idle_every = 1     # 与 CollectorScheduler 接口一致，cgroup 采集不分级
+        self.sampled_count = 0
+
+    def collect(self):
+        """采集一轮，返回 [(名称, CURRENT, ANON, SWAP, FILE, SOME10, FULL10)]"""
+        rows = []
+        for group in walk_cgroups(self.root, self.depth):
+            values = read_cgroup(self.root, group)
+            if values is not None:
+                rows.append(values)
+        self.sampled_count = len(rows)
+        return rows
+
+
+def format_cgroup_snapshot(timestamp, rows, scheduler=None):
+    """生成一次 cgroup 快照文本，TOTAL 只累加顶层 cgroup（子 cgroup 已包含在父 cgroup 中）"""
+    width = max([30] + [len(row[0]) for row in rows])
+    lines = [f"统计时间: {timestamp:%Y-%m-%d %H:%M:%S}", ""]
+    lines.append(f"{'CGROUP':<{width}} {'CURRENT(MB)':>15} {'ANON(MB)':>15} {'SWAP(MB)':>15} "
+                 f"{'FILE(MB)':>15} {'SOME10(%)':>10} {'FULL10(%)':>10}")
+    lines.append(SEPARATOR)
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for name, current, anon, swap, file, some, full in sorted(rows, key=lambda row: row[1], reverse=True):
+        values = [current / 1048576, anon / 1048576, swap / 1048576, file / 1048576]
+        if '/' not in name:
+            totals = [total + value for total, value in zip(totals, values)]
+        lines.append(f"{name:<{width}} " + ' '.join(f"{value:15.1f}" for value in values) +
+                     f" {some:10.2f} {full:10.2f}")
+    lines.append("")
+    lines.append(SEPARATOR)
+    lines.append(f"{'TOTAL:':<{width}} " + ' '.join(f"{value:15.1f}" for value in totals))
+    if scheduler is not None:
+        lines.append(
+            f"采集耗时: {scheduler.last_elapsed * 1000:.1f}ms CPU: {scheduler.last_cost * 1000:.1f}ms "
+            f"cgroup: {scheduler.sampler.sampled_count} 周期: {scheduler.interval:.1f}s"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def observe_cgroups(monitor, timestamp, rows):
+    """将本轮各 cgroup 的 CURRENT/ANON/SWAP 交给告警检测"""
+    monitor.forget(row[0] for row in rows)
+    samples = [(row[0], row[0], (row[1] / 1048576, row[2] / 1048576, row[3] / 1048576)) for row in rows]
+    return monitor.observe(timestamp, samples, CGROUP_METRICS)
+
+
+def cgroup_pids(root, group, recursive=True):
+    """读取 cgroup（默认包含子 cgroup）中的进程ID"""
+    top = os.path.join(root, group)
+    paths = [path for path, _, _ in os.walk(top)] if recursive else [top]
+    pids = []
+    for path in paths:
+        data = _read_bytes(os.path.join(path, 'cgroup.procs'))
+        pids.extend(int(pid) for pid in (data or b'').split())
+    return pids
+
+
+def drill_down(root, group, proc_root='/proc'):
+    """按需读取 cgroup 内各进程的内存，返回与 TieredSampler.collect 相同格式的行"""
+    rows = []
+    for pid in cgroup_pids(root, group):
+        values = read_process(pid, proc_root)
+        if values is not None:
+            rows.append(values + (False, pid))
+    return rows
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='按 cgroup v2 采集内存数据')
+    add_output_arguments(parser)
+    parser.add_argument('--root', default=CGROUP_ROOT, help='cgroup v2 挂载点')
+    parser.add_argument('--depth', type=int, default=2, help='遍历的层级深度，0 表示不限制')
+    parser.add_argument('--pids', metavar='CGROUP', help='只输出该 cgroup 内各进程的内存后退出')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    if not os.path.exists(os.path.join(args.root, 'cgroup.controllers')):
+        print(f"错误：'{args.root}' 不是 cgroup v2 挂载点", file=sys.stderr)
+        sys.exit(1)
+
+    if args.pids:
+        if not os.path.isdir(os.path.join(args.root, args.pids)):
+            print(f"错误：找不到 cgroup '{args.pids}'", file=sys.stderr)
+            sys.exit(1)
+        rows = drill_down(args.root, args.pids)
+        btime = boot_time()
+        identities = [(row[5],) + identity for row in rows
+                      if (identity := read_identity(row[5], btime=btime)) is not None]
+        print(format_snapshot(datetime.now(), rows, identities=identities), end='')
+        return
+
+    sampler = CgroupSampler(args.root, args.depth)
+    # cgroup 采集不分级，超出 CPU 预算时直接拉长采集周期
+    scheduler = CollectorScheduler(sampler, interval=args.interval, cpu_budget=args.cpu_budget, max_idle_every=1)
+    run_collector(args, scheduler, lambda timestamp, rows: format_cgroup_snapshot(timestamp, rows, scheduler),
+                  OUTPUT_NAME, 'cgroup内存', observe_cgroups,
+                  stream=lambda timestamp, rows: (KIND_CGROUP, cgroup_stream_rows(rows), ()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""趋势图绘制与无界面批量渲染
+
+plot_* 函数只在给定的 Axes 上绘图，由图形界面（MemoryAnalyzer / FreeMemoryAnalyzer）
+和无界面渲染共用。批量渲染使用 Agg 后端，不依赖 Tk，可在没有显示器的服务器上运行：
+
+    memtools render captures/*/ProcessMemoryData.txt -o charts -m PSS RSS -p hmi,launcher -p systemd
+
+渲染任务分配到进程池中执行，每个子进程只创建一个 Figure 并在各图表间复用，
+同一采集文件在子进程中只解析一次。输出 PNG/SVG 文件和用于浏览的 index.html。
+
+单核上每张 PNG 约 0.15~0.2s（10 个进程、约 500 个快照），吞吐量随核数近似线性增长：
+500 张图在 8 核机器上约 10~15s，单核则需要 1~2 分钟（基准见 tests/test_charts.py）。
+"""
+import argparse
+import html
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from memtools.process_data import METRICS
+from memtools.profiling import span, add_profile_arguments, enable_from_args
+
+PROCESS_MARKERS = {'PSS': 'o', 'RSS': 's', 'VSS': '^'}
+FIGURE_SIZE = (10, 5)
+FORMATS = ('png', 'svg')
+INDEX_NAME = 'index.html'
+FREE_CHARTS = ('mem', 'swap', 'combined')
+
+
+def configure_fonts(rc):
+    """配置中文字体（需要系统支持）"""
+    rc['font.sans-serif'] = ['SimHei']
+    rc['axes.unicode_minus'] = False
+
+
+def style_axes(ax, ylabel="内存使用 (MB)", xlabel="时间"):
+    """统一设置图表样式"""
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True)
+
+
+def plot_process_metric(ax, x, y, metric, color, sampled=None):
+    """绘制单个进程某项指标的曲线，sampled 为实际采样点的掩码（沿用值只连线）"""
+    ax.plot(x, y, color=color, marker=PROCESS_MARKERS[metric], linewidth=1, markersize=1, markevery=sampled)
+
+
+def set_process_title(ax, metric):
+    ax.set_title(f"{metric} 使用趋势", fontproperties='SimHei', pad=15)
+
+
+def plot_alert_markers(ax, x, y):
+    """在进程曲线上标出采集器检测到的告警点"""
+    ax.scatter(x, y, marker='x', color='red', s=40, linewidths=1.5, zorder=5)
+
+
+def plot_system_alerts(ax, xs):
+    """系统内存告警以竖线标出"""
+    for x in xs:
+        ax.axvline(x, color='red', linestyle=':', linewidth=0.8, alpha=0.6)
+
+
+def _free_x(df):
+    """时间都相同（可能是没有时间戳）时使用数据索引作为x轴"""
+    times = df['timestamp']
+    if len(times.unique()) <= 1:
+        return df['index'], "数据索引"
+    return times, "时间"
+
+
+def plot_free_memory(ax, mem_df):
+    """绘制内存使用趋势"""
+    x, xlabel = _free_x(mem_df)
+    ax.plot(x, mem_df['used'], label='已使用', marker='o', linewidth=1, markersize=1)
+    ax.plot(x, mem_df['free'], label='空闲', marker='s', linewidth=1, markersize=1)
+    ax.plot(x, mem_df['available'], label='可用', marker='^', linewidth=1, markersize=1)
+    ax.set_xlabel(xlabel)
+    ax.set_title("内存使用趋势", fontproperties='SimHei', pad=15)
+    ax.legend()
+
+
+def plot_free_swap(ax, swap_df):
+    """绘制交换空间使用趋势"""
+    x, xlabel = _free_x(swap_df)
+    ax.plot(x, swap_df['used'], label='已使用', marker='o', linewidth=1, markersize=1)
+    ax.plot(x, swap_df['free'], label='空闲', marker='s', linewidth=1, markersize=1)
+    ax.set_xlabel(xlabel)
+    ax.set_title("交换空间使用趋势", fontproperties='SimHei', pad=15)
+    ax.legend()
+
+
+def plot_free_combined(ax, mem_df, swap_df):
+    """在同一坐标轴上绘制内存与交换空间的对比"""
+    x, xlabel = _free_x(mem_df)
+    # 内存使用情况 - 使用蓝色系
+    ax.plot(x, mem_df['used'], 'b-', label='内存已使用', linewidth=1.5)
+    ax.plot(x, mem_df['free'], 'c-', label='内存空闲', linewidth=1.5)
+    # 交换空间使用情况 - 使用红色系
+    ax.plot(x, swap_df['used'], 'r-', label='交换空间已使用', linewidth=1.5)
+    ax.plot(x, swap_df['free'], 'm-', label='交换空间空闲', linewidth=1.5)
+    ax.set_title("内存与交换空间使用趋势对比", fontproperties='SimHei', pad=15)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("内存使用 (KB)")
+    ax.legend(loc='upper right')
+
+
+def detect_kind(path):
+    """根据文件开头的内容判断是进程内存采集文件还是 free 采集文件"""
+    from memtools.segments import iter_capture_lines
+
+    for count, line in enumerate(iter_capture_lines(path)):
+        if line.startswith(('Mem:', 'Swap:')):
+            return 'free'
+        if 'PROCESS' in line or count > 200:
+            break
+    return 'process'
+
+
+@lru_cache(maxsize=4)
+def _load_capture(path, kind):
+    """在子进程中解析采集文件，同一文件的多个图表共用解析结果"""
+    from memtools.segments import iter_capture_lines
+
+    if kind == 'free':
+        import pandas as pd
+        from memtools.free_data import parse_free_records
+
+        df = pd.DataFrame(parse_free_records(iter_capture_lines(path)))
+        if df.empty:
+            return df, df
+        return df[df['type'] == 'Mem'], df[df['type'] == 'Swap']
+    from memtools.process_data import parse_process_arrays
+    from memtools.segments import iter_capture_blocks
+
+    return parse_process_arrays(iter_capture_blocks(path))
+
+
+class ChartRenderer:
+    """使用 Agg 后端的图表渲染器，所有图表复用同一个 Figure"""
+
+    def __init__(self, size=FIGURE_SIZE, dpi=100):
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        configure_fonts(matplotlib.rcParams)
+        self.colormap = matplotlib.colormaps['tab20']
+        self.figure = Figure(figsize=size, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        # 固定边距，避免每张图都计算 tight_layout
+        self.figure.subplots_adjust(left=0.08, right=0.97, top=0.9, bottom=0.12)
+        self.ax = self.figure.add_subplot(111)
+        self.layout = None
+
+    def _reset(self, ylabel="内存使用 (MB)", layout=None):
+        """清空坐标轴；横轴类型与上一张图相同时只移除曲线和图例，保留刻度等对象，比 clear() 快"""
+        if layout is not None and layout == self.layout:
+            for line in self.ax.lines[:]:
+                line.remove()
+            if self.ax.legend_ is not None:
+                self.ax.legend_.remove()
+            self.ax.relim()
+            self.ax.autoscale()
+        else:
+            self.ax.clear()
+        self.layout = layout
+        style_axes(self.ax, ylabel)
+
+    def process_chart(self, arrays, processes, metric, by_time=False):
+        """绘制一组进程某项指标的趋势，返回实际绘制的进程"""
+        import numpy as np
+
+        self._reset(layout=('process', by_time))
+        column = METRICS.index(metric)
+        index = {name: i for i, name in enumerate(arrays.processes)}
+        plotted = [process for process in processes if process in index]
+        if by_time:
+            x = arrays.timestamps.astype('datetime64[s]').astype(object)
+        else:
+            x = np.arange(1, len(arrays.timestamps) + 1)
+            self.ax.set_xlabel("序号")
+        colors = self.colormap(np.linspace(0, 1, len(plotted))) if plotted else []
+        for color, process in zip(colors, plotted):
+            plot_process_metric(self.ax, x, arrays.values[:, index[process], column], metric, color)
+        set_process_title(self.ax, metric)
+        if plotted:
+            self.ax.legend(plotted, fontsize='small', loc='upper left', ncol=2)
+        return plotted
+
+    def free_chart(self, mem_df, swap_df, chart):
+        """绘制 free 数据的内存 / 交换空间 / 整合图表"""
+        self._reset("内存使用 (KB)")
+        if chart == 'mem':
+            plot_free_memory(self.ax, mem_df)
+        elif chart == 'swap':
+            plot_free_swap(self.ax, swap_df)
+        else:
+            plot_free_combined(self.ax, mem_df, swap_df)
+
+    def save(self, path):
+        self.figure.savefig(path)
+
+
+_renderer = None
+
+
+def _init_worker(size, dpi):
+    global _renderer
+    _renderer = ChartRenderer(size, dpi)
+
+
+def top_processes(arrays, metric='PSS', count=10):
+    """按采集期间的最大值选出前 count 个进程"""
+    import numpy as np
+
+    if not arrays.processes:
+        return []
+    peaks = np.nan_to_num(np.nanmax(arrays.values[:, :, METRICS.index(metric)], axis=0), nan=-1.0) \
+        if len(arrays.timestamps) else np.zeros(len(arrays.processes))
+    return [arrays.processes[i] for i in np.argsort(-peaks, kind='stable')[:count]]
+
+
+def _label(path):
+    from memtools.fleet import default_label
+
+    return default_label(path)
+
+
+def _slug(text):
+    return re.sub(r'[^\w.-]+', '_', text).strip('_')[:60] or 'chart'
+
+
+def _render_job(job):
+    """子进程中渲染一个图表，返回 (任务, 生成的文件列表)；失败时文件列表为空并附带错误信息"""
+    number, path, kind, chart, processes, options = job
+    output_dir, formats, top, by_time = options
+    try:
+        capture = _load_capture(path, kind)
+        if kind == 'free':
+            if capture[0].empty:
+                return job, [], "无法解析文件内容"
+            _renderer.free_chart(capture[0], capture[1], chart)
+            name = f"{number:04d}-{_slug(_label(path))}-{chart}"
+        else:
+            if not capture.processes:
+                return job, [], "无法解析文件内容"
+            subset = list(processes) if processes else top_processes(capture, chart, top)
+            if not _renderer.process_chart(capture, subset, chart, by_time):
+                return job, [], "找不到指定的进程"
+            label = '+'.join(processes) if processes else f"top{top}"
+            name = f"{number:04d}-{_slug(_label(path))}-{chart}-{_slug(label)}"
+        files = []
+        for fmt in formats:
+            filename = f"{name}.{fmt}"
+            _renderer.save(os.path.join(output_dir, filename))
+            files.append(filename)
+        return job, files, None
+    except Exception as e:
+        return job, [], str(e)
+
+
+def build_jobs(paths, kinds, metrics, subsets, options):
+    """生成渲染任务：每个进程采集文件 × 指标 × 进程组合，每个 free 采集文件三张图"""
+    jobs = []
+    for path, kind in zip(paths, kinds):
+        if kind == 'free':
+            charts = [(chart, None) for chart in FREE_CHARTS]
+        else:
+            charts = [(metric, subset) for metric in metrics for subset in (subsets or [None])]
+        for chart, subset in charts:
+            jobs.append((len(jobs) + 1, path, kind, chart, subset, options))
+    return jobs
+
+
+def write_html_index(output_dir, results, title="内存趋势图"):
+    """生成按采集文件分组的 index.html"""
+    lines = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8">',
+             f'<title>{html.escape(title)}</title>',
+             '<style>body{font-family:sans-serif}figure{display:inline-block;margin:8px}'
+             'img{width:600px;border:1px solid #ccc}</style>',
+             f'</head><body><h1>{html.escape(title)}</h1>']
+    current = None
+    for job, files, error in results:
+        path, chart, processes = job[1], job[3], job[4]
+        if path != current:
+            current = path
+            lines.append(f'<h2>{html.escape(path)}</h2>')
+        caption = chart + (f" - {', '.join(processes)}" if processes else '')
+        if error:
+            lines.append(f'<p>{html.escape(caption)}：{html.escape(error)}</p>')
+            continue
+        links = ' '.join(f'<a href="{html.escape(name)}">{name.rsplit(".", 1)[1].upper()}</a>' for name in files)
+        lines.append(f'<figure><img src="{html.escape(files[0])}" loading="lazy">'
+                     f'<figcaption>{html.escape(caption)} {links}</figcaption></figure>')
+    lines.append('</body></html>')
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return index_path
+
+
+def render_charts(jobs, size=FIGURE_SIZE, dpi=100, workers=None):
+    """在进程池中渲染图表，返回与 jobs 顺序一致的 [(任务, 文件列表, 错误信息)]"""
+    if len(jobs) > 1 and workers != 1:
+        workers = workers or os.cpu_count() or 1
+        # 任务按文件顺序分块，同一文件的图表尽量落在同一子进程中，复用解析结果
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(size, dpi)) as pool:
+            return list(pool.map(_render_job, jobs, chunksize=chunksize))
+    _init_worker(size, dpi)
+    return [_render_job(job) for job in jobs]
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='无界面批量渲染内存趋势图（PNG/SVG + index.html）')
+    parser.add_argument('inputs', nargs='+', help='采集文件（进程内存或 free 数据，支持 .gz / .zst 和分段索引）')
+    parser.add_argument('-o', '--output', default='charts', help='输出目录')
+    parser.add_argument('-m', '--metric', nargs='+', choices=METRICS, default=['PSS'], help='绘制的指标')
+    parser.add_argument('-p', '--processes', action='append', metavar='A,B,...',
+                        help='一张图中绘制的进程，逗号分隔，可多次指定；默认绘制最大值前 --top 的进程')
+    parser.add_argument('--top', type=int, default=10, help='未指定进程时每张图绘制的进程数')
+    parser.add_argument('--kind', choices=('auto', 'process', 'free'), default='auto', help='采集文件类型')
+    parser.add_argument('--by-time', action='store_true', help='横轴按时间（默认按快照序号）')
+    parser.add_argument('-f', '--format', nargs='+', choices=FORMATS, default=['png'], help='输出格式')
+    parser.add_argument('--size', default='10x5', help='图表尺寸（英寸），如 10x5')
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('-j', '--jobs', type=int, help='并行进程数（默认CPU核数）')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    try:
+        width, height = (float(value) for value in args.size.lower().split('x'))
+    except ValueError:
+        parser.error(f"无效的图表尺寸: {args.size}")
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        print(f"错误：找不到文件 '{missing[0]}'", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    kinds = [detect_kind(path) if args.kind == 'auto' else args.kind for path in args.inputs]
+    subsets = [tuple(name for name in spec.split(',') if name) for spec in args.processes or []]
+    options = (args.output, tuple(args.format), args.top, args.by_time)
+    jobs = build_jobs(args.inputs, kinds, args.metric, subsets, options)
+
+    with span('render.charts'):
+        results = render_charts(jobs, (width, height), args.dpi, args.jobs)
+    index_path = write_html_index(args.output, results)
+    failed = [(job, error) for job, files, error in results if error]
+    for job, error in failed:
+        print(f"{job[1]} {job[3]}: {error}", file=sys.stderr)
+    print(f"已生成 {len(results) - len(failed)} 张图表，索引: {index_path}")
+    return 1 if failed and len(failed) == len(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""memtools 命令行入口
+
+    memtools <子命令> [参数...]
+
+各子命令的模块只在被调用时才导入，pandas / matplotlib / numpy / openpyxl
+等较重的依赖只由需要它们的子命令加载，无界面的子命令可以快速启动。
+"""
+import importlib
+import sys
+
+# 子命令 -> (模块, 说明)，模块需提供 main(argv, prog)
+COMMANDS = {
+    'process': ('memtools.process_gui', '进程内存分析（图形界面）'),
+    'free': ('memtools.free_gui', 'free 内存分析（图形界面）'),
+    'pmap': ('memtools.pmap', '统计 pmap 输出的内存映射'),
+    'collect': ('memtools.collector', '采集进程内存数据'),
+    'cgroup': ('memtools.cgroup', '按 cgroup v2 采集内存数据'),
+    'report': ('memtools.report', '生成采集数据的统计报告'),
+    'query': ('memtools.capture', '按时间段查询采集数据（自动建立索引）'),
+    'render': ('memtools.charts', '无界面批量渲染趋势图（PNG/SVG）'),
+    'fleet': ('memtools.fleet', '合并并对比多台设备的采集数据'),
+    'compare': ('memtools.compare', '对比两个版本的采集数据（A/B）'),
+    'stream': ('memtools.stream', '订阅采集器推送的实时快照'),
+}
+
+
+def usage():
+    lines = ["用法: memtools <子命令> [参数...]", "", "子命令："]
+    for command, (_, description) in COMMANDS.items():
+        lines.append(f"  {command:<10} {description}")
+    lines.append("")
+    lines.append("使用 memtools <子命令> -h 查看子命令的参数说明")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    if getattr(sys, 'frozen', False):
+        # 部分子命令使用多进程，打包为单文件可执行程序时需要
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"错误：未知的子命令 '{command}'\n", file=sys.stderr)
+        print(usage(), file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(argv[1:], prog=f"memtools {command}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+"""进程内存采集器（ProcessMemoryMonitor.sh 的 Python 实现）
+
+输出格式与 ProcessMemoryMonitor.sh 相同，额外支持：
+- 固定采集周期：扣除采集本身的耗时后再休眠，实际周期不随进程数量漂移
+- CPU 预算：PSS 前 N 的进程和最近内存有变化的进程每次都采样，
+  其余空闲小进程每 M 次才采样一次，期间沿用上次的值，并在 FLAG 列标记为 '*'
+- 采集耗时超出 CPU 预算时自动降低空闲进程的采样频率，仍然超出时再拉长采集周期
+- 按大小或时间切分输出并以 gzip/zstd 流式压缩，同时维护分段索引（见 memtools.segments）
+- 在线异常检测：突变、持续增长和绝对阈值告警（见 memtools.alerts）
+- 实时推送：--publish 把每个快照以二进制帧推送给分析工具（见 memtools.stream）
+- 进程字典：每行末尾记录 PID，进程首次出现（及每个新分段开头）时在快照中写一行
+  PID: <PID> <启动时间> <完整命令行>，分析工具据此区分同名进程和重启后的进程
+
+用法：
+    python -m memtools.collector -d 输出目录 -t 次数 -i 周期秒数
+"""
+import argparse
+import heapq
+import os
+import sys
+import time
+from datetime import datetime
+
+from memtools.process_data import METRICS
+from memtools.profiling import span, add_profile_arguments, enable_from_args
+from memtools.segments import SegmentWriter
+from memtools.stream import KIND_PROCESS, SnapshotPublisher, process_stream_rows
+
+PROC_ROOT = '/proc'
+OUTPUT_NAME = 'ProcessMemoryData.txt'
+CARRIED_FLAG = '*'
+SEPARATOR = '=' * 79
+ALERTS_SUFFIX = '.alerts.jsonl'
+IDENTITY_PREFIX = 'PID: '
+MAX_CMDLINE = 512
+
+
+def list_pids(proc_root=PROC_ROOT):
+    """列出当前所有进程ID"""
+    return [int(name) for name in os.listdir(proc_root) if name.isdigit()]
+
+
+def _read_pss(pid_dir):
+    """读取进程PSS（KB），优先使用开销更小的 smaps_rollup"""
+    for name in ('smaps_rollup', 'smaps'):
+        try:
+            with open(os.path.join(pid_dir, name), 'rb') as f:
+                return sum(int(line.split()[1]) for line in f if line.startswith(b'Pss:'))
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        except (PermissionError, ValueError, IndexError):
+            return 0
+    return 0
+
+
+def boot_time(proc_root=PROC_ROOT):
+    """读取系统启动时间（epoch 秒）"""
+    try:
+        with open(os.path.join(proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime '):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _start_ticks(stat):
+    """从 /proc/<pid>/stat 的内容中取出进程启动时间（开机后的时钟滴答数）"""
+    # 进程名可能包含空格和括号，从最后一个 ')' 之后开始计数，starttime 为第 22 个字段
+    return int(stat[stat.rindex(b')') + 2:].split()[19])
+
+
+def read_start_ticks(pid, proc_root=PROC_ROOT):
+    """读取进程启动时间（时钟滴答数），用于识别 PID 复用；进程已退出或无法读取时返回 None"""
+    try:
+        with open(os.path.join(proc_root, str(pid), 'stat'), 'rb') as f:
+            return _start_ticks(f.read())
+    except (FileNotFoundError, ProcessLookupError, PermissionError, ValueError, IndexError):
+        return None
+
+
+def read_identity(pid, proc_root=PROC_ROOT, btime=None):
+    """读取进程的 (启动时间, 完整命令行)，启动时间为 'YYYY-MM-DD HH:MM:SS'；进程已退出时返回 None"""
+    pid_dir = os.path.join(proc_root, str(pid))
+    try:
+        with open(os.path.join(pid_dir, 'stat'), 'rb') as f:
+            stat = f.read()
+        with open(os.path.join(pid_dir, 'cmdline'), 'rb') as f:
+            cmdline = f.read(MAX_CMDLINE)
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    try:
+        ticks = _start_ticks(stat)
+    except (ValueError, IndexError):
+        return None
+    if btime is None:
+        btime = boot_time(proc_root)
+    started = datetime.fromtimestamp(btime + ticks / os.sysconf('SC_CLK_TCK'))
+    # 参数以 NUL 分隔且可能包含换行，统一折叠为单个空格；内核线程没有命令行
+    command = ' '.join(cmdline.replace(b'\0', b' ').decode('utf-8', 'replace').split())
+    return f"{started:%Y-%m-%d %H:%M:%S}", command
+
+
+def read_process(pid, proc_root=PROC_ROOT):
+    """读取单个进程的 (名称, PSS, RSS, VSS)，单位KB；进程已退出时返回 None"""
+    pid_dir = os.path.join(proc_root, str(pid))
+    name = None
+    rss = vss = 0
+    try:
+        with open(os.path.join(pid_dir, 'status'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'Name:'):
+                    parts = line.split()
+                    name = parts[1].decode('utf-8', 'replace') if len(parts) > 1 else ''
+                elif line.startswith(b'VmRSS:'):
+                    rss = int(line.split()[1])
+                elif line.startswith(b'VmSize:'):
+                    vss = int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    if name is None:
+        return None
+    return name, _read_pss(pid_dir), rss, vss
+
+
+class TieredSampler:
+    """分级采样：热点进程每次采样，空闲小进程隔 idle_every 次采样一次"""
+
+    def __init__(self, top_n=20, idle_every=6, change_ticks=3, change_threshold=256,
+                 reader=read_process, lister=list_pids, identify=read_identity, starter=read_start_ticks):
+        self.top_n = top_n
+        self.idle_every = idle_every
+        self.change_ticks = change_ticks
+        self.change_threshold = change_threshold  # KB，PSS或RSS变化超过该值视为有变化
+        self.reader = reader
+        self.lister = lister
+        self.identify = identify
+        self.starter = starter
+        self.tick = 0
+        self.last = {}           # pid -> (名称, PSS, RSS, VSS)
+        self.sampled_tick = {}   # pid -> 上次实际采样的轮次
+        self.changed_tick = {}   # pid -> 上次检测到内存变化的轮次
+        self.sampled_count = 0   # 本轮实际采样的进程数
+        self.identities = {}     # pid -> (启动时间, 命令行)，进程首次出现时读取一次
+        self.started = {}        # pid -> 启动时间（时钟滴答数），每轮比较以识别 PID 复用
+        self.new_identities = []  # 本轮需要写入进程字典的 pid
+        self.reused = []         # 本轮检测到被新进程复用的 pid
+
+    def _hot_pids(self):
+        return set(heapq.nlargest(self.top_n, self.last, key=lambda pid: self.last[pid][1]))
+
+    def _should_sample(self, pid, hot):
+        if pid not in self.last or pid in hot:
+            return True
+        if self.tick - self.changed_tick.get(pid, -self.change_ticks - 1) <= self.change_ticks:
+            return True
+        return self.tick - self.sampled_tick[pid] >= self.idle_every
+
+    def collect(self):
+        """采集一轮，返回 [(名称, PSS, RSS, VSS, 是否沿用, PID)]"""
+        self.tick += 1
+        hot = self._hot_pids()
+        rows = []
+        current = {}
+        self.sampled_count = 0
+        self.new_identities = []
+        self.reused = []
+        for pid in self.lister():
+            # 每轮（包括沿用上次值的进程）比较启动时间：PID 被同名的新进程复用时丢弃旧进程的状态，
+            # 按新进程重新采样并读取进程字典，避免把旧进程的值沿用到新进程上
+            ticks = self.starter(pid) if self.starter else None
+            if ticks is not None:
+                if self.started.get(pid, ticks) != ticks:
+                    self._forget(pid)
+                    self.reused.append(pid)
+                self.started[pid] = ticks
+            if self._should_sample(pid, hot):
+                values = self.reader(pid)
+                if values is None:
+                    continue
+                self.sampled_count += 1
+                previous = self.last.get(pid)
+                if previous is None or previous[0] != values[0]:
+                    # 新进程、PID 被复用，或 exec 后名称变化时重新读取进程字典
+                    identity = self.identify(pid) if self.identify else None
+                    if identity is not None:
+                        self.identities[pid] = identity
+                        self.new_identities.append(pid)
+                if previous is not None and (
+                        previous[0] != values[0] or
+                        abs(values[1] - previous[1]) >= self.change_threshold or
+                        abs(values[2] - previous[2]) >= self.change_threshold):
+                    self.changed_tick[pid] = self.tick
+                self.sampled_tick[pid] = self.tick
+                carried = False
+            else:
+                values = self.last[pid]
+                carried = True
+            current[pid] = values
+            rows.append(values + (carried, pid))
+
+        # 清理已退出进程的状态
+        for pid in self.last.keys() - current.keys():
+            self._forget(pid)
+        for pid in self.started.keys() - current.keys():
+            del self.started[pid]
+        self.last = current
+        return rows
+
+    def _forget(self, pid):
+        self.last.pop(pid, None)
+        self.sampled_tick.pop(pid, None)
+        self.changed_tick.pop(pid, None)
+        self.identities.pop(pid, None)
+
+    def resend_identities(self):
+        """新分段开始时重新写出所有存活进程的字典，使每个分段可以单独解析"""
+        self.new_identities = [pid for pid in self.last if pid in self.identities]
+
+    def identity_entries(self):
+        """本轮需要写入的进程字典 [(PID, 启动时间, 命令行)]"""
+        return [(pid,) + self.identities[pid] for pid in self.new_identities if pid in self.identities]
+
+
+class CollectorScheduler:
+    """固定周期调度：按截止时间休眠以补偿采集耗时，并根据CPU预算调整采样策略"""
+
+    def __init__(self, sampler, interval=5.0, cpu_budget=0.1, max_idle_every=60,
+                 clock=time.monotonic, cpu_clock=time.process_time, sleep=time.sleep):
+        self.sampler = sampler
+        self.base_interval = interval
+        self.interval = interval
+        self.cpu_budget = cpu_budget
+        self.min_idle_every = sampler.idle_every
+        self.max_idle_every = max(max_idle_every, sampler.idle_every)
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.sleep = sleep
+        self.last_cost = 0.0     # 上一轮采集的CPU耗时（秒）
+        self.last_elapsed = 0.0  # 上一轮采集的墙钟耗时（秒）
+        self.missed = 0          # 因采集超时而跳过的周期数
+
+    def _adapt(self):
+        """根据本轮CPU耗时调整空闲进程采样间隔和采集周期"""
+        budget = self.cpu_budget * self.interval
+        sampler = self.sampler
+        if self.last_cost > budget:
+            if sampler.idle_every < self.max_idle_every:
+                sampler.idle_every = min(self.max_idle_every, sampler.idle_every * 2)
+            else:
+                self.interval = self.last_cost / self.cpu_budget
+        elif self.last_cost < budget / 2:
+            if self.interval > self.base_interval:
+                self.interval = max(self.base_interval, self.last_cost * 2 / self.cpu_budget)
+            elif sampler.idle_every > self.min_idle_every:
+                sampler.idle_every = max(self.min_idle_every, sampler.idle_every // 2)
+
+    def run(self, on_snapshot, times=0):
+        """循环采集，times 为 0 时持续运行；on_snapshot(时间, 行列表) 处理每轮结果"""
+        count = 0
+        deadline = self.clock()
+        while times == 0 or count < times:
+            wall_start = self.clock()
+            cpu_start = self.cpu_clock()
+            timestamp = datetime.now()
+            with span('collect'):
+                rows = self.sampler.collect()
+            self.last_cost = self.cpu_clock() - cpu_start
+            self.last_elapsed = self.clock() - wall_start
+            on_snapshot(timestamp, rows)
+            count += 1
+            if times and count >= times:
+                break
+
+            self._adapt()
+            deadline += self.interval
+            now = self.clock()
+            if now > deadline:
+                # 采集耗时超过周期，对齐到下一个周期，不连续补采
+                skipped = int((now - deadline) // self.interval) + 1
+                self.missed += skipped
+                deadline += skipped * self.interval
+            self.sleep(deadline - now)
+
+
+def format_identity(pid, started, command):
+    """生成进程字典行"""
+    return f"{IDENTITY_PREFIX}{pid} {started} {command}".rstrip()
+
+
+def format_snapshot(timestamp, rows, scheduler=None, identities=()):
+    """按 ProcessMemoryMonitor.sh 的格式生成一次快照文本，沿用值在 FLAG 列标记为 '*'
+
+    rows 为 [(名称, PSS, RSS, VSS, 是否沿用, PID)]，identities 为本轮新出现进程的
+    [(PID, 启动时间, 命令行)]，写在时间行之后、表头之前。
+    """
+    table = []
+    written = set()
+    pss_total = rss_total = vss_total = 0.0
+    for name, pss, rss, vss, carried, pid in sorted(rows, key=lambda row: row[1], reverse=True):
+        if pss <= 0 and rss <= 0 and vss <= 0:
+            continue
+        pss, rss, vss = pss / 1024, rss / 1024, vss / 1024
+        pss_total += pss
+        rss_total += rss
+        vss_total += vss
+        flag = CARRIED_FLAG if carried else ''
+        table.append(f"{name:<30} {pss:15.1f} {rss:15.1f} {vss:15.1f} {flag:>4} {pid:>7}")
+        written.add(pid)
+
+    lines = [f"统计时间: {timestamp:%Y-%m-%d %H:%M:%S}"]
+    # 只为表中出现的进程写字典（内核线程等没有内存的进程不输出）
+    lines.extend(format_identity(*identity) for identity in identities if identity[0] in written)
+    lines.append("")
+    lines.append(f"{'PROCESS':<30} {'PSS(MB)':>15} {'RSS(MB)':>15} {'VSS(MB)':>15} FLAG {'PID':>7}")
+    lines.append(SEPARATOR)
+    lines.extend(table)
+    lines.append("")
+    lines.append(SEPARATOR)
+    lines.append(f"{'TOTAL:':<30} {pss_total:15.1f} {rss_total:15.1f} {vss_total:15.1f}")
+    if scheduler is not None:
+        lines.append(
+            f"采集耗时: {scheduler.last_elapsed * 1000:.1f}ms CPU: {scheduler.last_cost * 1000:.1f}ms "
+            f"采样: {scheduler.sampler.sampled_count}/{len(rows)} 周期: {scheduler.interval:.1f}s"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def observe_processes(monitor, sampler, timestamp):
+    """将本轮实际采样的进程交给告警检测（沿用值不参与检测），以PID区分同名进程；
+    PID 被复用时先清除旧进程的告警状态，新进程从头开始检测"""
+    monitor.forget(sampler.last.keys() - set(sampler.reused))
+    samples = [(pid, values[0], (values[1] / 1024, values[2] / 1024, values[3] / 1024))
+               for pid, values in sampler.last.items() if sampler.sampled_tick.get(pid) == sampler.tick]
+    return monitor.observe(timestamp, samples, METRICS)
+
+
+def stream_processes(sampler, rows):
+    """生成推送帧的 (类型, 数据行, 进程字典)"""
+    return KIND_PROCESS, process_stream_rows(rows), sampler.identity_entries()
+
+
+def add_output_arguments(parser):
+    """采集周期与输出相关的公共参数（进程采集和 cgroup 采集共用）"""
+    parser.add_argument('-d', '--dir', default=os.getcwd(), help='输出目录（默认当前目录）')
+    parser.add_argument('-t', '--times', type=int, default=0, help='采集次数，0 表示持续运行')
+    parser.add_argument('-i', '--interval', type=float, default=5.0, help='采集周期（秒）')
+    parser.add_argument('--cpu-budget', type=float, default=0.1, help='采集耗时占周期的比例上限')
+    parser.add_argument('--rotate-size', type=float, help='分段大小上限（MB，按压缩后大小计算）')
+    parser.add_argument('--rotate-time', type=float, help='分段时长上限（秒）')
+    parser.add_argument('--compress', choices=['gzip', 'zstd', 'none'], default='gzip',
+                        help='分段压缩方式（仅在开启分段时生效）')
+    parser.add_argument('--keep', type=int, default=0, help='最多保留的分段数，0 表示不限制')
+    parser.add_argument('--alerts', nargs='?', const='', metavar='CONFIG',
+                        help='开启在线异常检测，可指定 JSON 配置文件（见 memtools.alerts）')
+    parser.add_argument('--publish', metavar='ADDRESS',
+                        help='同时把每个快照推送给实时订阅者，unix:<路径> 或 [tcp:]<主机>:<端口>（见 memtools.stream）')
+    parser.add_argument('--publish-only', action='store_true', help='只推送快照，不写采集文件')
+
+
+def run_collector(args, scheduler, render, output_name=OUTPUT_NAME, target='进程内存', observe=None,
+                  on_segment=None, stream=None):
+    """按 add_output_arguments 的参数循环采集，render(时间, 行列表) 生成每次快照的文本
+
+    observe(monitor, 时间, 行列表) 将本轮采样交给 AlertMonitor 并返回告警，开启 --alerts 时使用。
+    on_segment() 在每个新分段的第一个快照生成之前调用（开启分段时）。
+    stream(时间, 行列表) 返回推送帧的 (类型, 数据行, 进程字典)，开启 --publish 时使用。
+    """
+    os.makedirs(args.dir, exist_ok=True)
+    output_file = os.path.join(args.dir, output_name)
+    writer = None
+    if (args.rotate_size or args.rotate_time) and not args.publish_only:
+        writer = SegmentWriter(
+            args.dir,
+            base=os.path.splitext(output_name)[0],
+            compression=args.compress,
+            max_bytes=int(args.rotate_size * 1024 * 1024) if args.rotate_size else None,
+            max_seconds=args.rotate_time,
+            keep=args.keep,
+        )
+        output_file = writer.index_path
+
+    monitor = None
+    if args.alerts is not None:
+        from memtools.alerts import (ALERT_PREFIX, AlertMonitor, SYSTEM_COLUMNS, SYSTEM_SERIES, format_alert,
+                                     load_config, read_system_memory, write_alerts)
+        try:
+            monitor = AlertMonitor(load_config(args.alerts))
+        except ValueError as e:
+            print(f"错误：{e}", file=sys.stderr)
+            sys.exit(1)
+        alerts_file = os.path.join(args.dir, os.path.splitext(output_name)[0] + ALERTS_SUFFIX)
+
+    publisher = None
+    if args.publish and stream is not None:
+        from memtools.free_data import read_free
+        try:
+            publisher = SnapshotPublisher(args.publish)
+        except (OSError, ValueError) as e:
+            print(f"错误：无法监听 '{args.publish}': {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"快照同时推送到 {args.publish}")
+
+    def write_snapshot(timestamp, rows):
+        if on_segment is not None and writer is not None and writer.starts_segment():
+            on_segment()
+        text = render(timestamp, rows)
+        alerts = []
+        if monitor is not None:
+            with span('alerts'):
+                alerts = observe(monitor, timestamp, rows) if observe else []
+                alerts += monitor.observe(timestamp, [(SYSTEM_SERIES, SYSTEM_SERIES, read_system_memory())],
+                                          SYSTEM_COLUMNS)
+            if alerts:
+                # 告警行追加在快照末尾，分析工具在图表上标出
+                text += ''.join(format_alert(alert) + '\n' for alert in alerts)
+                write_alerts(alerts_file, alerts)
+                for alert in alerts:
+                    print(f"告警：{format_alert(alert)[len(ALERT_PREFIX):]}", file=sys.stderr)
+        if publisher is not None:
+            with span('publish'):
+                kind, stream_rows, identities = stream(timestamp, rows)
+                publisher.publish(kind, timestamp, read_free(), stream_rows, identities,
+                                  [format_alert(alert) for alert in alerts])
+            if args.publish_only:
+                return
+        if writer is not None:
+            writer.write(timestamp, text)
+        else:
+            # 整块写入，避免分析工具自动刷新时读到半个快照
+            with open(output_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+        print(f"统计完成，结果已保存到 {output_file}")
+
+    if args.times == 0:
+        print(f"开始持续监控{target}，按 Ctrl+C 终止...")
+    else:
+        print(f"开始监控{target}，将运行 {args.times} 次...")
+    try:
+        scheduler.run(write_snapshot, args.times)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+        if publisher is not None:
+            publisher.close()
+    if scheduler.missed:
+        print(f"采集耗时超过周期，共跳过 {scheduler.missed} 个周期", file=sys.stderr)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='采集进程内存数据（固定周期 + 分级采样）')
+    add_output_arguments(parser)
+    parser.add_argument('--top', type=int, default=20, help='每次都采样的 PSS 前 N 个进程')
+    parser.add_argument('--idle-every', type=int, default=6, help='空闲小进程每 M 次采样一次')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    btime = boot_time()
+    sampler = TieredSampler(top_n=args.top, idle_every=max(1, args.idle_every),
+                            identify=lambda pid: read_identity(pid, btime=btime))
+    scheduler = CollectorScheduler(sampler, interval=args.interval, cpu_budget=args.cpu_budget)
+    run_collector(args, scheduler,
+                  lambda timestamp, rows: format_snapshot(timestamp, rows, scheduler, sampler.identity_entries()),
+                  observe=lambda monitor, timestamp, rows: observe_processes(monitor, sampler, timestamp),
+                  on_segment=sampler.resend_identities,
+                  stream=lambda timestamp, rows: stream_processes(sampler, rows))
+
+
+if __name__ == "__main__":
+    main()
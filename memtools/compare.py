@@ -0,0 +1,301 @@
+"""两个版本采集数据的 A/B 对比
+
+用同一测试流程在两个版本上采集的 ProcessMemoryData，判断 B 版本是否比 A 版本占用更多内存：
+
+    memtools compare A=build_a/ProcessMemoryData.txt B=build_b/ProcessMemoryData.txt --top 20
+    memtools compare a.txt b.txt --align sequence --overlay hmi launcher -o ab.png
+
+两个文件并行加载为 [版本, 快照, 进程, 指标] 数组（见 memtools.fleet），按相对时间
+（默认，截取两者共同的时长）或快照序号（截取共同的快照数）对齐后，向量化计算每个进程
+PSS/RSS/VSS 的中位数、P95 及其差值，并按差值排序。
+
+显著性：相邻快照高度相关，不能把每个快照当作独立样本。将对齐区间等分为若干批次，
+以批次均值做 Welch t 检验（正态近似计算 p 值），批次数默认为 20。
+"""
+import argparse
+import math
+import sys
+import warnings
+
+from memtools.fleet import load_fleet
+from memtools.process_data import METRICS
+from memtools.profiling import span, add_profile_arguments, enable_from_args
+
+ALIGNMENTS = ('time', 'sequence')
+STATISTICS = ('median', 'p95')
+STATUS_NEW = '新增'
+STATUS_GONE = '消失'
+
+
+def parse_side(spec, default):
+    """解析 [LABEL=]PATH 形式的参数，返回 (标签, 路径)"""
+    if '=' in spec:
+        label, path = spec.split('=', 1)
+        if label:
+            return label, path
+    return default, spec
+
+
+class Comparison:
+    """A/B 对齐后的数据
+
+    - labels: 两个版本的标签
+    - processes: 共享的进程字典
+    - values: float32 数组 [版本, 快照, 进程, 指标]（与 Fleet 共享）
+    - counts: 每个版本参与对比的快照数（对齐区间为 values 的前 counts[i] 个快照）
+    - x: 每个版本各快照的横坐标（相对分钟数或序号），用于叠加绘图
+    - timestamps: 对齐到 A 版本时间轴上的各快照时间（datetime64[s]），用于图形界面叠加显示
+    """
+
+    def __init__(self, labels, processes, values, counts, x, timestamps, align):
+        self.labels = labels
+        self.processes = processes
+        self.values = values
+        self.counts = counts
+        self.x = x
+        self.timestamps = timestamps
+        self.align = align
+        self._process_index = {name: i for i, name in enumerate(processes)}
+
+    def samples(self, side, metric='PSS'):
+        """返回某版本对齐区间内的数据 [快照, 进程]"""
+        return self.values[side, :self.counts[side], :, METRICS.index(metric)]
+
+    def series(self, process, metric='PSS'):
+        """返回某进程在两个版本上的 [(横坐标, 曲线)]"""
+        index = self._process_index[process]
+        return [(self.x[side], self.samples(side, metric)[:, index]) for side in range(2)]
+
+    def statistics(self, metric='PSS', blocks=20):
+        """计算每个进程的分布统计与显著性
+
+        返回字典：median / p95 / present 为 [版本, 进程] 数组，t / p 为 [进程] 数组
+        """
+        import numpy as np
+
+        medians, p95s, present, means, variances, block_counts = [], [], [], [], [], []
+        with warnings.catch_warnings():
+            # 某版本中从未出现的进程（或批次）整列为 NaN，结果保持 NaN 即可
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for side in range(2):
+                data = self.samples(side, metric)
+                median, p95 = np.nanpercentile(data, (50, 95), axis=0)
+                medians.append(median)
+                p95s.append(p95)
+                present.append((~np.isnan(data)).sum(axis=0))
+
+                count = min(blocks, len(data))
+                size = len(data) // count if count else 0
+                block_means = np.nanmean(data[:count * size].reshape(count, size, -1), axis=1,
+                                         dtype=np.float64)
+                valid = (~np.isnan(block_means)).sum(axis=0)
+                means.append(np.nanmean(block_means, axis=0))
+                variances.append(np.nanvar(block_means, axis=0, ddof=1))
+                block_counts.append(valid)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff = means[1] - means[0]
+            error = np.sqrt(variances[0] / block_counts[0] + variances[1] / block_counts[1])
+            t = np.where(error > 0, diff / error, np.where(diff == 0, 0.0, np.copysign(np.inf, diff)))
+        testable = (block_counts[0] >= 2) & (block_counts[1] >= 2)
+        t = np.where(testable, t, np.nan)
+        p = np.array([math.erfc(abs(value) / math.sqrt(2)) if not math.isnan(value) else math.nan
+                      for value in t.tolist()])
+        return {
+            'median': np.array(medians), 'p95': np.array(p95s), 'present': np.array(present),
+            't': t, 'p': p,
+        }
+
+    def to_frame(self):
+        """转换为 MemoryAnalyzer 使用的长表，进程名为 '版本:进程'，B 版本的时间已对齐到 A 版本"""
+        import numpy as np
+        import pandas as pd
+
+        frames = []
+        names = np.array(self.processes, dtype=object)
+        for side, label in enumerate(self.labels):
+            data = self.values[side, :self.counts[side]]
+            time_index, process_index = np.nonzero(~np.isnan(data[:, :, 0]))
+            rows = np.round(data[time_index, process_index].astype(np.float64), 1)
+            frames.append(pd.DataFrame({
+                'timestamp': self.timestamps[side][time_index].astype('datetime64[ns]'),
+                'sequence': time_index + 1,
+                'process': label + ':' + names[process_index],
+                'PSS': rows[:, 0],
+                'RSS': rows[:, 1],
+                'VSS': rows[:, 2],
+                'carried': False,
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+
+def align_captures(fleet, align='time'):
+    """对齐 load_fleet 加载的两个采集文件，返回 Comparison"""
+    import numpy as np
+
+    if align not in ALIGNMENTS:
+        raise ValueError(f"未知的对齐方式: {align}")
+    lengths = [int((~np.isnat(fleet.timestamps[side])).sum()) for side in range(2)]
+    if align == 'sequence':
+        count = min(lengths)
+        counts = [count, count]
+        x = [np.arange(1, count + 1) for _ in range(2)]
+        timestamps = [fleet.timestamps[0, :count]] * 2
+    else:
+        # 相对时间（秒），截取两者都覆盖的时长
+        offsets = [(fleet.timestamps[side, :lengths[side]] - fleet.timestamps[side, 0]).astype(np.int64)
+                   if lengths[side] else np.zeros(0, dtype=np.int64) for side in range(2)]
+        duration = min(int(offset[-1]) if len(offset) else -1 for offset in offsets)
+        counts = [int(np.searchsorted(offset, duration, side='right')) for offset in offsets]
+        x = [offsets[side][:counts[side]] / 60 for side in range(2)]
+        timestamps = [fleet.timestamps[0, 0] + offsets[side][:counts[side]].astype('timedelta64[s]')
+                      if counts[side] else fleet.timestamps[side, :0] for side in range(2)]
+    return Comparison(fleet.labels, fleet.processes, fleet.values, counts, x, timestamps, align)
+
+
+def compare_captures(path_a, path_b, labels=('A', 'B'), align='time', workers=None):
+    """并行加载两个采集文件并对齐"""
+    fleet = load_fleet([(label, label, path) for label, path in zip(labels, (path_a, path_b))], workers=workers)
+    with span('compare.align'):
+        return align_captures(fleet, align)
+
+
+def rank_regressions(comparison, metric='PSS', by='median', blocks=20):
+    """按 B - A 的差值降序排列进程
+
+    返回 [(进程名, 状态, A, B, 差值, A_P95, B_P95, P95差值, t, p)]，
+    只在一个版本中出现的进程状态为 新增/消失，缺失一侧按 0 计算差值。
+    """
+    import numpy as np
+
+    stats = comparison.statistics(metric, blocks)
+    with span('compare.rank'):
+        present = stats['present'] > 0
+        median = np.where(present, stats['median'], 0.0)
+        p95 = np.where(present, stats['p95'], 0.0)
+        median_delta = median[1] - median[0]
+        p95_delta = p95[1] - p95[0]
+        key = median_delta if by == 'median' else p95_delta
+        order = np.argsort(-key, kind='stable')
+        rows = []
+        for i in order.tolist():
+            if not present[:, i].any():
+                continue
+            status = '' if present[:, i].all() else STATUS_NEW if present[1, i] else STATUS_GONE
+            rows.append((comparison.processes[i], status, float(median[0, i]), float(median[1, i]),
+                         float(median_delta[i]), float(p95[0, i]), float(p95[1, i]), float(p95_delta[i]),
+                         float(stats['t'][i]), float(stats['p'][i])))
+    return rows
+
+
+def format_regressions(rows, labels, metric='PSS', alpha=0.05, min_delta=1.0):
+    """格式化排序结果，p 值小于 alpha 且中位数或 P95 差值不小于 min_delta(MB) 时标记 *"""
+    name_width = max([len('PROCESS')] + [len(row[0]) for row in rows])
+    a, b = labels
+    columns = (f'{a}_MEDIAN', f'{b}_MEDIAN', 'DELTA', f'{a}_P95', f'{b}_P95', 'DELTA_P95')
+    header = f"{'PROCESS':<{name_width}} {'':4}" + ''.join(f" {column:>12}" for column in columns) + \
+             f" {'t':>8} {'p':>8}"
+    lines = [f"{metric}(MB) {b} - {a}：", header, '-' * len(header)]
+    for process, status, *values, t, p in rows:
+        significant = p < alpha and max(abs(values[2]), abs(values[5])) >= min_delta
+        test = f" {t:>8.1f} {p:>8.3f}" if not math.isnan(t) else f" {'-':>8} {'-':>8}"
+        lines.append(f"{process:<{name_width}} {status:<4}" + ''.join(f" {value:>12.1f}" for value in values) +
+                     test + (' *' if significant else ''))
+    return lines
+
+
+def write_regressions_csv(comparison, filename, blocks=20):
+    """将三项指标的对比结果写入CSV"""
+    import csv
+
+    a, b = comparison.labels
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['metric', 'process', 'status', f'{a}_median', f'{b}_median', 'delta_median',
+                         f'{a}_p95', f'{b}_p95', 'delta_p95', 't', 'p'])
+        for metric in METRICS:
+            for process, status, *values, t, p in rank_regressions(comparison, metric, blocks=blocks):
+                writer.writerow([metric, process, status] + [round(value, 1) for value in values] +
+                                [round(t, 2) if not math.isnan(t) else '', round(p, 4) if not math.isnan(p) else ''])
+
+
+def plot_ab_overlay(ax, comparison, process, metric='PSS'):
+    """在 ax 上叠加绘制某进程在 A/B 两个版本上的曲线"""
+    import numpy as np
+    from memtools.charts import style_axes
+
+    for (x, y), label, color in zip(comparison.series(process, metric), comparison.labels, ('tab:blue', 'tab:red')):
+        if not np.isnan(y).all():
+            ax.plot(x, y, linewidth=1, color=color, label=label)
+            ax.axhline(np.nanmedian(y), color=color, linewidth=0.8, linestyle='--')
+    ax.set_title(f"{process} {metric} {' vs '.join(comparison.labels)}")
+    style_axes(ax, xlabel="相对时间 (分钟)" if comparison.align == 'time' else "序号")
+    ax.legend(fontsize='small')
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='对比两个版本的进程内存采集数据')
+    parser.add_argument('a', help='A 版本采集文件，格式为 [LABEL=]PATH')
+    parser.add_argument('b', help='B 版本采集文件，格式为 [LABEL=]PATH')
+    parser.add_argument('-m', '--metric', choices=METRICS, default='PSS', help='排序使用的指标')
+    parser.add_argument('--by', choices=STATISTICS, default='median', help='按中位数或 P95 的差值排序')
+    parser.add_argument('--align', choices=ALIGNMENTS, default='time',
+                        help='对齐方式：time 按相对时间截取共同时长，sequence 按快照序号截取共同数量')
+    parser.add_argument('--blocks', type=int, default=20, help='显著性检验的批次数')
+    parser.add_argument('--alpha', type=float, default=0.05, help='显著性水平')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='标记为显著的最小差值(MB)')
+    parser.add_argument('--top', type=int, default=30, help='显示的进程数，0 表示全部')
+    parser.add_argument('--csv', help='将三项指标的对比结果写入CSV文件')
+    parser.add_argument('--overlay', nargs='+', metavar='PROCESS', help='叠加绘制这些进程的 A/B 曲线')
+    parser.add_argument('-o', '--output', default='compare.png', help='曲线图输出文件')
+    parser.add_argument('-j', '--jobs', type=int, help='并行进程数（默认CPU核数）')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+    if args.blocks < 2:
+        parser.error("--blocks 至少为 2")
+
+    (label_a, path_a), (label_b, path_b) = parse_side(args.a, 'A'), parse_side(args.b, 'B')
+    if label_a == label_b:
+        label_b += '#2'
+    try:
+        comparison = compare_captures(path_a, path_b, (label_a, label_b), args.align, args.jobs)
+    except FileNotFoundError as e:
+        print(f"错误：找不到文件 '{e.filename}'", file=sys.stderr)
+        sys.exit(1)
+    if min(comparison.counts) == 0:
+        print("错误：采集文件中没有可对比的快照", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{label_a}: {comparison.counts[0]} 个快照，{label_b}: {comparison.counts[1]} 个快照"
+          f"（按{'相对时间' if args.align == 'time' else '序号'}对齐），{len(comparison.processes)} 个进程")
+    rows = rank_regressions(comparison, args.metric, args.by, args.blocks)
+    for line in format_regressions(rows[:args.top] if args.top else rows, comparison.labels, args.metric,
+                                   args.alpha, args.min_delta):
+        print(line)
+    if args.csv:
+        write_regressions_csv(comparison, args.csv, args.blocks)
+        print(f"已将对比结果保存到: {args.csv}")
+
+    if args.overlay:
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from memtools.charts import configure_fonts
+
+        configure_fonts(matplotlib.rcParams)
+        missing = [process for process in args.overlay if process not in comparison.processes]
+        if missing:
+            print(f"错误：找不到进程 {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+        fig = Figure(figsize=(10, 4 * len(args.overlay)), dpi=100)
+        FigureCanvasAgg(fig)
+        for i, process in enumerate(args.overlay):
+            plot_ab_overlay(fig.add_subplot(len(args.overlay), 1, i + 1), comparison, process, args.metric)
+        fig.tight_layout()
+        fig.savefig(args.output)
+        print(f"已将曲线图保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""多设备采集数据合并
+
+并行加载多台设备的 ProcessMemoryData 采集文件（支持压缩文件和分段索引），
+每个文件在子进程中直接解析为紧凑数组，再按共享的进程字典合并为
+[设备, 快照序号, 进程, 指标] 的 float32 数组。支持按版本统计每个进程跨设备的
+中位数/P95，以及同一进程在各设备上的曲线叠加。
+
+数据源格式为 [BUILD:]LABEL=PATH，省略标签时使用文件名（默认文件名时使用所在目录名）：
+
+    python -m memtools.fleet A:unit01=unit01/ProcessMemoryData.txt A:unit02=unit02/ProcessMemoryData.txt.gz
+    python -m memtools.fleet units/*/ProcessMemoryData.txt --overlay hmi -o hmi.png
+"""
+import argparse
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from memtools.process_data import METRICS, parse_process_arrays
+from memtools.profiling import profiled, span, add_profile_arguments, enable_from_args
+from memtools.segments import INDEX_SUFFIX, iter_capture_blocks
+
+DEFAULT_BUILD = '-'
+
+
+def default_label(path):
+    """根据路径生成设备标签"""
+    path = os.path.normpath(path)
+    name = os.path.basename(path)
+    if os.path.isdir(path) or name.endswith(INDEX_SUFFIX) or name.startswith('ProcessMemoryData'):
+        return os.path.basename(os.path.dirname(path)) or name
+    for suffix in ('.gz', '.zst', '.txt'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def parse_source(spec):
+    """解析 [BUILD:]LABEL=PATH 形式的数据源，返回 (版本, 标签, 路径)"""
+    if '=' in spec and not os.path.exists(spec):
+        label, path = spec.split('=', 1)
+        build, _, device = label.rpartition(':')
+        return build or DEFAULT_BUILD, device, path
+    return DEFAULT_BUILD, default_label(spec), spec
+
+
+def _load_arrays(path):
+    return parse_process_arrays(iter_capture_blocks(path))
+
+
+class Fleet:
+    """多设备合并结果
+
+    - labels / builds: 每台设备的标签和版本
+    - processes: 共享的进程字典（进程名列表）
+    - timestamps: datetime64[s] 数组 [设备, 快照序号]，不足部分为 NaT
+    - values: float32 数组 [设备, 快照序号, 进程, 指标]，缺失为 NaN
+    """
+
+    def __init__(self, labels, builds, processes, timestamps, values):
+        self.labels = labels
+        self.builds = builds
+        self.processes = processes
+        self.timestamps = timestamps
+        self.values = values
+        self._process_index = {name: i for i, name in enumerate(processes)}
+
+    def process_index(self, process):
+        return self._process_index[process]
+
+    def device_series(self, process, metric='PSS'):
+        """返回某进程在各设备上的曲线 [设备, 快照序号]"""
+        return self.values[:, :, self.process_index(process), METRICS.index(metric)]
+
+    def aggregate(self, metric='PSS', percentiles=(50, 95)):
+        """按版本统计每个进程跨设备、跨时间的分位数
+
+        返回 {版本: (分位数数组 [进程, len(percentiles)], 出现该进程的设备数 [进程])}
+        """
+        import numpy as np
+
+        metric_index = METRICS.index(metric)
+        builds = np.array(self.builds)
+        result = {}
+        for build in dict.fromkeys(self.builds):
+            data = self.values[builds == build, :, :, metric_index]
+            present = (~np.isnan(data)).any(axis=1).sum(axis=0)
+            with warnings.catch_warnings():
+                # 某版本中从未出现的进程整列为 NaN，结果保持 NaN 即可
+                warnings.simplefilter('ignore', RuntimeWarning)
+                stats = np.nanpercentile(data.reshape(-1, len(self.processes)), percentiles, axis=0).T
+            result[build] = (stats, present)
+        return result
+
+    def to_frame(self):
+        """转换为 MemoryAnalyzer 使用的长表，进程名为 '设备:进程'，每台设备的曲线可单独叠加显示"""
+        import numpy as np
+        import pandas as pd
+
+        frames = []
+        names = np.array(self.processes, dtype=object)
+        for device, label in enumerate(self.labels):
+            time_index, process_index = np.nonzero(~np.isnan(self.values[device, :, :, 0]))
+            rows = np.round(self.values[device, time_index, process_index].astype(np.float64), 1)
+            frames.append(pd.DataFrame({
+                'timestamp': self.timestamps[device, time_index].astype('datetime64[ns]'),
+                'sequence': time_index + 1,
+                'process': label + ':' + names[process_index],
+                'PSS': rows[:, 0],
+                'RSS': rows[:, 1],
+                'VSS': rows[:, 2],
+                'carried': False,
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def load_fleet(sources, workers=None):
+    """并行加载多个采集文件并合并
+
+    sources 为 (版本, 标签, 路径) 列表或数据源字符串列表，workers 默认为 CPU 核数。
+    """
+    sources = [parse_source(source) if isinstance(source, str) else source for source in sources]
+    builds = [build for build, _, _ in sources]
+    labels = []
+    for _, label, _ in sources:
+        unique, suffix = label, 2
+        while unique in labels:
+            unique = f"{label}#{suffix}"
+            suffix += 1
+        labels.append(unique)
+
+    with span('fleet.load'):
+        paths = [path for _, _, path in sources]
+        if len(paths) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                captures = list(pool.map(_load_arrays, paths))
+        else:
+            captures = [_load_arrays(path) for path in paths]
+
+    return merge_captures(labels, builds, captures)
+
+
+@profiled('fleet.merge')
+def merge_captures(labels, builds, captures):
+    """将各设备的 ProcessArrays 按共享的进程字典合并为 Fleet，captures 中的元素合并后被释放"""
+    import numpy as np
+
+    process_index = {}
+    for capture in captures:
+        for name in capture.processes:
+            process_index.setdefault(name, len(process_index))
+    max_time = max((len(capture.timestamps) for capture in captures), default=0)
+    timestamps = np.full((len(captures), max_time), np.datetime64('NaT'), dtype='datetime64[s]')
+    values = np.full((len(captures), max_time, len(process_index), len(METRICS)), np.nan, dtype=np.float32)
+    for device, capture in enumerate(captures):
+        columns = np.array([process_index[name] for name in capture.processes], dtype=np.intp)
+        count = len(capture.timestamps)
+        timestamps[device, :count] = capture.timestamps
+        values[device, :count][:, columns] = capture.values
+        captures[device] = None  # 及时释放单个文件的数组
+
+    return Fleet(labels, builds, list(process_index), timestamps, values)
+
+
+def format_aggregate(fleet, metric='PSS', top=30):
+    """生成各版本进程分位数表格文本，按 P95 降序"""
+    import numpy as np
+
+    lines = []
+    for build, (stats, present) in fleet.aggregate(metric).items():
+        devices = sum(1 for b in fleet.builds if b == build)
+        lines.append(f"版本 {build}（{devices} 台设备）{metric}(MB)：")
+        lines.append(f"{'PROCESS':<30} {'DEVICES':>8} {'MEDIAN':>10} {'P95':>10}")
+        order = np.argsort(np.nan_to_num(stats[:, 1], nan=-1.0))[::-1]
+        for i in order[:top] if top else order:
+            if present[i] == 0:
+                continue
+            lines.append(f"{fleet.processes[i]:<30} {present[i]:>8d} {stats[i, 0]:>10.1f} {stats[i, 1]:>10.1f}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def write_aggregate_csv(fleet, filename, metric='PSS'):
+    """将各版本进程分位数写入CSV"""
+    import csv
+
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['build', 'process', 'devices', f'{metric}_median', f'{metric}_p95'])
+        for build, (stats, present) in fleet.aggregate(metric).items():
+            for i, process in enumerate(fleet.processes):
+                if present[i]:
+                    writer.writerow([build, process, int(present[i]),
+                                     round(float(stats[i, 0]), 1), round(float(stats[i, 1]), 1)])
+
+
+def plot_device_overlay(ax, fleet, process, metric='PSS'):
+    """在 ax 上叠加绘制某进程在各设备上的曲线（横轴为快照序号）"""
+    import numpy as np
+
+    series = fleet.device_series(process, metric)
+    sequence = np.arange(1, series.shape[1] + 1)
+    for device, label in enumerate(fleet.labels):
+        if not np.isnan(series[device]).all():
+            ax.plot(sequence, series[device], linewidth=1, label=f"{fleet.builds[device]}:{label}"
+                    if fleet.builds[device] != DEFAULT_BUILD else label)
+    ax.set_title(f"{process} {metric} 各设备对比")
+    ax.set_xlabel("序号")
+    ax.set_ylabel("内存使用 (MB)")
+    ax.grid(True)
+    ax.legend(fontsize='small')
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='合并多台设备的进程内存采集数据')
+    parser.add_argument('sources', nargs='+', help='采集文件，格式为 [BUILD:]LABEL=PATH 或 PATH')
+    parser.add_argument('-m', '--metric', choices=METRICS, default='PSS', help='统计指标')
+    parser.add_argument('-j', '--jobs', type=int, help='并行进程数（默认CPU核数）')
+    parser.add_argument('--top', type=int, default=30, help='每个版本显示的进程数，0 表示全部')
+    parser.add_argument('--csv', help='将统计结果写入CSV文件')
+    parser.add_argument('--overlay', nargs='+', metavar='PROCESS', help='绘制这些进程在各设备上的曲线')
+    parser.add_argument('-o', '--output', default='overlay.png', help='曲线图输出文件')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    fleet = load_fleet(args.sources, workers=args.jobs)
+    print(f"已加载 {len(fleet.labels)} 台设备，{len(fleet.processes)} 个进程，"
+          f"数组大小 {fleet.values.nbytes / 1048576:.1f}MB")
+    print(format_aggregate(fleet, args.metric, args.top))
+    if args.csv:
+        write_aggregate_csv(fleet, args.csv, args.metric)
+        print(f"已将统计结果保存到: {args.csv}")
+
+    if args.overlay:
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from memtools.charts import configure_fonts
+
+        configure_fonts(matplotlib.rcParams)
+
+        missing = [process for process in args.overlay if process not in fleet.processes]
+        if missing:
+            print(f"错误：找不到进程 {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+        fig = Figure(figsize=(10, 4 * len(args.overlay)), dpi=100)
+        FigureCanvasAgg(fig)
+        for i, process in enumerate(args.overlay):
+            plot_device_overlay(fig.add_subplot(len(args.overlay), 1, i + 1), fleet, process, args.metric)
+        fig.tight_layout()
+        fig.savefig(args.output)
+        print(f"已将曲线图保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""free 命令采集数据解析（不依赖图形界面）"""
+import os
+import re
+from datetime import datetime, timedelta
+
+MEM_FIELDS = ('total', 'used', 'free', 'shared', 'buff/cache', 'available')
+SWAP_FIELDS = ('total', 'used', 'free')
+
+
+def parse_free_records(data):
+    """解析 free 内存数据，返回记录列表（每条记录为 Mem 或 Swap 一行）
+
+    data 可以是整段文本，也可以是逐行迭代的文本流（压缩文件、分段文件）。
+    """
+    records = []
+    time_pattern = re.compile(r"统计时间: (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+    mem_pattern = re.compile(r"Mem:\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)")
+    swap_pattern = re.compile(r"Swap:\s+(\d+)\s+(\d+)\s+(\d+)")
+
+    # 记录文件读取时间作为默认时间戳
+    read_time = datetime.now()
+    current_time = None
+    data_block = 0  # 数据块计数器
+    has_explicit_time = False  # 是否有显式时间戳
+
+    lines = data.split('\n') if isinstance(data, str) else data
+    for line in lines:
+        # 匹配时间戳
+        if time_match := time_pattern.match(line):
+            current_time = datetime.strptime(time_match.group(1), "%Y-%m-%d %H:%M:%S")
+            has_explicit_time = True
+            continue
+
+        # 匹配内存数据
+        if mem_match := mem_pattern.match(line):
+            # 如果没有显式时间戳，则使用读取时间并递增数据块计数
+            if not current_time:
+                data_block += 1
+                # 使用读取时间加上一个小的增量（秒级）作为相对时间
+                current_time = read_time + timedelta(seconds=data_block)
+
+            records.append({
+                'timestamp': current_time,
+                'type': 'Mem',
+                'total': int(mem_match.group(1)),
+                'used': int(mem_match.group(2)),
+                'free': int(mem_match.group(3)),
+                'shared': int(mem_match.group(4)),
+                'buff/cache': int(mem_match.group(5)),
+                'available': int(mem_match.group(6))
+            })
+            # 重置时间戳，以便为下一个数据块生成新的相对时间
+            if not has_explicit_time:
+                current_time = None
+
+        # 匹配交换空间数据
+        if swap_match := swap_pattern.match(line):
+            # 如果没有显式时间戳，则使用读取时间并递增数据块计数
+            if not current_time:
+                data_block += 1
+                # 使用读取时间加上一个小的增量（秒级）作为相对时间
+                current_time = read_time + timedelta(seconds=data_block)
+
+            records.append({
+                'timestamp': current_time,
+                'type': 'Swap',
+                'total': int(swap_match.group(1)),
+                'used': int(swap_match.group(2)),
+                'free': int(swap_match.group(3))
+            })
+            # 重置时间戳，以便为下一个数据块生成新的相对时间
+            if not has_explicit_time:
+                current_time = None
+
+    # 为所有记录添加索引列，用于显示相对位置
+    for i, record in enumerate(records):
+        record['index'] = i
+
+    return records
+
+
+def read_free(proc_root='/proc'):
+    """从 /proc/meminfo 计算与 free 命令相同的各列（KB），返回 (Mem 各列, Swap 各列)"""
+    values = {}
+    with open(os.path.join(proc_root, 'meminfo'), 'rb') as f:
+        for line in f:
+            key, _, rest = line.partition(b':')
+            values[key] = int(rest.split()[0])
+    total, free = values.get(b'MemTotal', 0), values.get(b'MemFree', 0)
+    buff_cache = values.get(b'Buffers', 0) + values.get(b'Cached', 0) + values.get(b'SReclaimable', 0)
+    # 与 procps-ng 4.x 一致，已使用 = 总量 - 可用；旧内核没有 MemAvailable 时按 free - buff/cache 计算
+    available = values.get(b'MemAvailable', free + buff_cache)
+    swap_total, swap_free = values.get(b'SwapTotal', 0), values.get(b'SwapFree', 0)
+    return ((total, total - available, free, values.get(b'Shmem', 0), buff_cache, available),
+            (swap_total, swap_total - swap_free, swap_free))
+
+
+def free_records(timestamp, mem, swap, index=0):
+    """将 read_free 的结果转换为与 parse_free_records 相同的 Mem / Swap 两条记录"""
+    return [dict(timestamp=timestamp, type='Mem', **dict(zip(MEM_FIELDS, mem)), index=index),
+            dict(timestamp=timestamp, type='Swap', **dict(zip(SWAP_FIELDS, swap)), index=index + 1)]
+
+
+class FreeSeries:
+    """实时 free 数据的增量存储：每帧的 Mem / Swap 追加到预分配的数组中，容量不足时翻倍"""
+
+    def __init__(self, capacity=256):
+        import numpy as np
+
+        self.length = 0
+        self.timestamps = np.zeros(capacity, dtype='datetime64[s]')
+        self.mem = np.zeros((capacity, len(MEM_FIELDS)), dtype=np.int64)
+        self.swap = np.zeros((capacity, len(SWAP_FIELDS)), dtype=np.int64)
+
+    def __len__(self):
+        return self.length
+
+    def append(self, timestamp, mem, swap):
+        import numpy as np
+
+        if self.length == len(self.timestamps):
+            capacity = max(self.length, 1) * 2
+            self.timestamps = np.resize(self.timestamps, capacity)
+            self.mem = np.resize(self.mem, (capacity, len(MEM_FIELDS)))
+            self.swap = np.resize(self.swap, (capacity, len(SWAP_FIELDS)))
+        self.timestamps[self.length] = np.datetime64(timestamp, 's')
+        self.mem[self.length] = mem
+        self.swap[self.length] = swap
+        self.length += 1
+
+    def by_time(self):
+        """与 charts._free_x 一致：时间都相同时使用数据索引作为x轴"""
+        times = self.timestamps[:self.length]
+        return bool((times != times[:1]).any())
+
+    def x(self, swap=False):
+        """横轴数据：快照时间或数据索引（与 free_records 相同，Mem 为偶数、Swap 为奇数）"""
+        import numpy as np
+
+        if self.by_time():
+            return self.timestamps[:self.length]
+        return np.arange(self.length) * 2 + (1 if swap else 0)
+
+    def mem_column(self, field):
+        return self.mem[:self.length, MEM_FIELDS.index(field)]
+
+    def swap_column(self, field):
+        return self.swap[:self.length, SWAP_FIELDS.index(field)]
+
+    def records(self):
+        """转换为 free_records 的记录列表，供导出和完整重绘使用"""
+        return [record
+                for index, (timestamp, mem, swap) in enumerate(zip(self.timestamps[:self.length].tolist(),
+                                                                   self.mem[:self.length].tolist(),
+                                                                   self.swap[:self.length].tolist()))
+                for record in free_records(timestamp, mem, swap, index * 2)]
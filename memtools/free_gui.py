@@ -0,0 +1,357 @@
+"""free 内存分析工具（图形界面）"""
+import argparse
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import pandas as pd
+import matplotlib
+
+matplotlib.use('TkAgg')
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+
+from memtools.charts import configure_fonts, plot_free_combined, plot_free_memory, plot_free_swap, style_axes
+from memtools.free_data import FreeSeries, parse_free_records
+from memtools.profiling import profiled, span, add_profile_arguments, enable_from_args
+from memtools.segments import (CAPTURE_FILETYPES, find_index, index_time_range, iter_capture_lines,
+                               format_window, parse_window)
+from memtools.stream import DEFAULT_ADDRESS, SnapshotSubscriber, parse_address
+
+LIVE_POLL_MS = 100  # 实时连接时检查新快照的间隔
+
+# 配置中文字体（需要系统支持）
+configure_fonts(plt.rcParams)
+
+
+class FreeMemoryAnalyzer:
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.title("Free 内存分析工具 v1.0")
+        # 获取屏幕尺寸
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        init_width = min(int(screen_width * 0.9), 1400)  # 最大不超过1400
+        init_height = min(int(screen_height * 0.8), 900)  # 最大不超过900
+        # 计算窗口左上角位置，使其居中显示
+        x_position = (screen_width - init_width) // 2
+        y_position = (screen_height - init_height) // 2
+
+        # 设置窗口大小和位置
+        self.root.geometry(f"{init_width}x{init_height}+{x_position}+{y_position}")
+        # 设置最小窗口尺寸
+        self.root.minsize(800, 600)
+
+        # 初始化数据结构
+        self.df = pd.DataFrame()
+        self.auto_update = tk.BooleanVar(value=True)  # 自动更新开关
+        self.update_job = None  # 延迟任务ID
+        self.live = None  # 实时连接（SnapshotSubscriber）
+        self.live_series = None  # 实时数据（FreeSeries），断开连接后保留，打开文件时清除
+        self.live_by_time = None  # 已绘制的实时曲线的横轴是否为时间
+        self.stale_canvases = set()  # 实时模式下只重绘当前标签页，其余标签页切换时再重绘
+        self.live_job = None
+        self.live_status = tk.StringVar(value="")
+        # 创建界面组件
+        self.create_widgets()
+        self.setup_plots()
+
+    def create_widgets(self):
+        """创建界面组件"""
+        # 工具栏
+        toolbar = ttk.Frame(self.root)
+        ttk.Button(toolbar, text="打开文件", command=self.load_file).pack(side=tk.LEFT, padx=2)
+        self.live_button = ttk.Button(toolbar, text="实时连接", command=self.toggle_live)
+        self.live_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="导出数据", command=self.export_data).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="更新图表", command=self.safe_update).pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(
+            toolbar,
+            text="自动更新",
+            variable=self.auto_update,
+            command=lambda: messagebox.showinfo("提示", f"自动更新已{'启用' if self.auto_update.get() else '关闭'}")
+        ).pack(side=tk.LEFT)
+        ttk.Label(toolbar, textvariable=self.live_status).pack(side=tk.LEFT, padx=5)
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+
+        # 主内容区域
+        main_panel = ttk.Frame(self.root)
+
+        # 标签页
+        self.notebook = ttk.Notebook(main_panel)
+        self.tab_mem = ttk.Frame(self.notebook)
+        self.tab_swap = ttk.Frame(self.notebook)
+        self.tab_combined = ttk.Frame(self.notebook)  # 新增整合图表标签页
+
+        self.notebook.add(self.tab_mem, text="内存图表")
+        self.notebook.add(self.tab_swap, text="交换空间图表")
+        self.notebook.add(self.tab_combined, text="整合图表")  # 添加新标签页
+        self.notebook.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+        main_panel.pack(fill=tk.BOTH, expand=True)
+
+    def setup_plots(self):
+        """初始化图表"""
+        # 内存图表
+        self.fig_mem = Figure(figsize=(8, 6), dpi=100)
+        self.ax_mem = self.fig_mem.add_subplot(111)
+        self.canvas_mem = FigureCanvasTkAgg(self.fig_mem, master=self.tab_mem)
+        self.canvas_mem.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # 交换空间图表
+        self.fig_swap = Figure(figsize=(8, 6), dpi=100)
+        self.ax_swap = self.fig_swap.add_subplot(111)
+        self.canvas_swap = FigureCanvasTkAgg(self.fig_swap, master=self.tab_swap)
+        self.canvas_swap.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # 整合图表
+        self.fig_combined = Figure(figsize=(8, 6), dpi=100)
+        self.ax_combined = self.fig_combined.add_subplot(111)
+        self.canvas_combined = FigureCanvasTkAgg(self.fig_combined, master=self.tab_combined)
+        self.canvas_combined.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # 统一设置图表样式
+        for ax in [self.ax_mem, self.ax_swap, self.ax_combined]:
+            style_axes(ax, "内存使用 (KB)")
+
+    @profiled()
+    def parse_data(self, data):
+        """解析 free 内存数据"""
+        return pd.DataFrame(parse_free_records(data))
+
+    def load_file(self):
+        """加载数据文件"""
+        filepath = filedialog.askopenfilename(filetypes=CAPTURE_FILETYPES)
+        if not filepath:
+            return
+
+        window = self.ask_time_window(filepath)
+        if window is None:
+            return
+        start, end = window
+        self.stop_live(discard=True)
+
+        with span('load_file'):
+            try:
+                # 压缩文件和分段文件按需流式解压，跳过时间范围之外的分段
+                self.df = self.parse_data(iter_capture_lines(filepath, start, end))
+                if not self.df.empty and (start or end):
+                    in_window = pd.Series(True, index=self.df.index)
+                    if start:
+                        in_window &= self.df['timestamp'] >= start
+                    if end:
+                        in_window &= self.df['timestamp'] <= end
+                    self.df = self.df[in_window]
+
+                if self.df.empty:
+                    messagebox.showerror("错误", "无法解析文件内容")
+                    return
+
+                self.update_plot()
+
+            except Exception as e:
+                messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+
+    def toggle_live(self):
+        """连接采集器的实时推送（memtools collect --publish），再次点击断开"""
+        if self.live is not None:
+            self.stop_live()
+            return
+        address = simpledialog.askstring("实时连接", "采集器推送地址（unix:<路径> 或 [tcp:]<主机>:<端口>）：",
+                                         initialvalue=DEFAULT_ADDRESS, parent=self.root)
+        if not address:
+            return
+        try:
+            parse_address(address)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+
+        # 每帧中的系统内存逐帧追加到预分配的数组中，不经过采集文件，也不需要每帧重建 DataFrame
+        self.live_series = FreeSeries()
+        self.live_by_time = None
+        self.df = pd.DataFrame()
+        self.live = SnapshotSubscriber(address)
+        self.live_button.config(text="断开实时")
+        self.poll_live()
+
+    def stop_live(self, discard=False):
+        """断开实时连接；已收到的数据保留在图表中，discard 为 True 时（打开文件前）一并清除"""
+        if discard:
+            self.live_series = None
+        if self.live is None:
+            return
+        if self.live_job:
+            self.root.after_cancel(self.live_job)
+            self.live_job = None
+        self.live.close()
+        self.live = None
+        self.live_button.config(text="实时连接")
+        self.live_status.set("")
+
+    @profiled()
+    def poll_live(self):
+        """取出实时连接收到的快照，追加到实时数据中并更新已有曲线"""
+        snapshots = self.live.drain()
+        if snapshots:
+            for snapshot in snapshots:
+                self.live_series.append(snapshot.timestamp, snapshot.mem, snapshot.swap)
+            self.draw_live()
+        self.live_status.set(self.live.status())
+        self.live_job = self.root.after(LIVE_POLL_MS, self.poll_live)
+
+    @profiled()
+    def draw_live(self):
+        """实时模式下绘图：横轴在数据索引和时间之间切换（或还没有曲线）时完整重绘，
+        否则只用 set_data 更新已有曲线并重绘当前标签页"""
+        series = self.live_series
+        by_time = series.by_time()
+        if by_time != self.live_by_time or not self.ax_combined.lines:
+            self.live_by_time = by_time
+            self.df = pd.DataFrame(series.records())
+            self.update_plot()
+            return
+        with span('draw_live.update'):
+            mem_x, swap_x = series.x(), series.x(swap=True)
+            # 曲线顺序与 charts.plot_free_memory / plot_free_swap / plot_free_combined 中的绘制顺序一致
+            for line, field in zip(self.ax_mem.lines, ('used', 'free', 'available')):
+                line.set_data(mem_x, series.mem_column(field))
+            for line, field in zip(self.ax_swap.lines, ('used', 'free')):
+                line.set_data(swap_x, series.swap_column(field))
+            combined = [series.mem_column('used'), series.mem_column('free'),
+                        series.swap_column('used'), series.swap_column('free')]
+            for line, values in zip(self.ax_combined.lines, combined):
+                line.set_data(mem_x, values)
+            for ax in [self.ax_mem, self.ax_swap, self.ax_combined]:
+                ax.relim()
+                ax.autoscale_view()
+        with span('draw_live.draw'):
+            self.draw_canvases(current_only=True)
+
+    def draw_canvases(self, current_only=False):
+        """重绘图表；current_only 时只重绘当前标签页，其余标签页在切换到时再重绘"""
+        canvases = dict(zip(self.notebook.tabs(), [self.canvas_mem, self.canvas_swap, self.canvas_combined]))
+        if not current_only:
+            self.stale_canvases.clear()
+            for canvas in canvases.values():
+                canvas.draw()
+            return
+        current = canvases.get(self.notebook.select())
+        self.stale_canvases.update(canvas for canvas in canvases.values() if canvas is not current)
+        if current is not None:
+            self.stale_canvases.discard(current)
+            current.draw_idle()
+
+    def on_tab_changed(self, event):
+        canvas = dict(zip(self.notebook.tabs(), [self.canvas_mem, self.canvas_swap, self.canvas_combined])).get(
+            self.notebook.select())
+        if canvas in self.stale_canvases:
+            self.stale_canvases.discard(canvas)
+            canvas.draw_idle()
+
+    def ask_time_window(self, filepath):
+        """打开分段采集数据时询问时间范围，返回 (开始, 结束)；用户取消时返回 None"""
+        index_path = find_index(filepath)
+        if not index_path:
+            return None, None
+        while True:
+            text = simpledialog.askstring(
+                "时间范围",
+                "输入要加载的时间范围（YYYY-MM-DD HH:MM:SS ~ YYYY-MM-DD HH:MM:SS），留空加载全部：",
+                initialvalue=format_window(*index_time_range(index_path)),
+                parent=self.root
+            )
+            if text is None:
+                return None
+            try:
+                return parse_window(text)
+            except ValueError:
+                messagebox.showerror("错误", "时间格式错误，应为 YYYY-MM-DD HH:MM:SS")
+
+    def safe_update(self):
+        """安全更新方法（防止重复调用）"""
+        if self.update_job:
+            self.root.after_cancel(self.update_job)
+            self.update_job = None
+        if self.live_series is not None:
+            self.df = pd.DataFrame(self.live_series.records())
+        self.update_plot()
+
+    @profiled()
+    def update_plot(self):
+        """更新图表"""
+        self.root.config(cursor="watch")
+        self.root.update()
+        try:
+            # 清空图表
+            self.ax_mem.clear()
+            self.ax_swap.clear()
+            self.ax_combined.clear()
+
+            with span('update_plot.plot'):
+                # 绘制内存图表
+                mem_df = self.df[self.df['type'] == 'Mem']
+                if not mem_df.empty:
+                    plot_free_memory(self.ax_mem, mem_df)
+
+                # 绘制交换空间图表
+                swap_df = self.df[self.df['type'] == 'Swap']
+                if not swap_df.empty:
+                    plot_free_swap(self.ax_swap, swap_df)
+
+                # 绘制整合图表（使用同一个坐标轴）
+                if not mem_df.empty and not swap_df.empty:
+                    plot_free_combined(self.ax_combined, mem_df, swap_df)
+
+            # 调整布局
+            with span('update_plot.draw'):
+                for fig in [self.fig_mem, self.fig_swap, self.fig_combined]:
+                    fig.tight_layout(rect=[0.05, 0.05, 0.95, 0.95])
+
+                self.draw_canvases()
+
+        finally:
+            self.root.config(cursor="")
+            self.root.update()
+
+    def export_data(self):
+        """导出数据"""
+        if self.live_series is not None:
+            self.df = pd.DataFrame(self.live_series.records())
+        if self.df.empty:
+            messagebox.showwarning("警告", "没有可导出的数据")
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            with span('export_data'):
+                if filepath.endswith('.xlsx'):
+                    self.df.to_excel(filepath, index=False)
+                else:
+                    self.df.to_csv(filepath, index=False)
+
+            messagebox.showinfo("成功", f"数据已导出到：\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {str(e)}")
+
+    def run(self):
+        self.root.mainloop()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='Free 内存分析工具')
+    add_profile_arguments(parser)
+    enable_from_args(parser.parse_args(argv))
+    analyzer = FreeMemoryAnalyzer()
+    analyzer.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""进程实例与生命周期
+
+采集文件中 (PID, 启动时间) 唯一标识一个进程实例（见 memtools.process_data）。
+同名进程（多个工作进程、重启后的新进程）在分析时按实例分开显示：
+
+- 名称唯一的实例直接显示进程名
+- 同名的多个实例显示为 名称[PID]
+- 同一 PID 被复用（或同名进程重启后 PID 相同）时显示为 名称[PID@启动时间]
+
+ProcessLifetimes 以区间索引记录每个实例首次和最后一次出现的位置，实例存活区间之外的点
+不参与绘图，重启和短暂存在的进程显示为独立的线段；aggregate 按名称（或实例）向量化累加，
+替代原来同名进程只保留最后一条的做法。LiveSeries 供实时连接使用，逐帧追加到预分配的数组中，
+不需要每帧重建 DataFrame。
+"""
+import numpy as np
+import pandas as pd
+
+from memtools.process_data import METRICS
+
+
+def instance_labels(df):
+    """为每一行生成进程实例的显示名称，df 需要 process、pid、start 列（旧格式文件的 pid 为空）"""
+    keys = ['process', 'pid', 'start']
+    instances = df[keys].drop_duplicates()
+    known = instances['pid'].notna()
+    # 同名实例数、同名同 PID 的实例数（旧格式文件无法区分同名进程，仍显示进程名）
+    per_name = instances['process'].map(instances.loc[known, 'process'].value_counts()).fillna(0)
+    per_pid = instances[known].groupby(['process', 'pid'])['start'].transform('size').reindex(instances.index)
+    labels = instances['process'].copy()
+    shared = per_name > 1
+    labels[shared] += '[' + instances.loc[shared, 'pid'].map(lambda pid: str(int(pid)))
+    reused = per_pid > 1
+    labels[reused] += '@' + instances.loc[reused, 'start'].map(lambda start: start[11:] if start else '?')
+    labels[shared] += ']'
+    instances['label'] = labels
+    return df[keys].merge(instances, how='left', on=keys)['label'].set_axis(df.index)
+
+
+def aggregate(df, x, key='process'):
+    """按 (x, key) 累加各指标，同一点上只要有一行实际采样即视为采样点；其他列取第一行"""
+    columns = [column for column in df.columns if column not in (x, key)]
+    how = {column: 'first' for column in columns}
+    how.update({metric: 'sum' for metric in METRICS if metric in df})
+    if 'carried' in df:
+        how['carried'] = 'all'
+    return df.groupby([x, key], sort=False).agg(how).reset_index()
+
+
+class ProcessLifetimes:
+    """进程实例存活区间的索引，区间为实例首次和最后一次出现的 x（序号或时间），两端闭合"""
+
+    def __init__(self, df, x, key='process'):
+        span = df.groupby(key, sort=False)[x].agg(['min', 'max'])
+        self.labels = span.index
+        self.intervals = pd.IntervalIndex.from_arrays(span['min'], span['max'], closed='both')
+
+    def __len__(self):
+        return len(self.labels)
+
+    def span(self, label):
+        """返回实例的 (首次出现, 最后出现)"""
+        interval = self.intervals[self.labels.get_loc(label)]
+        return interval.left, interval.right
+
+    def alive_at(self, x):
+        """x 处存活的实例"""
+        return self.labels[self.intervals.contains(x)]
+
+    def overlapping(self, left, right):
+        """与 [left, right] 有交集的实例"""
+        return self.labels[self.intervals.overlaps(pd.Interval(left, right, closed='both'))]
+
+    def contains(self, labels, xs):
+        """逐行判断 xs 是否在对应实例的存活区间内，返回布尔数组"""
+        position = self.labels.get_indexer(labels)
+        xs = np.asarray(xs)
+        return ((position >= 0) & (self.intervals.left.to_numpy()[position] <= xs) &
+                (xs <= self.intervals.right.to_numpy()[position]))
+
+
+class LiveSeries:
+    """实时快照的增量存储：每个序列（进程实例或进程名）一列预分配的数组，按帧追加，容量不足时翻倍
+
+    values 为 [帧, 序列, 3] 的 float32 数组，序列在某帧中没有出现时为 missing；fill_gaps 为 True 时，
+    序列重新出现时把中间缺失的帧补为 0（与 prepare_data 中存活区间内补 0 一致）。
+    """
+
+    def __init__(self, missing=np.nan, fill_gaps=False, capacity=256, width=16):
+        self.missing = missing
+        self.fill_gaps = fill_gaps
+        self.keys = []      # 序列键，按首次出现的顺序
+        self.columns = {}   # 键 -> 列号
+        self.length = 0
+        self.sequences = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype='datetime64[s]')
+        self.values = np.full((capacity, width, len(METRICS)), missing, dtype=np.float32)
+        self.carried = np.zeros((capacity, width), dtype=bool)
+        self.last_seen = np.full(width, -1, dtype=np.int64)
+
+    def __len__(self):
+        return self.length
+
+    def _reserve(self, frames, width):
+        capacity, columns = self.carried.shape
+        if frames <= capacity and width <= columns:
+            return
+        capacity = max(capacity, 1) * 2 if frames > capacity else capacity
+        columns = max(columns * 2, width) if width > columns else columns
+        values = np.full((capacity, columns, len(METRICS)), self.missing, dtype=np.float32)
+        carried = np.zeros((capacity, columns), dtype=bool)
+        last_seen = np.full(columns, -1, dtype=np.int64)
+        used, count = self.length, self.carried.shape[1]
+        values[:used, :count] = self.values[:used]
+        carried[:used, :count] = self.carried[:used]
+        last_seen[:count] = self.last_seen
+        self.values, self.carried, self.last_seen = values, carried, last_seen
+        if capacity > len(self.sequences):
+            self.sequences = np.resize(self.sequences, capacity)
+            self.timestamps = np.resize(self.timestamps, capacity)
+
+    def append(self, sequence, timestamp, rows):
+        """追加一帧，rows 为 [(键, 指标1, 指标2, 指标3, 是否沿用)]，同一帧中键相同的行累加；
+        返回是否出现了新的序列"""
+        count = len(self.keys)
+        columns = []
+        for key, *_ in rows:
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = len(self.keys)
+                self.keys.append(key)
+            columns.append(column)
+        frame = self.length
+        self._reserve(frame + 1, len(self.keys))
+        self.sequences[frame] = sequence
+        self.timestamps[frame] = np.datetime64(timestamp, 's')
+        if rows:
+            columns = np.array(columns, dtype=np.intp)
+            metrics = np.array([row[1:4] for row in rows], dtype=np.float32)
+            if self.fill_gaps:
+                for column in columns[(self.last_seen[columns] >= 0) & (self.last_seen[columns] < frame - 1)]:
+                    self.values[self.last_seen[column] + 1:frame, column] = 0
+            values = self.values[frame]
+            values[columns] = 0
+            np.add.at(values, columns, metrics)
+            carried = self.carried[frame]
+            carried[columns] = True
+            np.logical_and.at(carried, columns, np.array([row[4] for row in rows], dtype=bool))
+            self.last_seen[columns] = frame
+        self.length = frame + 1
+        return len(self.keys) > count
+
+    def x(self, by_time=False):
+        """横轴数据：快照时间或序号"""
+        return self.timestamps[:self.length] if by_time else self.sequences[:self.length]
+
+    def series(self, column):
+        """返回某列的 (各指标 [帧, 3], 实际采样的掩码)，均为视图"""
+        return self.values[:self.length, column], ~self.carried[:self.length, column]
+
+    def to_frame(self, labels):
+        """转换为与 prepare_data 生成的 full_df 相同结构的长表，labels 为各列的显示名称"""
+        frames, columns = np.nonzero(~np.isnan(self.values[:self.length, :len(self.keys), 0]))
+        data = pd.DataFrame({
+            'timestamp': pd.to_datetime(self.timestamps[frames]),
+            'sequence': self.sequences[frames],
+            'process': np.asarray(labels, dtype=object)[columns],
+        })
+        for index, metric in enumerate(METRICS):
+            data[metric] = self.values[frames, columns, index].astype(np.float64)
+        data['carried'] = self.carried[frames, columns]
+        return data
@@ -0,0 +1,459 @@
+"""pmap 输出解析与统计
+
+根据表头自动识别输入格式：
+- pmap -x（Address Kbytes PSS Dirty Swap Mode Mapping 或 procps 的 Address Kbytes RSS Dirty Mode Mapping）
+- pmap -X / -XX（Size Rss Pss Referenced Anonymous LazyFree Swap SwapPss Locked 等列）
+- /proc/<pid>/smaps 原始内容
+
+整个输入用正则一次性提取各行，数值列以 numpy 批量转换为列式表 PmapTable，
+再按映射（Mode + Mapping）、库文件名或类别（heap/stack/anon/file/vdso）向量化分组求和。
+"""
+import sys
+import argparse
+import re
+
+from memtools.profiling import profiled, span, add_profile_arguments, enable_from_args
+from memtools.segments import open_text
+
+# smaps 中的字段名；pmap 表头中的别名统一为这些名称
+SMAPS_FIELDS = ('Size', 'Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty',
+                'Referenced', 'Anonymous', 'LazyFree', 'AnonHugePages', 'Swap', 'SwapPss', 'Locked')
+FIELD_ALIASES = {'Kbytes': 'Size', 'KBytes': 'Size', 'PSS': 'Pss', 'RSS': 'Rss'}
+# 输出时沿用 pmap -x 的列名
+DISPLAY_NAMES = {'Size': 'Kbytes', 'Pss': 'PSS', 'Rss': 'RSS'}
+DEFAULT_FIELDS = ('Size', 'Rss', 'Pss', 'Dirty', 'Swap')
+GROUPINGS = ('mapping', 'basename', 'category')
+GROUP_KEY_NAMES = {'mapping': ('Mode', 'Mapping'), 'basename': ('Mapping',), 'category': ('Category',)}
+# 表头中不参与统计的非数值列
+TEXT_COLUMNS = {'Address', 'Mode', 'Perm', 'Offset', 'Device', 'Inode', 'VmFlags', 'Mapping'}
+
+SMAPS_HEADER_PATTERN = re.compile(
+    r"^([0-9a-f]+)-[0-9a-f]+[ \t]+(\S+)[ \t]+\S+[ \t]+\S+[ \t]+\d+[ \t]*(.*?)[ \t]*$", re.M)
+SMAPS_FIELD_PATTERN = re.compile(r"^(\w+):[ \t]+(\d+) kB[ \t]*$", re.M)
+# pmap -XX 表头中 VmFlags 列（右对齐）的结束位置，用于从行尾切分标志位和映射名称
+VMFLAGS_HEADER_PATTERN = re.compile(r"^[ \t]*Address\b.*?VmFlags", re.M)
+
+
+class PmapTable:
+    """列式的 pmap 数据：每个映射一行
+
+    - modes / mappings: 访问模式和映射名称（numpy 字符串数组）
+    - fields: 数值列名称（统一为 SMAPS_FIELDS 中的名称，另有 Dirty）
+    - values: int64 数组 [映射, 数值列]，单位KB
+    """
+
+    __slots__ = ('modes', 'mappings', 'fields', 'values')
+
+    def __init__(self, modes, mappings, fields, values):
+        self.modes = modes
+        self.mappings = mappings
+        self.fields = fields
+        self.values = values
+
+    def __len__(self):
+        return len(self.modes)
+
+    def column(self, field):
+        return self.values[:, self.fields.index(field)]
+
+
+class PmapStats:
+    """分组统计结果，按 Kbytes（没有时按第一列）降序排列"""
+
+    __slots__ = ('key_names', 'fields', 'keys', 'values')
+
+    def __init__(self, key_names, fields, keys, values):
+        self.key_names = key_names
+        self.fields = fields
+        self.keys = keys
+        self.values = values
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows(self):
+        """逐行返回 (分组键..., 各列的值)"""
+        for key, values in zip(self.keys, self.values.tolist()):
+            yield key + tuple(values)
+
+
+def _text(pmap_content):
+    return pmap_content if isinstance(pmap_content, str) else ''.join(pmap_content)
+
+
+def _numbers(strings, width):
+    """将以空白分隔的数字串批量转换为 [行, width] 的 int64 数组"""
+    import numpy as np
+
+    if not strings:
+        return np.zeros((0, width), dtype=np.int64)
+    return np.fromstring(' '.join(strings), dtype=np.int64, sep=' ').reshape(len(strings), width)
+
+
+def _table_pattern(columns):
+    """根据表头生成整行匹配的正则，返回 (正则, 各数值段的列名)"""
+    parts = []
+    numeric_runs = []
+    run = None
+    for index, column in enumerate(columns):
+        if column == 'Mapping' or column == 'VmFlags' and _flags_at_end(columns, index):
+            # 行尾的 VmFlags 与 Mapping 一起捕获，再按表头的列位置切分
+            break
+        if column in TEXT_COLUMNS:
+            run = None
+            if column == 'Address':
+                parts.append(r"[0-9a-fA-F]+")
+            elif column in ('Mode', 'Perm'):
+                parts.append(r"(\S+)")
+            elif column == 'VmFlags':
+                parts.append(r"[a-z]{2}(?:[ \t]+[a-z]{2})*")
+            else:
+                parts.append(r"\S+")
+        elif run is None:
+            run = [FIELD_ALIASES.get(column, column)]
+            numeric_runs.append(run)
+            parts.append(run)
+        else:
+            run.append(FIELD_ALIASES.get(column, column))
+    pattern = r"[ \t]+".join(
+        part if isinstance(part, str) else r"(\d+(?:[ \t]+\d+){%d})" % (len(part) - 1) for part in parts)
+    return re.compile(r"^[ \t]*" + pattern + r"(?:[ \t]+(.*?))?[ \t]*$", re.M), numeric_runs
+
+
+def _flags_at_end(columns, index):
+    return all(column == 'Mapping' for column in columns[index + 1:])
+
+
+def _split_vmflags(text, matches):
+    """从 VmFlags + Mapping 的行尾中取出映射名称
+
+    标志位个数不定，且 ls、sh 等两个字母的映射名称与标志位无法区分，按所属表头中 VmFlags 列的
+    结束位置切分；行未对齐（切分点落在单词中间）时顺延到下一个空白。
+    """
+    import numpy as np
+
+    headers = list(VMFLAGS_HEADER_PATTERN.finditer(text))
+    if not matches or not headers:
+        return [match.group(match.re.groups) or '' for match in matches]
+    starts = np.array([header.start() for header in headers])
+    ends = np.array([header.end() - header.start() for header in headers])
+    # 每行所属的表头（之前最近的一个）
+    owners = np.maximum(np.searchsorted(starts, [match.start() for match in matches], side='right') - 1, 0)
+    group = matches[0].re.groups
+    mappings = []
+    for match, end in zip(matches, ends[owners].tolist()):
+        tail = match.group(group)
+        if not tail:
+            mappings.append('')
+            continue
+        cut = end - (match.start(group) - match.start())
+        if cut <= 0:
+            mappings.append(tail)
+            continue
+        while 0 < cut < len(tail) and not tail[cut - 1].isspace() and not tail[cut].isspace():
+            cut += 1
+        mappings.append(tail[cut:].strip())
+    return mappings
+
+
+def _parse_table(text, columns):
+    """解析 pmap -x / -X / -XX 表格"""
+    import numpy as np
+
+    pattern, numeric_runs = _table_pattern(columns)
+    vmflags = 'VmFlags' in columns and _flags_at_end(columns, columns.index('VmFlags'))
+    if vmflags:
+        matches = list(pattern.finditer(text))
+        rows = [match.groups() for match in matches]
+    else:
+        rows = pattern.findall(text)
+    has_mode = 'Mode' in columns or 'Perm' in columns
+    groups = list(zip(*rows)) if rows else [()] * (len(numeric_runs) + has_mode + 1)
+    # 各捕获组依次为 Mode（或 Perm）、数值段、Mapping，按它们在表头中的顺序排列
+    order = [column for column in columns if column in ('Mode', 'Perm') or column not in TEXT_COLUMNS]
+    captured = iter(groups)
+    modes = None
+    blocks = []
+    previous_numeric = False
+    for column in order:
+        if column in ('Mode', 'Perm'):
+            modes = next(captured)
+            previous_numeric = False
+        elif not previous_numeric:
+            blocks.append(next(captured))
+            previous_numeric = True
+    if vmflags and 'Mapping' in columns:
+        mappings = _split_vmflags(text, matches)
+    else:
+        mappings = next(captured) if 'Mapping' in columns else ('',) * len(rows)
+
+    fields = [field for run in numeric_runs for field in run]
+    values = np.hstack([_numbers(block, len(run)) for block, run in zip(blocks, numeric_runs)]) \
+        if numeric_runs else np.zeros((len(rows), 0), dtype=np.int64)
+    modes = np.array(modes if modes is not None else ('',) * len(rows), dtype=str)
+    return PmapTable(modes, np.array(mappings, dtype=str), fields, values)
+
+
+def _parse_smaps(text):
+    """解析 /proc/<pid>/smaps：每个映射的字段顺序相同时整体 reshape，否则按位置归属到映射"""
+    import numpy as np
+
+    headers = SMAPS_HEADER_PATTERN.findall(text)
+    count = len(headers)
+    pairs = SMAPS_FIELD_PATTERN.findall(text)
+    keys = [key for key, _ in pairs]
+    width = len(pairs) // count if count else 0
+    if count and width and width * count == len(pairs) and all(
+            keys[i::width] == [keys[i]] * count for i in range(width)):
+        fields = keys[:width]
+        values = _numbers([value for _, value in pairs], 1).reshape(count, width)
+    else:
+        # 字段不一致（如截断或混合内核版本的输出），按出现位置归属到所在的映射
+        starts = np.array([match.start() for match in SMAPS_HEADER_PATTERN.finditer(text)])
+        fields = list(dict.fromkeys(keys))
+        values = np.zeros((count, len(fields)), dtype=np.int64)
+        for match in SMAPS_FIELD_PATTERN.finditer(text):
+            row = np.searchsorted(starts, match.start(), side='right') - 1
+            if row >= 0:
+                values[row, fields.index(match.group(1))] += int(match.group(2))
+    modes = np.array([header[1] for header in headers], dtype=str)
+    mappings = np.array([header[2] for header in headers], dtype=str)
+    return PmapTable(modes, mappings, list(fields), values)
+
+
+@profiled()
+def parse_pmap_table(pmap_content):
+    """解析 pmap -x / -X / -XX 输出或 smaps 内容，返回 PmapTable；无法识别时返回空表"""
+    import numpy as np
+
+    text = _text(pmap_content)
+    table = None
+    for line in text[:65536].splitlines():
+        stripped = line.strip()
+        if stripped.startswith('Address'):
+            table = _parse_table(text, stripped.split())
+            break
+        if SMAPS_HEADER_PATTERN.match(line):
+            table = _parse_smaps(text)
+            break
+    if table is None:
+        return PmapTable(np.array([], dtype=str), np.array([], dtype=str), [],
+                         np.zeros((0, 0), dtype=np.int64))
+
+    # 没有 Dirty 列时由 Shared_Dirty + Private_Dirty 计算
+    if 'Dirty' not in table.fields and {'Shared_Dirty', 'Private_Dirty'} <= set(table.fields):
+        dirty = table.column('Shared_Dirty') + table.column('Private_Dirty')
+        table.values = np.column_stack([table.values, dirty])
+        table.fields = table.fields + ['Dirty']
+    return table
+
+
+def categorize(mappings):
+    """将映射名称向量化地归类为 heap / stack / vdso / anon / file / other"""
+    import numpy as np
+
+    mappings = np.asarray(mappings, dtype=str)
+    # procps 的 pmap -x 显示为 [ stack ]、[ anon ]，去掉方括号内的空格后再匹配
+    bracketed = np.char.startswith(mappings, '[')
+    mappings = np.where(bracketed, np.char.replace(mappings, ' ', ''), mappings)
+    # pmap -X 只显示文件名，因此不带方括号的非空名称都视为文件映射
+    categories = np.full(len(mappings), 'file', dtype=object)
+    categories[bracketed] = 'other'
+    categories[(mappings == '') | np.char.startswith(mappings, '[anon')] = 'anon'
+    categories[np.isin(mappings, ['[vdso]', '[vvar]', '[vsyscall]', '[vectors]', '[sigpage]'])] = 'vdso'
+    categories[np.char.startswith(mappings, '[stack')] = 'stack'
+    categories[mappings == '[heap]'] = 'heap'
+    return categories
+
+
+def _display_mapping(mappings):
+    """[heap]、[ stack ] 等方括号名称去掉方括号和其中的空格，空名称显示为 Unknown"""
+    import numpy as np
+
+    bracketed = np.char.startswith(mappings, '[') & np.char.endswith(mappings, ']')
+    result = np.where(bracketed, np.char.strip(mappings, '[ ]'), mappings)
+    return np.where(result == '', 'Unknown', result)
+
+
+@profiled()
+def group_table(table, by='mapping', fields=None):
+    """按 mapping（Mode + Mapping）、basename（库文件名）或 category 分组求和，返回 PmapStats"""
+    import numpy as np
+
+    if by not in GROUPINGS:
+        raise ValueError(f"未知的分组方式: {by}")
+    fields = [field for field in (fields or DEFAULT_FIELDS) if field in table.fields]
+    if not len(table):
+        return PmapStats(GROUP_KEY_NAMES[by], fields, [], np.zeros((0, len(fields)), dtype=np.int64))
+
+    if by == 'mapping':
+        key_columns = [table.modes, _display_mapping(table.mappings)]
+    elif by == 'basename':
+        names = np.char.rpartition(table.mappings, '/')[:, 2]
+        key_columns = [np.where(np.char.startswith(table.mappings, '/'), names, _display_mapping(table.mappings))]
+    else:
+        key_columns = [categorize(table.mappings)]
+
+    combined = key_columns[0].astype(str)
+    for column in key_columns[1:]:
+        combined = np.char.add(np.char.add(combined, '\0'), column.astype(str))
+    _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    columns = [table.fields.index(field) for field in fields]
+    sums = np.zeros((len(first), len(columns)), dtype=np.int64)
+    for i, column in enumerate(columns):
+        sums[:, i] = np.bincount(inverse, weights=table.values[:, column], minlength=len(first)).round()
+
+    # 先按首次出现的顺序排列，再按第一列稳定降序，与逐行统计的结果顺序一致
+    order = np.argsort(first, kind='stable')
+    sort_column = sums[order, fields.index('Size') if 'Size' in fields else 0] if fields else np.zeros(len(order))
+    order = order[np.argsort(-sort_column, kind='stable')]
+    keys = [tuple(column[first[group]] for column in key_columns) for group in order]
+    return PmapStats(GROUP_KEY_NAMES[by], fields, keys, sums[order])
+
+
+@profiled()
+def parse_pmap_output(pmap_content, by='mapping', fields=None):
+    """解析pmap输出并按映射、库文件名或类别统计内存使用情况"""
+    return group_table(parse_pmap_table(pmap_content), by, fields)
+
+
+def _headers(stats):
+    return list(stats.key_names) + [DISPLAY_NAMES.get(field, field) for field in stats.fields]
+
+
+@profiled()
+def format_output(stats, top=0):
+    """格式化输出结果，确保各列对齐"""
+    headers = _headers(stats)
+    rows = [[str(value) for value in row] for row in stats.rows()]
+    if top:
+        rows = rows[:top]
+    key_count = len(stats.key_names)
+    widths = [max([len(header)] + [len(row[i]) for row in rows]) for i, header in enumerate(headers)]
+
+    def format_row(values):
+        return ' '.join(value.ljust(width) if i < key_count else value.rjust(width)
+                        for i, (value, width) in enumerate(zip(values, widths)))
+
+    header = format_row(headers)
+    return [header, '-' * len(header)] + [format_row(row) for row in rows]
+
+
+@profiled()
+def write_to_excel(stats, filename):
+    """将统计结果写入Excel文件"""
+    # openpyxl 只在导出Excel时才需要，避免拖慢仅控制台输出时的启动
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+    from openpyxl.utils import get_column_letter
+
+    # 创建工作簿和工作表
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "内存映射统计"
+
+    # 添加表头
+    ws.append(_headers(stats))
+
+    # 设置表头样式
+    header_font = Font(bold=True)
+    for cell in ws[1]:
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center')
+
+    # 添加数据行
+    for row in stats.rows():
+        ws.append(list(row))
+
+    # 自动调整列宽
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except:
+                pass
+        adjusted_width = (max_length + 2)
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+    # 保存Excel文件
+    try:
+        wb.save(filename)
+        print(f"已将结果保存到Excel文件: {filename}")
+    except Exception as e:
+        print(f"保存Excel文件时出错: {e}")
+
+
+def _parse_fields(text):
+    """解析 --fields 参数，忽略大小写并接受 Kbytes/PSS/RSS 等别名"""
+    names = {name.lower(): name for name in SMAPS_FIELDS + ('Dirty',)}
+    names.update({alias.lower(): field for alias, field in FIELD_ALIASES.items()})
+    fields = []
+    for name in text.split(','):
+        field = names.get(name.strip().lower())
+        if field is None:
+            raise argparse.ArgumentTypeError(f"未知的字段: {name}")
+        fields.append(field)
+    return fields
+
+
+@profiled()
+def main(argv=None, prog=None):
+    """主函数：处理输入并输出统计结果"""
+    # 创建参数解析器
+    parser = argparse.ArgumentParser(prog=prog, description='分析pmap输出并统计内存使用情况')
+    parser.add_argument('-i', '--input', help='pmap -x/-X/-XX 输出或 smaps 文件（支持 .gz / .zst）')
+    parser.add_argument('-o', '--output', help='Excel输出文件 (例如: result.xlsx)')
+    parser.add_argument('-g', '--group', choices=GROUPINGS, default='mapping',
+                        help='分组方式：mapping（模式+映射）、basename（库文件名）、category（heap/stack/anon/file/vdso）')
+    parser.add_argument('-f', '--fields', type=_parse_fields,
+                        help='输出的列，逗号分隔，如 Size,Rss,Pss,Swap,SwapPss,Anonymous（默认 Size,Rss,Pss,Dirty,Swap 中存在的列）')
+    parser.add_argument('--top', type=int, default=0, help='控制台只显示前 N 行，0 表示全部')
+    add_profile_arguments(parser)
+
+    # 解析命令行参数
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    # 读取pmap数据
+    if args.input:
+        try:
+            # 支持 .gz / .zst 压缩文件
+            with span('main.read'), open_text(args.input) as f:
+                pmap_content = f.read()
+        except FileNotFoundError:
+            print(f"错误：找不到文件 '{args.input}'")
+            sys.exit(1)
+    else:
+        print("请输入pmap数据（输入结束后按Ctrl+D）：")
+        pmap_content = sys.stdin.read()
+
+    # 解析数据
+    table = parse_pmap_table(pmap_content)
+    if not len(table):
+        print("错误：无法识别的 pmap 输出（需要 pmap -x/-X/-XX 的表头或 smaps 内容）")
+        sys.exit(1)
+    stats = group_table(table, args.group, args.fields)
+
+    # 格式化输出（用于控制台）
+    output_lines = format_output(stats, args.top)
+
+    # 输出到Excel文件
+    if args.output:
+        if not args.output.lower().endswith(('.xlsx', '.xlsm')):
+            print("警告：Excel文件扩展名应为.xlsx或.xlsm，已自动添加.xlsx")
+            args.output += '.xlsx'
+        write_to_excel(stats, args.output)
+
+    # 控制台输出
+    titles = {'mapping': 'Mapping类型', 'basename': '库文件名', 'category': '类别'}
+    print(f"\n按{titles[args.group]}统计的内存使用情况（{len(table)} 个映射）：")
+    for line in output_lines:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
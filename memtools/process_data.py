@@ -0,0 +1,182 @@
+"""ProcessMemoryData 采集文件解析（不依赖图形界面）
+
+iter_process_rows 逐行解析采集文本，供 MemoryAnalyzer 生成 DataFrame；
+parse_process_arrays 直接生成紧凑的 numpy 数组，供多设备合并等批量分析使用。
+
+memtools.collector 生成的文件每行末尾还有 PID 列，进程首次出现时在快照开头写一行进程字典
+PID: <PID> <启动时间> <完整命令行>，(PID, 启动时间) 唯一标识一个进程实例。
+"""
+import re
+from datetime import datetime
+from itertools import compress
+
+METRICS = ('PSS', 'RSS', 'VSS')
+# cgroup 采集文件（memtools.cgroup）中与 PSS/RSS/VSS 位置对应的三列
+CGROUP_METRICS = ('CURRENT', 'ANON', 'SWAP')
+
+TIME_PATTERN = re.compile(r"统计时间: (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+# 表头的前三列为数值列，进程采集文件为 PSS/RSS/VSS，cgroup 采集文件为 CURRENT/ANON/SWAP
+TABLE_START_PATTERN = re.compile(r"(?:PROCESS|CGROUP)\s+(\w+)\(MB\)\s+(\w+)\(MB\)\s+(\w+)\(MB\)")
+# 采集器沿用上次值（未实际采样）的行在 FLAG 列标记 '*'，最后一列为 PID（旧文件没有）
+PROCESS_PATTERN = re.compile(
+    r"^(\S+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)(?:\s+(\*))?(?:\s+(\d+)(?![\d.]))?")
+IDENTITY_PATTERN = re.compile(r"^PID: (\d+) (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) ?(.*)$")
+# 采集器在线检测到的告警（见 memtools.alerts），追加在快照末尾
+ALERT_PATTERN = re.compile(r"^ALERT: (\S+) (\S+) (\S+) (-?\d+(?:\.\d+)?) ?(.*)$")
+ALERT_FIELDS = ('timestamp', 'sequence', 'detector', 'process', 'metric', 'value', 'message')
+# parse_process_arrays 在整块文本上一次匹配时间行和进程行（TOTAL 行除外）
+SNAPSHOT_PATTERN = re.compile(
+    r"^统计时间: (\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2})|"
+    r"^[ \t]*(?!TOTAL)(\S+)[ \t]+(-?\d+\.\d+[ \t]+-?\d+\.\d+[ \t]+-?\d+\.\d+)", re.M)
+CHUNK_SIZE = 1 << 24
+
+
+def iter_process_rows(data, alerts=None, identities=None):
+    """逐行解析采集数据，生成 (时间, 序号, 进程名, PSS, RSS, VSS, 是否沿用)
+
+    data 可以是整段文本，也可以是逐行迭代的文本流（压缩文件、分段文件）。
+    alerts 为列表时，快照中的告警行以 (时间, 序号, 检测器, 名称, 指标, 值, 说明) 追加到其中。
+    identities 为字典时，每行末尾追加 (PID, 启动时间)，进程字典以 (PID, 启动时间) -> 命令行写入其中；
+    旧格式文件的 PID 为 None，字典之前已出现的进程（如只读取了时间段的一部分）启动时间为 None。
+    """
+    current_time = None
+    in_table = False
+    sequence_number = 0  # 记录原始顺序
+    # PID -> 最近一次登记的启动时间，PID 被复用时以新的字典行为准
+    started = {pid: start for pid, start in identities} if identities is not None else None
+
+    lines = data.split('\n') if isinstance(data, str) else data
+    for line in lines:
+        # 匹配时间戳
+        if time_match := TIME_PATTERN.match(line):
+            current_time = datetime.strptime(time_match.group(1), "%Y-%m-%d %H:%M:%S")
+            in_table = False
+            sequence_number += 1  # 每次遇到新时间戳，增加序号
+            continue
+
+        if started is not None and not in_table and line.startswith('PID: '):
+            if identity_match := IDENTITY_PATTERN.match(line.rstrip('\n')):
+                pid = int(identity_match.group(1))
+                started[pid] = identity_match.group(2)
+                identities[(pid, identity_match.group(2))] = identity_match.group(3)
+            continue
+
+        if alerts is not None and not in_table and line.startswith('ALERT: '):
+            if alert_match := ALERT_PATTERN.match(line.rstrip('\n')):
+                alerts.append((current_time, sequence_number, alert_match.group(1), alert_match.group(2),
+                               alert_match.group(3), float(alert_match.group(4)), alert_match.group(5)))
+            continue
+
+        # 匹配表格开始
+        if TABLE_START_PATTERN.search(line):
+            in_table = True
+            continue
+
+        if in_table and current_time:
+            # 结束表格的条件
+            if line.startswith('---') or 'TOTAL' in line:
+                in_table = False
+                continue
+
+            # 处理进程数据
+            if process_match := PROCESS_PATTERN.match(line.strip()):
+                row = (current_time, sequence_number, process_match.group(1).strip(),
+                       float(process_match.group(2)), float(process_match.group(3)),
+                       float(process_match.group(4)), process_match.group(5) is not None)
+                if started is None:
+                    yield row
+                elif process_match.group(6):
+                    pid = int(process_match.group(6))
+                    yield row + (pid, started.get(pid))
+                else:
+                    yield row + (None, None)
+
+
+def table_metrics(lines, limit=200):
+    """从采集文本开头的表头读取三个数值列的名称，找不到表头时返回 METRICS"""
+    lines = lines.split('\n') if isinstance(lines, str) else lines
+    for count, line in enumerate(lines):
+        if header := TABLE_START_PATTERN.search(line):
+            return header.groups()
+        if count >= limit:
+            break
+    return METRICS
+
+
+class ProcessArrays:
+    """单个采集文件的紧凑数组表示
+
+    - processes: 进程名列表，下标即 values 的第二维
+    - timestamps: 每个快照的时间（datetime64[s]）
+    - values: float32 数组 [快照, 进程, 指标]，进程在该快照中不存在时为 NaN
+    """
+
+    __slots__ = ('processes', 'timestamps', 'values')
+
+    def __init__(self, processes, timestamps, values):
+        self.processes = processes
+        self.timestamps = timestamps
+        self.values = values
+
+
+def _iter_chunks(data, size=CHUNK_SIZE):
+    """将按行（或按整行结尾的文本块）迭代的文本流合并为约 size 个字符的整块文本"""
+    if isinstance(data, str):
+        yield data
+        return
+    buffer, length = [], 0
+    for block in data:
+        buffer.append(block)
+        length += len(block)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def parse_process_arrays(data):
+    """解析采集数据为 ProcessArrays，同一快照中的重名进程（不同 PID）按名称累加（与图形界面按名称汇总一致）
+
+    按约 CHUNK_SIZE 个字符分块，每块用正则一次匹配所有时间行和进程行，数值列由 numpy 批量转换，
+    没有进程行的快照不计入。
+    """
+    import numpy as np
+
+    process_index = {}
+    timestamps = []
+    row_time, row_process, row_values = [], [], []
+    sequence = -1  # 最近一个时间行的序号
+    for text in _iter_chunks(data):
+        matches = SNAPSHOT_PATTERN.findall(text)
+        if not matches:
+            continue
+        dates, times, names, numbers = zip(*matches)
+        is_time = np.fromiter(map(bool, dates), dtype=bool, count=len(dates))
+        snapshot = np.cumsum(is_time) + sequence
+        sequence = int(snapshot[-1])
+        timestamps.extend(f"{date}T{time}" for date, time in zip(dates, times) if date)
+        # 第一个时间行之前的行不属于任何快照
+        rows = ~is_time & (snapshot >= 0)
+        row_time.append(snapshot[rows])
+        selected = list(compress(names, rows))
+        # 按首次出现的顺序为新进程编号
+        for name in dict.fromkeys(selected):
+            process_index.setdefault(name, len(process_index))
+        row_process.append(np.fromiter(map(process_index.__getitem__, selected), dtype=np.intp,
+                                       count=len(selected)))
+        row_values.append(np.fromstring(' '.join(compress(numbers, rows)), sep=' ').astype(np.float32))
+
+    if not process_index:
+        return ProcessArrays([], np.array([], dtype='datetime64[s]'),
+                             np.full((0, 0, len(METRICS)), np.nan, dtype=np.float32))
+    used, row_time = np.unique(np.concatenate(row_time), return_inverse=True)
+    shape = (len(used), len(process_index))
+    flat = np.ravel_multi_index((row_time.ravel(), np.concatenate(row_process)), shape)
+    row_values = np.concatenate(row_values).reshape(-1, len(METRICS))
+    size = shape[0] * shape[1]
+    values = np.stack([np.bincount(flat, weights=row_values[:, column], minlength=size)
+                       for column in range(len(METRICS))], axis=-1).astype(np.float32)
+    values[np.bincount(flat, minlength=size) == 0] = np.nan
+    return ProcessArrays(list(process_index), np.array(timestamps, dtype='datetime64[s]')[used],
+                         values.reshape(shape + (len(METRICS),)))
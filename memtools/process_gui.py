@@ -0,0 +1,881 @@
+"""进程内存分析工具（图形界面）"""
+import argparse
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import pandas as pd
+import matplotlib
+matplotlib.use('TkAgg')
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+# 在文件最顶部的导入区域添加
+import numpy as np
+
+from memtools.profiling import profiled, span, add_profile_arguments, enable_from_args
+from memtools.capture import Capture
+from memtools.alerts import SYSTEM_SERIES
+from memtools.charts import (configure_fonts, plot_alert_markers, plot_process_metric, plot_system_alerts,
+                             set_process_title, style_axes)
+from memtools.compare import compare_captures, format_regressions, rank_regressions
+from memtools.fleet import load_fleet
+from memtools.lifecycle import LiveSeries, ProcessLifetimes, aggregate, instance_labels
+from memtools.process_data import ALERT_FIELDS, METRICS, iter_process_rows, table_metrics
+from memtools.segments import (CAPTURE_FILETYPES, find_index, index_time_range, iter_capture_lines,
+                               format_window, parse_window)
+from memtools.stream import DEFAULT_ADDRESS, SnapshotSubscriber, parse_address, snapshot_alerts, snapshot_rows
+
+LIVE_POLL_MS = 100  # 实时连接时检查新快照的间隔
+
+# 配置中文字体（需要系统支持）
+configure_fonts(plt.rcParams)
+
+
+class MemoryAnalyzer:
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.title("内存分析工具 v4.2")
+        # 获取屏幕尺寸
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        init_width = min(int(screen_width * 0.9), 1400)  # 最大不超过1400
+        init_height = min(int(screen_height * 0.8), 900)  # 最大不超过900
+        # 计算窗口左上角位置，使其居中显示
+        x_position = (screen_width - init_width) // 2
+        y_position = (screen_height - init_height) // 2
+
+        # 设置窗口大小和位置
+        self.root.geometry(f"{init_width}x{init_height}+{x_position}+{y_position}")
+        # 设置最小窗口尺寸
+        self.root.minsize(800, 600)
+
+        # 初始化数据结构
+        self.df = pd.DataFrame()
+        self.alert_df = pd.DataFrame(columns=ALERT_FIELDS)  # 采集器写入的告警
+        self.process_list = []
+        self.all_processes = set()
+        self.legend_frame = None
+        self.legend_canvas = None
+        self.auto_update = tk.BooleanVar(value=True)  # 新增自动更新开关
+        self.sort_by_time = tk.BooleanVar(value=False)  # 新增：是否按时间排序，默认False
+        self.by_name = tk.BooleanVar(value=False)  # 同名进程（不同 PID）按名称累加显示
+        self.commands = {}  # 进程实例 -> 完整命令行（采集文件中的进程字典）
+        self.lifetimes = None
+        self.process_frames = {}  # 进程实例 -> full_df 中该实例的行
+        self.live = None  # 实时连接（SnapshotSubscriber）
+        self.live_instances = None  # 实时数据（LiveSeries），断开连接后保留，打开文件时清除
+        self.live_job = None
+        self.live_status = tk.StringVar(value="")
+        self.live_lines = {}  # 实时模式下已绘制的曲线：显示名称 -> (列号, [三个图表中的 Line2D])
+        self.stale_canvases = set()  # 实时模式下只重绘当前标签页，其余标签页切换时再重绘
+        self.update_job = None  # 延迟任务ID
+        self.metric_names = METRICS  # 三个图表对应的列名，cgroup 采集文件为 CURRENT/ANON/SWAP
+        # 创建界面组件
+        self.create_widgets()
+        self.setup_plots()
+
+    def create_widgets(self):
+        """创建界面组件"""
+        # 在工具栏添加控件
+        toolbar = ttk.Frame(self.root)
+        ttk.Button(toolbar, text="打开文件", command=self.load_file).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="按时间段打开", command=self.load_time_window).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="多设备对比", command=self.load_fleet_files).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="A/B对比", command=self.load_ab_files).pack(side=tk.LEFT, padx=2)
+        self.live_button = ttk.Button(toolbar, text="实时连接", command=self.toggle_live)
+        self.live_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="导出数据", command=self.export_data).pack(side=tk.LEFT, padx=2)
+
+        # 新增手动更新按钮
+        ttk.Button(toolbar, text="更新图表", command=self.safe_update).pack(side=tk.LEFT, padx=10)
+
+        # 新增自动更新开关
+        ttk.Checkbutton(
+            toolbar,
+            text="自动更新",
+            variable=self.auto_update,
+            command=lambda: messagebox.showinfo("提示", f"自动更新已{'启用' if self.auto_update.get() else '关闭'}")
+        ).pack(side=tk.LEFT)
+
+        # 新增排序方式选择复选框
+        ttk.Checkbutton(
+            toolbar,
+            text="按时间排序",
+            variable=self.sort_by_time,
+            command=lambda: self.safe_sort_update() if self.auto_update.get() else None
+        ).pack(side=tk.LEFT, padx=10)
+
+        ttk.Checkbutton(
+            toolbar,
+            text="按名称汇总",
+            variable=self.by_name,
+            command=self.safe_group_update
+        ).pack(side=tk.LEFT)
+
+        # 主内容区域
+        main_panel = ttk.Frame(self.root)
+
+        # 新增全选按钮
+        ttk.Button(toolbar, text="全选", command=self.select_all).pack(side=tk.LEFT, padx=5)
+
+        # 新增全非选按钮
+        ttk.Button(toolbar, text="全非选", command=self.select_none).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(toolbar, textvariable=self.live_status).pack(side=tk.LEFT, padx=5)
+
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+        # 左侧进程列表
+        self.tree_frame = ttk.Frame(main_panel, width=240)
+        self.tree = ttk.Treeview(self.tree_frame, columns=('Visible', 'Process', 'Command'), show='headings',
+                                 height=30)
+        self.tree.heading('Visible', text='显示')
+        self.tree.heading('Process', text='进程名称')
+        self.tree.heading('Command', text='命令行')
+        self.tree.column('Visible', width=60, anchor=tk.CENTER)
+        self.tree.column('Process', width=180)
+        self.tree.column('Command', width=160)
+
+        vsb = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_frame.pack(side=tk.LEFT, fill=tk.BOTH)
+
+        # 中间图表区域
+        self.notebook = ttk.Notebook(main_panel)
+        self.tab_pss = ttk.Frame(self.notebook)
+        self.tab_rss = ttk.Frame(self.notebook)
+        self.tab_vss = ttk.Frame(self.notebook)
+        self.notebook.add(self.tab_pss, text="PSS图表")
+        self.notebook.add(self.tab_rss, text="RSS图表")
+        self.notebook.add(self.tab_vss, text="VSS图表")
+        self.notebook.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+        # 右侧图例区域（修复后的代码）
+        legend_panel = ttk.Frame(main_panel, width=230)
+        self.legend_frame = ttk.Frame(legend_panel)
+
+        # 创建Canvas和滚动条
+        self.legend_canvas = tk.Canvas(self.legend_frame, bg='white', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.legend_frame, orient="vertical", command=self.legend_canvas.yview)
+
+        # 创建可滚动框架
+        self.scrollable_frame = ttk.Frame(self.legend_canvas)
+
+        # 绑定配置事件
+        self.scrollable_frame.bind(
+            "<Configure>",
+            lambda e: self.legend_canvas.configure(
+                scrollregion=self.legend_canvas.bbox("all")
+            )
+        )
+
+        # 将可滚动框架嵌入Canvas
+        self.legend_canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", tags="frame")
+
+        # 配置Canvas滚动
+        self.legend_canvas.configure(yscrollcommand=scrollbar.set)
+
+        # 绑定鼠标滚轮事件
+        self.legend_canvas.bind("<Enter>", lambda _: self.legend_canvas.bind_all("<MouseWheel>", self._on_mousewheel))
+        self.legend_canvas.bind("<Leave>", lambda _: self.legend_canvas.unbind_all("<MouseWheel>"))
+
+        # 打包组件
+        scrollbar.pack(side="right", fill="y")
+        self.legend_canvas.pack(side="left", fill="both", expand=True)
+        self.legend_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        legend_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=False)
+
+        main_panel.pack(fill=tk.BOTH, expand=True)
+
+        # 绑定事件
+        self.tree.bind('<Button-1>', self.on_tree_click)
+
+    def _on_mousewheel(self, event):
+        """处理鼠标滚轮滚动"""
+        self.legend_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+
+    def setup_plots(self):
+        """初始化图表"""
+        self.fig_pss = Figure(figsize=(8, 6), dpi=100)
+        self.ax_pss = self.fig_pss.add_subplot(111)
+        self.canvas_pss = FigureCanvasTkAgg(self.fig_pss, master=self.tab_pss)
+        self.canvas_pss.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        self.fig_rss = Figure(figsize=(8, 6), dpi=100)
+        self.ax_rss = self.fig_rss.add_subplot(111)
+        self.canvas_rss = FigureCanvasTkAgg(self.fig_rss, master=self.tab_rss)
+        self.canvas_rss.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        self.fig_vss = Figure(figsize=(8, 6), dpi=100)
+        self.ax_vss = self.fig_vss.add_subplot(111)
+        self.canvas_vss = FigureCanvasTkAgg(self.fig_vss, master=self.tab_vss)
+        self.canvas_vss.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # 统一设置图表样式
+        for ax in [self.ax_pss, self.ax_rss, self.ax_vss]:
+            style_axes(ax)
+
+    @profiled()
+    def parse_data(self, data):
+        """解析内存数据，同名进程按 (PID, 启动时间) 分为不同实例，name 列保留进程名"""
+        alerts = []
+        identities = {}
+        df = pd.DataFrame(
+            list(iter_process_rows(data, alerts, identities)),
+            columns=['timestamp', 'sequence', 'process', 'PSS', 'RSS', 'VSS', 'carried', 'pid', 'start']
+        )
+        self.alert_df = pd.DataFrame(alerts, columns=ALERT_FIELDS)
+        return self.label_instances(df, identities)
+
+    def label_instances(self, df, identities):
+        """将 process 列换成进程实例名，并记录各实例的命令行"""
+        df['name'] = df['process']
+        if not df.empty:
+            df['process'] = instance_labels(df)
+        instances = df.drop_duplicates('process')
+        self.commands = {label: identities.get((pid, start), '')
+                         for label, pid, start in zip(instances['process'], instances['pid'], instances['start'])}
+        self.all_processes.update(instances['process'])
+        return df
+
+    @profiled()
+    def prepare_data(self):
+        """预处理数据，支持按文件顺序或时间排序；按实例显示时存活区间之外的点不绘制"""
+        x_column = 'timestamp' if self.sort_by_time.get() else 'sequence'
+        df = self.df
+        if self.by_name.get() and 'name' in df:
+            df = df.assign(process=df['name'])
+        columns = [column for column in ('timestamp', 'sequence', 'process', *METRICS, 'carried') if column in df]
+
+        # 同一点上的重复项（旧格式文件中的同名进程、按名称汇总时的各实例）累加
+        data = aggregate(df[columns], x_column)
+        self.lifetimes = ProcessLifetimes(data, x_column)
+
+        # 每个实例只在自己的存活区间内补齐缺失的点（补 0），区间之外不生成行，避免大量短命进程时
+        # 生成 横轴点数 × 实例数 的完整矩阵；按名称汇总时名称覆盖全部横轴，与原来一致
+        positions, xs = pd.factorize(data[x_column])
+        owners, processes = pd.factorize(data['process'])
+        if self.by_name.get():
+            first = np.zeros(len(processes), dtype=np.int64)
+            last = np.full(len(processes), len(xs) - 1, dtype=np.int64)
+        else:
+            first = np.full(len(processes), len(xs), dtype=np.int64)
+            last = np.full(len(processes), -1, dtype=np.int64)
+            np.minimum.at(first, owners, positions)
+            np.maximum.at(last, owners, positions)
+        lengths = last - first + 1
+        ends = np.cumsum(lengths)
+        rows = np.repeat(first - (ends - lengths), lengths) + np.arange(ends[-1] if len(ends) else 0)
+        index = pd.MultiIndex.from_arrays(
+            [xs[rows], processes[np.repeat(np.arange(len(processes)), lengths)]],
+            names=[x_column, 'process']
+        )
+        self.full_df = (
+            data.set_index([x_column, 'process'])
+            .reindex(index, fill_value=0)
+            .reset_index()
+        )
+        # 各实例的行在 full_df 中连续存放，绘图时直接取切片，不需要逐个进程扫描整张表
+        self.process_frames = {process: self.full_df.iloc[end - length:end]
+                               for process, end, length in zip(processes, ends, lengths)}
+        self.all_processes = set(self.lifetimes.labels)
+
+    def load_file(self):
+        """加载数据文件"""
+        filepath = filedialog.askopenfilename(filetypes=CAPTURE_FILETYPES)
+        if not filepath:
+            return
+
+        # 打开分段采集数据时询问时间范围
+        index_path = find_index(filepath)
+        window = self.ask_time_window(index_time_range(index_path)) if index_path else (None, None)
+        if window is None:
+            return
+        start, end = window
+        self.stop_live(discard=True)
+
+        with span('load_file'):
+            try:
+                # 压缩文件和分段文件按需流式解压，跳过时间范围之外的分段
+                self.all_processes = set()
+                self.set_metric_names(filepath)
+                self.df = self.parse_data(iter_capture_lines(filepath, start, end))
+                if not self.df.empty and (start or end):
+                    in_window = pd.Series(True, index=self.df.index)
+                    if start:
+                        in_window &= self.df['timestamp'] >= start
+                    if end:
+                        in_window &= self.df['timestamp'] <= end
+                    self.df = self.df[in_window]
+                    self.all_processes = set(self.df['process'])
+                    alert_times = self.alert_df['timestamp']
+                    self.alert_df = self.alert_df[((alert_times >= start) if start else True) &
+                                                  ((alert_times <= end) if end else True)]
+                if self.df.empty:
+                    messagebox.showerror("错误", "无法解析文件内容")
+                    return
+
+                self.prepare_data()
+                self.update_process_list()
+                self.update_plot()
+
+            except Exception as e:
+                messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+
+    def load_fleet_files(self):
+        """并行加载多台设备的采集文件，进程以“设备:进程”显示，便于叠加对比"""
+        filepaths = filedialog.askopenfilenames(filetypes=CAPTURE_FILETYPES)
+        if not filepaths:
+            return
+        self.stop_live(discard=True)
+
+        with span('load_fleet_files'):
+            self.root.config(cursor="watch")
+            self.root.update()
+            try:
+                self.set_metric_names(filepaths[0])
+                fleet = load_fleet(list(filepaths))
+                self.df = fleet.to_frame()
+                self.alert_df = pd.DataFrame(columns=ALERT_FIELDS)
+                self.commands = {}
+                if self.df.empty:
+                    messagebox.showerror("错误", "无法解析文件内容")
+                    return
+                self.all_processes = set(self.df['process'])
+
+                self.prepare_data()
+                self.update_process_list()
+                self.update_plot()
+
+            except Exception as e:
+                messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+            finally:
+                self.root.config(cursor="")
+
+    def load_ab_files(self):
+        """加载两个版本的采集文件，按相对时间对齐后以“版本:进程”显示，并列出 PSS 增长最多的进程"""
+        path_a = filedialog.askopenfilename(title="选择 A 版本采集文件", filetypes=CAPTURE_FILETYPES)
+        if not path_a:
+            return
+        path_b = filedialog.askopenfilename(title="选择 B 版本采集文件", filetypes=CAPTURE_FILETYPES)
+        if not path_b:
+            return
+        self.stop_live(discard=True)
+
+        summary = None
+        with span('load_ab_files'):
+            self.root.config(cursor="watch")
+            self.root.update()
+            try:
+                self.set_metric_names(path_a)
+                comparison = compare_captures(path_a, path_b)
+                if min(comparison.counts) == 0:
+                    messagebox.showerror("错误", "无法解析文件内容")
+                    return
+                self.df = comparison.to_frame()
+                self.alert_df = pd.DataFrame(columns=ALERT_FIELDS)
+                self.commands = {}
+                self.all_processes = set(self.df['process'])
+
+                self.prepare_data()
+                self.update_process_list()
+                self.update_plot()
+                rows = rank_regressions(comparison, METRICS[0])[:10]
+                summary = '\n'.join(format_regressions(rows, comparison.labels, self.metric_names[0]))
+
+            except Exception as e:
+                messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+            finally:
+                self.root.config(cursor="")
+        # 对话框放在统计阶段之外，避免把等待用户的时间计入耗时
+        if summary:
+            messagebox.showinfo("A/B对比", summary)
+
+    def load_time_window(self):
+        """通过索引只读取采集文件中的一个时间段，适合长时间采集的大文件"""
+        filepath = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        if not filepath:
+            return
+
+        try:
+            # 首次打开时建立索引并保存，之后只扫描文件新增的部分
+            with span('load_time_window.index'):
+                capture = Capture(filepath)
+        except Exception as e:
+            messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+            return
+        window = self.ask_time_window(capture.time_range())
+        if window is None:
+            return
+        self.stop_live(discard=True)
+
+        with span('load_time_window'):
+            try:
+                self.set_metric_names(filepath)
+                alerts = []
+                identities = {}
+                df = capture.range(*window, alerts=alerts, identities=identities)
+                self.alert_df = pd.DataFrame(alerts, columns=ALERT_FIELDS)
+                if df.empty:
+                    messagebox.showerror("错误", "该时间范围内没有数据")
+                    return
+                self.all_processes = set()
+                self.df = self.label_instances(df, identities)
+
+                self.prepare_data()
+                self.update_process_list()
+                self.update_plot()
+
+            except Exception as e:
+                messagebox.showerror("错误", f"文件读取失败: {str(e)}")
+
+    def set_metric_names(self, filepath):
+        """根据采集文件的表头更新图表标签（进程采集为 PSS/RSS/VSS，cgroup 采集为 CURRENT/ANON/SWAP）"""
+        self.show_metric_names(table_metrics(iter_capture_lines(filepath)))
+
+    def show_metric_names(self, names):
+        self.metric_names = names
+        for tab, name in zip([self.tab_pss, self.tab_rss, self.tab_vss], self.metric_names):
+            self.notebook.tab(tab, text=f"{name}图表")
+
+    def ask_time_window(self, default_range):
+        """询问要加载的时间范围，返回 (开始, 结束)，留空表示全部；用户取消时返回 None"""
+        while True:
+            text = simpledialog.askstring(
+                "时间范围",
+                "输入要加载的时间范围（YYYY-MM-DD HH:MM:SS ~ YYYY-MM-DD HH:MM:SS），留空加载全部：",
+                initialvalue=format_window(*default_range),
+                parent=self.root
+            )
+            if text is None:
+                return None
+            try:
+                return parse_window(text)
+            except ValueError:
+                messagebox.showerror("错误", "时间格式错误，应为 YYYY-MM-DD HH:MM:SS")
+
+    def toggle_live(self):
+        """连接采集器的实时推送（memtools collect --publish），再次点击断开"""
+        if self.live is not None:
+            self.stop_live()
+            return
+        address = simpledialog.askstring("实时连接", "采集器推送地址（unix:<路径> 或 [tcp:]<主机>:<端口>）：",
+                                         initialvalue=DEFAULT_ADDRESS, parent=self.root)
+        if not address:
+            return
+        try:
+            parse_address(address)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+
+        # 收到的快照逐帧追加到预分配的数组中，不经过采集文件，也不需要每帧重建 DataFrame
+        self.live_instances = LiveSeries(fill_gaps=True)
+        self.live_names = LiveSeries(missing=0.0)  # 按名称汇总，与 prepare_data 一样缺失处补 0
+        self.live_alerts = []
+        self.live_identities, self.live_started = {}, {}
+        self.live_columns, self.live_instance_names = {}, {}
+        self.df = pd.DataFrame()
+        self.full_df = pd.DataFrame()
+        self.alert_df = pd.DataFrame(columns=ALERT_FIELDS)
+        self.update_live_instances()
+        self.draw_live(rebuild=True)
+        self.live = SnapshotSubscriber(address)
+        self.live_button.config(text="断开实时")
+        self.poll_live()
+
+    def stop_live(self, discard=False):
+        """断开实时连接；已收到的数据保留在图表中，discard 为 True 时（打开文件前）一并清除"""
+        if discard:
+            self.live_instances = None
+            self.live_lines = {}
+        if self.live is None:
+            return
+        if self.live_job:
+            self.root.after_cancel(self.live_job)
+            self.live_job = None
+        self.live.close()
+        self.live = None
+        self.live_button.config(text="实时连接")
+        self.live_status.set("")
+
+    @profiled()
+    def poll_live(self):
+        """取出实时连接收到的快照，追加到实时数据中并更新已有曲线；实例集合变化时才重建列表和图例"""
+        snapshots = self.live.drain()
+        if snapshots:
+            changed = False
+            alerts = []
+            with span('poll_live.append'):
+                for snapshot in snapshots:
+                    rows = snapshot_rows(snapshot, self.live_identities, self.live_started)
+                    changed |= self.live_instances.append(
+                        snapshot.sequence, snapshot.timestamp,
+                        [((name, pid, start), pss, rss, vss, carried)
+                         for _, _, name, pss, rss, vss, carried, pid, start in rows])
+                    changed |= self.live_names.append(
+                        snapshot.sequence, snapshot.timestamp,
+                        [(name, pss, rss, vss, carried) for _, _, name, pss, rss, vss, carried, _, _ in rows])
+                    alerts.extend(snapshot_alerts(snapshot))
+            if snapshots[-1].metrics != tuple(self.metric_names):
+                self.show_metric_names(snapshots[-1].metrics)
+                changed = True
+            if alerts:
+                self.live_alerts.extend(alerts)
+                self.alert_df = pd.DataFrame(self.live_alerts, columns=ALERT_FIELDS)
+            if changed:
+                self.update_live_instances()
+                self.draw_live(rebuild=True)
+            else:
+                self.draw_live(alerts=alerts)
+        self.live_status.set(self.live.status())
+        self.live_job = self.root.after(LIVE_POLL_MS, self.poll_live)
+
+    def live_series(self):
+        """当前显示方式（按实例 / 按名称）对应的实时数据"""
+        return self.live_names if self.by_name.get() else self.live_instances
+
+    def update_live_instances(self):
+        """实时数据中出现新实例时重新生成实例名、命令行和进程列表"""
+        keys = pd.DataFrame(self.live_instances.keys, columns=['process', 'pid', 'start'])
+        labels = instance_labels(keys).tolist() if not keys.empty else []
+        self.commands = {label: self.live_identities.get((pid, start), '')
+                         for label, (_, pid, start) in zip(labels, self.live_instances.keys)}
+        self.live_instance_names = {label: name for label, (name, _, _) in zip(labels, self.live_instances.keys)}
+        if self.by_name.get():
+            labels = list(self.live_names.keys)
+        self.live_columns = {label: column for column, label in enumerate(labels)}
+        self.all_processes = set(labels)
+        self.refresh_process_list()
+
+    @profiled()
+    def draw_live(self, rebuild=False, alerts=()):
+        """实时模式下绘图：rebuild 时重建曲线和图例，否则只用 set_data 更新已有曲线并重绘当前标签页"""
+        series = self.live_series()
+        x = series.x(self.sort_by_time.get())
+        axes = [self.ax_pss, self.ax_rss, self.ax_vss]
+        if not rebuild:
+            with span('draw_live.update'):
+                for column, lines in self.live_lines.values():
+                    values, sampled = series.series(column)
+                    for index, line in enumerate(lines):
+                        line.set_data(x, values[:, index])
+                        line.set_markevery(sampled)
+                if alerts:
+                    self.plot_alerts(list(self.live_lines), pd.DataFrame(alerts, columns=ALERT_FIELDS))
+                for ax in axes:
+                    ax.relim()
+                    ax.autoscale_view()
+            with span('draw_live.draw'):
+                self.draw_canvases(current_only=True)
+            return
+
+        for ax in axes:
+            ax.clear()
+            style_axes(ax)
+        selected = self.selected_processes()
+        colors = plt.cm.tab20(np.linspace(0, 1, len(selected))) if selected else []
+        self.live_lines = {}
+        plotted = []
+        for color, process in zip(colors, selected):
+            column = self.live_columns.get(process)
+            if column is None:
+                continue
+            values, sampled = series.series(column)
+            for index, (ax, metric) in enumerate(zip(axes, METRICS)):
+                plot_process_metric(ax, x, values[:, index], metric, color, sampled)
+            self.live_lines[process] = (column, [ax.lines[-1] for ax in axes])
+            plotted.append((process, color))
+        self.plot_alerts(selected)
+        self.draw_legend(plotted)
+        for ax, name in zip(axes, self.metric_names):
+            set_process_title(ax, name)
+        for fig in [self.fig_pss, self.fig_rss, self.fig_vss]:
+            fig.tight_layout(rect=[0.05, 0.05, 0.95, 0.95])
+        self.draw_canvases()
+
+    def draw_canvases(self, current_only=False):
+        """重绘图表；current_only 时只重绘当前标签页，其余标签页在切换到时再重绘"""
+        canvases = dict(zip(self.notebook.tabs(), [self.canvas_pss, self.canvas_rss, self.canvas_vss]))
+        if not current_only:
+            self.stale_canvases.clear()
+            for canvas in canvases.values():
+                canvas.draw()
+            return
+        current = canvases.get(self.notebook.select())
+        self.stale_canvases.update(canvas for canvas in canvases.values() if canvas is not current)
+        if current is not None:
+            self.stale_canvases.discard(current)
+            current.draw_idle()
+
+    def on_tab_changed(self, event):
+        canvas = dict(zip(self.notebook.tabs(), [self.canvas_pss, self.canvas_rss, self.canvas_vss])).get(
+            self.notebook.select())
+        if canvas in self.stale_canvases:
+            self.stale_canvases.discard(canvas)
+            canvas.draw_idle()
+
+    def refresh_process_list(self):
+        """实时刷新时保留已有进程的勾选状态，只追加新出现的进程"""
+        shown = {self.tree.item(item, 'values')[1] for item in self.tree.get_children()}
+        if shown - self.all_processes:
+            # 出现同名进程等原因导致实例名变化时重建列表
+            self.update_process_list()
+            return
+        for process in sorted(self.all_processes - shown):
+            self.tree.insert('', 'end', values=('✓', process, self.commands.get(process, '')), tags=('visible',))
+        self.process_list = sorted(self.all_processes)
+
+    def update_process_list(self):
+        """更新进程列表"""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+
+        self.process_list = sorted(self.all_processes)
+        for process in self.process_list:
+            self.tree.insert('', 'end', values=('✓', process, self.commands.get(process, '')), tags=('visible',))
+
+    def on_tree_click(self, event):
+        """处理复选框点击（优化响应）"""
+        item = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+
+        if column == '#1':
+            current = self.tree.item(item, 'values')[0]
+            new_value = '✓' if current == '' else ''
+            self.tree.set(item, column='Visible', value=new_value)
+
+            if self.auto_update.get():
+                # 取消之前的延迟任务
+                if self.update_job:
+                    self.root.after_cancel(self.update_job)
+                # 新增500ms延迟更新
+                self.update_job = self.root.after(1000, self.safe_update)
+
+    def safe_update(self):
+        """安全更新方法（防止重复调用）"""
+        if self.update_job:
+            self.root.after_cancel(self.update_job)
+            self.update_job = None
+        self.update_plot()
+
+    def safe_group_update(self):
+        """切换按实例 / 按名称显示，进程列表随之更新"""
+        if self.update_job:
+            self.root.after_cancel(self.update_job)
+            self.update_job = None
+        if self.live_instances is not None:
+            self.update_live_instances()
+            self.update_process_list()
+            self.draw_live(rebuild=True)
+            return
+        if self.df.empty:
+            return
+        self.prepare_data()
+        self.update_process_list()
+        self.update_plot()
+
+    def safe_sort_update(self):
+        """安全更新方法（防止重复调用）"""
+        if self.update_job:
+            self.root.after_cancel(self.update_job)
+            self.update_job = None
+        if self.live_instances is not None:
+            self.draw_live(rebuild=True)
+            return
+        self.prepare_data()
+        # self.update_process_list()
+        self.update_plot()
+
+    def selected_processes(self):
+        """进程列表中勾选的进程"""
+        return [
+            self.tree.item(item, 'values')[1]
+            for item in self.tree.get_children()
+            if self.tree.item(item, 'values')[0] == '✓'
+        ]
+
+    @profiled()
+    def update_plot(self):
+        """更新图表和滚动图例，使用正确的排序顺序"""
+        if self.live_instances is not None:
+            self.draw_live(rebuild=True)
+            return
+        # 在开始前禁用界面交互
+        self.root.config(cursor="watch")
+        self.root.update()
+        try:
+            # 清空图表和旧图例
+            for ax in [self.ax_pss, self.ax_rss, self.ax_vss]:
+                ax.clear()
+
+            # 获取选中的进程
+            selected = self.selected_processes()
+
+            # 生成颜色
+            colors = plt.cm.tab20(np.linspace(0, 1, len(selected))) if selected else []
+
+            # 绘制图表
+            plotted = []
+            with span('update_plot.plot'):
+                for idx, process in enumerate(selected):
+                    sub_df = self.process_frames.get(process)
+                    if sub_df is not None and not sub_df.empty:
+                        if self.sort_by_time.get():
+                            times = sub_df['timestamp']
+                        else:
+                            times = sub_df['sequence']
+                        color = colors[idx]
+
+                        # 只在实际采样的点上绘制标记，沿用值只连线
+                        sampled = (~sub_df['carried'].astype(bool)).tolist()
+
+                        # 绘制曲线
+                        plot_process_metric(self.ax_pss, times, sub_df['PSS'], 'PSS', color, sampled)
+                        plot_process_metric(self.ax_rss, times, sub_df['RSS'], 'RSS', color, sampled)
+                        plot_process_metric(self.ax_vss, times, sub_df['VSS'], 'VSS', color, sampled)
+                        plotted.append((process, color))
+                self.plot_alerts(selected)
+
+            # 生成图例项
+            self.draw_legend(plotted)
+            # 更新图表格式
+            for ax, name in zip([self.ax_pss, self.ax_rss, self.ax_vss], self.metric_names):
+                set_process_title(ax, name)
+
+            # 调整布局
+            with span('update_plot.draw'):
+                for fig in [self.fig_pss, self.fig_rss, self.fig_vss]:
+                    fig.tight_layout(rect=[0.05, 0.05, 0.95, 0.95])
+
+                self.draw_canvases()
+            self.legend_canvas.configure(scrollregion=self.legend_canvas.bbox("all"))
+        finally:
+            # 恢复界面交互
+            self.root.config(cursor="")
+            self.root.update()
+
+    @profiled()
+    def draw_legend(self, plotted):
+        """重建右侧的滚动图例，plotted 为 [(进程, 颜色)]"""
+        for widget in self.scrollable_frame.winfo_children():
+            widget.destroy()
+        for process, color in plotted:
+            item_frame = ttk.Frame(self.scrollable_frame)
+            color_block = tk.Label(item_frame,
+                                   bg=matplotlib.colors.to_hex(color),
+                                   width=4,
+                                   height=1,
+                                   relief='solid')
+            process_label = ttk.Label(item_frame, text=process[:18], width=20)
+            color_block.pack(side=tk.LEFT, padx=5)
+            process_label.pack(side=tk.LEFT)
+            item_frame.pack(anchor=tk.W, pady=2)
+
+        # 强制更新布局并设置滚动区域
+        self.scrollable_frame.update_idletasks()
+        self.legend_canvas.configure(scrollregion=self.legend_canvas.bbox("all"))
+
+        # 重置Canvas窗口尺寸
+        self.legend_canvas.itemconfig("frame", width=self.legend_canvas.winfo_width())
+
+    def plot_alerts(self, selected, alert_df=None):
+        """标出采集器写入的告警：进程告警标在对应指标的曲线上，系统内存告警以竖线标出；
+        alert_df 默认为全部告警，实时模式下只传入新收到的告警"""
+        alert_df = self.alert_df if alert_df is None else alert_df
+        if alert_df.empty:
+            return
+        x_column = 'timestamp' if self.sort_by_time.get() else 'sequence'
+        axes = dict(zip(self.metric_names, [self.ax_pss, self.ax_rss, self.ax_vss]))
+        system = alert_df[alert_df['process'] == SYSTEM_SERIES]
+        for ax in axes.values():
+            plot_system_alerts(ax, system[x_column])
+        # 告警按进程名记录，按实例显示时标在该名称的各实例上
+        if self.live_instances is not None:
+            names = {self.live_instance_names.get(process, process) for process in selected}
+        elif 'name' in self.df:
+            names = set(self.df.loc[self.df['process'].isin(selected), 'name'])
+        else:
+            names = set(selected)
+        shown = alert_df[alert_df['process'].isin(names | set(selected))]
+        for metric, group in shown.groupby('metric'):
+            if metric in axes:
+                plot_alert_markers(axes[metric], group[x_column], group['value'])
+
+    def export_data(self):
+        """导出数据"""
+        if self.live_instances is not None:
+            series = self.live_series()
+            labels = sorted(self.live_columns, key=self.live_columns.get)
+            self.full_df = series.to_frame(labels)
+        if self.full_df.empty:
+            messagebox.showwarning("警告", "没有可导出的数据")
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            # 按采集文件的表头命名指标列
+            export_df = self.full_df.rename(columns=dict(zip(METRICS, self.metric_names)))
+            if self.live_instances is None:
+                # full_df 按实例分段存放，导出时恢复为按采集顺序排列
+                x_column = 'timestamp' if self.sort_by_time.get() else 'sequence'
+                export_df = export_df.sort_values(x_column, kind='stable')
+            with span('export_data'):
+                if filepath.endswith('.xlsx'):
+                    export_df.to_excel(filepath, index=False)
+                else:
+                    export_df.to_csv(filepath, index=False)
+
+            messagebox.showinfo("成功", f"数据已导出到：\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {str(e)}")
+
+    def run(self):
+        self.root.mainloop()
+    
+    
+    def select_all(self):
+        """全选进程"""
+    # 将所有进程的显示状态设置为“✓”
+        for item in self.tree.get_children():
+            self.tree.set(item, column='Visible', value='✓')
+    # 检查自动更新是否开启
+        if self.auto_update.get():
+        # 如果自动更新开启，取消之前的延迟更新任务
+            if self.update_job:
+                self.root.after_cancel(self.update_job)
+        # 设置一个新的延迟更新任务
+            self.update_job = self.root.after(500, self.safe_update)
+
+    def select_none(self):
+        """全非选进程"""
+    # 将所有进程的显示状态设置为空字符串
+        for item in self.tree.get_children():
+            self.tree.set(item, column='Visible', value='')
+    # 检查自动更新是否开启
+        if self.auto_update.get():
+        # 如果自动更新开启，取消之前的延迟更新任务
+            if self.update_job:
+                self.root.after_cancel(self.update_job)
+        # 设置一个新的延迟更新任务
+            self.update_job = self.root.after(500, self.safe_update)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='进程内存分析工具')
+    add_profile_arguments(parser)
+    enable_from_args(parser.parse_args(argv))
+    analyzer = MemoryAnalyzer()
+    analyzer.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""阶段耗时与内存统计
+
+通过 --profile 参数或环境变量 MEMTOOLS_PROFILE 开启：
+- MEMTOOLS_PROFILE=1          报告输出到标准错误（1/true/yes/on），0/false/no/off 表示关闭
+- MEMTOOLS_PROFILE=report.txt 报告写入文件
+- MEMTOOLS_PROFILE_TRACE=xxx  额外输出调用追踪：
+  以 .json 结尾时输出 Chrome trace 事件（可在 Perfetto / speedscope 中以火焰图查看），
+  否则输出 cProfile 统计文件（可用 snakeviz、flameprof 或 python -m pstats 查看）
+
+关闭时 span() 直接返回共享的空上下文，被装饰函数只多一次属性判断，几乎没有开销。
+"""
+import atexit
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_ENV = 'MEMTOOLS_PROFILE'
+PROFILE_TRACE_ENV = 'MEMTOOLS_PROFILE_TRACE'
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_FALSE_VALUES = ('', '0', 'false', 'no', 'off')
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Frame:
+    __slots__ = ('name', 'start', 'mem_start', 'peak')
+
+    def __init__(self, name, start, mem_start):
+        self.name = name
+        self.start = start
+        self.mem_start = mem_start
+        self.peak = mem_start
+
+
+class StageProfiler:
+    """记录各阶段的调用次数、耗时和内存变化"""
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path = None
+        self.trace_path = None
+        # 阶段名 -> [调用次数, 总耗时, 最大耗时, 净内存变化, 最大内存峰值增量]
+        self.stats = {}
+        self.events = []
+        self._stack = []
+        self._cprofile = None
+        self._origin = time.perf_counter()
+        self._dumped = False
+
+    def enable(self, report_path='-', trace_path=None):
+        """开启统计，进程退出时自动输出报告"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.report_path = report_path
+        self.trace_path = trace_path
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if trace_path and not trace_path.endswith('.json'):
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        atexit.register(self.dump)
+
+    def span(self, name):
+        """返回统计 name 阶段的上下文管理器"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name)
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        # 重置峰值前先把峰值记到外层阶段上，保证嵌套阶段的峰值统计正确
+        for frame in self._stack:
+            frame.peak = max(frame.peak, peak)
+        tracemalloc.reset_peak()
+        frame = _Frame(name, time.perf_counter(), current)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            current, peak = tracemalloc.get_traced_memory()
+            frame.peak = max(frame.peak, peak)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+            self._record(frame, end, current)
+
+    def _record(self, frame, end, mem_end):
+        elapsed = end - frame.start
+        entry = self.stats.setdefault(frame.name, [0, 0.0, 0.0, 0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        entry[3] += mem_end - frame.mem_start
+        entry[4] = max(entry[4], frame.peak - frame.mem_start)
+        if self.trace_path:
+            self.events.append({
+                'name': frame.name,
+                'ph': 'X',
+                'ts': (frame.start - self._origin) * 1e6,
+                'dur': elapsed * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+    def profiled(self, name=None):
+        """装饰器：将函数调用作为一个阶段统计"""
+        def decorator(func):
+            stage = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(stage):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self):
+        """生成按总耗时降序排列的报告文本"""
+        header = f"{'STAGE':<28} {'CALLS':>6} {'TOTAL(ms)':>11} {'MEAN(ms)':>10} {'MAX(ms)':>10} {'MEM(MB)':>9} {'PEAK(MB)':>9}"
+        lines = [header, '-' * len(header)]
+        for name, (calls, total, longest, mem_delta, mem_peak) in sorted(
+                self.stats.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(
+                f"{name:<28} {calls:>6d} {total * 1000:>11.1f} {total * 1000 / calls:>10.2f} "
+                f"{longest * 1000:>10.1f} {mem_delta / 1048576:>9.2f} {mem_peak / 1048576:>9.2f}"
+            )
+        return '\n'.join(lines)
+
+    def dump(self):
+        """输出报告和追踪文件"""
+        if not self.enabled or self._dumped:
+            return
+        self._dumped = True
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.trace_path)
+        elif self.trace_path:
+            import json
+            with open(self.trace_path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+        text = self.report()
+        if self.report_path in (None, '-', '1'):
+            print(text, file=sys.stderr)
+        else:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+
+
+profiler = StageProfiler()
+span = profiler.span
+profiled = profiler.profiled
+
+
+def add_profile_arguments(parser):
+    """为命令行解析器添加性能统计相关参数"""
+    parser.add_argument('--profile', nargs='?', const='-', metavar='REPORT',
+                        help='输出各阶段耗时与内存报告（默认输出到标准错误）')
+    parser.add_argument('--profile-trace', metavar='FILE',
+                        help='输出追踪文件（.json 为 Chrome trace，其它为 cProfile 统计）')
+
+
+def enable_from_args(args):
+    """根据命令行参数开启统计"""
+    if args.profile or args.profile_trace:
+        profiler.enable(args.profile or '-', args.profile_trace)
+
+
+def _env_path(name):
+    """读取开关型环境变量：关闭时返回 None，开启时返回 '-'（标准错误），否则视为文件路径"""
+    value = os.environ.get(name, '').strip()
+    if value.lower() in _FALSE_VALUES:
+        return None
+    if value.lower() in _TRUE_VALUES:
+        return '-'
+    return value
+
+
+def _enable_from_env():
+    report_path = _env_path(PROFILE_ENV)
+    trace_path = _env_path(PROFILE_TRACE_ENV)
+    if trace_path == '-':
+        # 追踪输出必须是文件
+        trace_path = None
+    if report_path or trace_path:
+        profiler.enable(report_path or '-', trace_path)
+
+
+_enable_from_env()
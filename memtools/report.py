@@ -0,0 +1,78 @@
+"""采集数据统计报告（无图形界面）
+
+统计每个进程在采集期间的首末值、最小/最大/平均值和增长量，按最大值降序输出：
+
+    memtools report ProcessMemoryData.txt -m PSS --top 20
+"""
+import argparse
+import sys
+
+from memtools.process_data import METRICS
+from memtools.profiling import span, add_profile_arguments, enable_from_args
+
+SUMMARY_COLUMNS = ('SAMPLES', 'FIRST', 'LAST', 'MIN', 'MAX', 'MEAN', 'GROWTH')
+
+
+def summarize(arrays, metric='PSS'):
+    """统计 ProcessArrays 中每个进程的指标，返回 [(进程名, 采样数, 首值, 末值, 最小, 最大, 平均, 增长)]"""
+    import numpy as np
+
+    values = arrays.values[:, :, METRICS.index(metric)]
+    present = ~np.isnan(values)
+    samples = present.sum(axis=0)
+    columns = np.arange(values.shape[1])
+    first = values[present.argmax(axis=0), columns]
+    last = values[values.shape[0] - 1 - present[::-1].argmax(axis=0), columns]
+    rows = []
+    for i, process in enumerate(arrays.processes):
+        series = values[present[:, i], i]
+        rows.append((process, int(samples[i]), float(first[i]), float(last[i]), float(series.min()),
+                     float(series.max()), float(series.mean()), float(last[i] - first[i])))
+    rows.sort(key=lambda row: row[5], reverse=True)
+    return rows
+
+
+def format_summary(rows, metric='PSS'):
+    """格式化统计结果，确保各列对齐"""
+    name_width = max([len('PROCESS')] + [len(row[0]) for row in rows])
+    header = f"{'PROCESS':<{name_width}} {'SAMPLES':>8}" + ''.join(
+        f" {column + '(MB)':>12}" for column in SUMMARY_COLUMNS[1:])
+    lines = [f"{metric} 统计：", header, '-' * len(header)]
+    for process, samples, *values in rows:
+        lines.append(f"{process:<{name_width}} {samples:>8d}" + ''.join(f" {value:>12.1f}" for value in values))
+    return lines
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='生成进程内存采集数据的统计报告')
+    parser.add_argument('inputs', nargs='+', help='采集文件（支持 .gz / .zst 和分段索引）')
+    parser.add_argument('-m', '--metric', choices=METRICS, default='PSS', help='统计指标')
+    parser.add_argument('--top', type=int, default=0, help='只显示最大值前 N 的进程，0 表示全部')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    enable_from_args(args)
+
+    # 参数解析完成后再导入数值计算依赖，保证 --help 等操作快速返回
+    from memtools.process_data import parse_process_arrays, table_metrics
+    from memtools.segments import iter_capture_blocks, iter_capture_lines
+
+    for path in args.inputs:
+        with span('report.parse'):
+            try:
+                arrays = parse_process_arrays(iter_capture_blocks(path))
+            except FileNotFoundError:
+                print(f"错误：找不到文件 '{path}'", file=sys.stderr)
+                sys.exit(1)
+        if not arrays.processes:
+            print(f"{path}: 无法解析文件内容", file=sys.stderr)
+            continue
+        rows = summarize(arrays, args.metric)
+        # cgroup 采集文件的三列为 CURRENT/ANON/SWAP，按表头显示指标名称
+        label = table_metrics(iter_capture_lines(path))[METRICS.index(args.metric)]
+        print(f"\n{path}（{len(arrays.timestamps)} 个快照，{arrays.timestamps[0]} ~ {arrays.timestamps[-1]}）")
+        for line in format_summary(rows[:args.top] if args.top else rows, label):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
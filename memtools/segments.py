@@ -0,0 +1,330 @@
+"""采集数据的分段压缩存储与透明读取
+
+写入端按大小或时间把采集数据切分为多个分段文件，分段以 gzip 或 zstd 流式压缩，
+同时维护一个索引文件，记录每个分段的起止时间：
+
+    ProcessMemoryData.index
+    # segment	start	end	snapshots
+    ProcessMemoryData-20250425-155650.txt.gz	2025-04-25 15:56:50	2025-04-25 16:56:45	720
+
+读取端 open_text / iter_capture_lines / iter_capture_blocks 可直接打开普通文本、.gz、.zst 文件、索引文件
+或包含索引的目录，按需流式解压，并跳过与时间范围不相交的分段。
+zstd 压缩需要安装 zstandard：pip install zstandard
+"""
+import gzip
+import io
+import os
+import re
+import time
+import zlib
+from datetime import datetime
+
+INDEX_SUFFIX = '.index'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+COMPRESS_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+TIME_LINE_PATTERN = re.compile('统计时间: '.encode('utf-8') + rb"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+# 文件对话框中可打开的采集文件类型
+CAPTURE_FILETYPES = [
+    ("Capture files", "*.txt *.gz *.zst *" + INDEX_SUFFIX),
+    ("Text files", "*.txt"),
+    ("All files", "*.*"),
+]
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("读写 .zst 文件需要安装 zstandard：pip install zstandard")
+    return zstandard
+
+
+class _TolerantGzipReader(io.RawIOBase):
+    """流式解压 gzip，容忍采集中断导致的文件尾缺失（读到最后一次刷新为止），支持多成员拼接"""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._pending = b''
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        pieces = []
+        while not pieces:
+            chunk = self._file.read(self.CHUNK_SIZE)
+            if not chunk:
+                return False
+            while chunk:
+                pieces.append(self._decompressor.decompress(chunk))
+                if not self._decompressor.eof:
+                    break
+                # 当前成员结束，剩余数据属于下一个 gzip 成员
+                chunk = self._decompressor.unused_data
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            pieces = [piece for piece in pieces if piece]
+        self._pending = b''.join(pieces)
+        self._offset = 0
+        return True
+
+    def readinto(self, buffer):
+        if self._offset >= len(self._pending) and not self._fill():
+            return 0
+        size = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:size] = self._pending[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_text(path, encoding='utf-8'):
+    """按扩展名打开普通或压缩文本文件，返回可逐行迭代的文本流"""
+    if path.endswith('.gz'):
+        raw = io.BufferedReader(_TolerantGzipReader(path))
+    elif path.endswith('.zst'):
+        zstandard = _import_zstandard()
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True,
+                                                         read_across_frames=True)
+    else:
+        return open(path, 'r', encoding=encoding, errors='replace')
+    return io.TextIOWrapper(raw, encoding=encoding, errors='replace')
+
+
+def _parse_time(text):
+    return datetime.strptime(text, TIME_FORMAT) if text and text != '-' else None
+
+
+def read_index(index_path):
+    """读取索引文件，返回 [(分段路径, 开始时间, 结束时间, 快照数)]"""
+    directory = os.path.dirname(index_path)
+    segments = []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) < 3:
+                continue
+            count = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 0
+            segments.append((os.path.join(directory, parts[0]), _parse_time(parts[1]),
+                             _parse_time(parts[2]), count))
+    return segments
+
+
+def find_index(path):
+    """path 为索引文件或包含索引文件的目录时返回索引路径，否则返回 None"""
+    if path.endswith(INDEX_SUFFIX):
+        return path
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(INDEX_SUFFIX):
+                return os.path.join(path, name)
+    return None
+
+
+def text_time_range(path, chunk_size=64 * 1024):
+    """返回未压缩采集文件中第一个和最后一个快照的时间，只读取文件头尾；没有快照时返回 (None, None)"""
+    with open(path, 'rb') as f:
+        first = next(filter(None, map(TIME_LINE_PATTERN.match, f)), None)
+        if first is None:
+            return None, None
+        # 从文件尾向前按块扩大读取范围，直到找到最后一个时间行
+        size = f.seek(0, os.SEEK_END)
+        last = None
+        window = chunk_size
+        while last is None:
+            offset = max(0, size - window)
+            f.seek(offset)
+            matches = TIME_LINE_PATTERN.findall(f.read(size - offset))
+            last = matches[-1] if matches else None
+            if offset == 0:
+                break
+            window *= 4
+    return _parse_time(first.group(1).decode()), _parse_time(last.decode()) if last else None
+
+
+def _overlaps(seg_start, seg_end, start, end):
+    if start is not None and seg_end is not None and seg_end < start:
+        return False
+    return end is None or seg_start is None or seg_start <= end
+
+
+def select_segments(index_path, start=None, end=None):
+    """返回与 [start, end] 时间范围相交的分段路径（按时间顺序）
+
+    写入中的未压缩文件（如 ProcessMemoryData.txt）如果尚未登记到索引中，按其首尾快照的时间
+    同样参与过滤，相交时追加在最后。
+    """
+    segments = read_index(index_path)
+    selected = [path for path, seg_start, seg_end, _ in segments
+                if _overlaps(seg_start, seg_end, start, end)]
+
+    active = index_path[:-len(INDEX_SUFFIX)] + '.txt'
+    listed = {os.path.abspath(path) for path, _, _, _ in segments}
+    if os.path.exists(active) and os.path.abspath(active) not in listed:
+        if start is None and end is None:
+            selected.append(active)
+        else:
+            active_start, active_end = text_time_range(active)
+            if active_start is not None and _overlaps(active_start, active_end, start, end):
+                selected.append(active)
+    return selected
+
+
+def iter_capture_lines(path, start=None, end=None):
+    """逐行读取采集数据，支持普通/压缩文件、索引文件或目录"""
+    index_path = find_index(path)
+    paths = select_segments(index_path, start, end) if index_path else [path]
+    for segment in paths:
+        with open_text(segment) as f:
+            yield from f
+
+
+def iter_capture_blocks(path, start=None, end=None, size=1 << 24):
+    """按约 size 个字符的整行文本块读取采集数据，供批量解析使用，避免逐行迭代的开销"""
+    index_path = find_index(path)
+    paths = select_segments(index_path, start, end) if index_path else [path]
+    for segment in paths:
+        with open_text(segment) as f:
+            rest = ''
+            while block := f.read(size):
+                block = rest + block
+                cut = block.rfind('\n') + 1
+                rest = block[cut:]
+                if cut:
+                    yield block[:cut]
+            if rest:
+                yield rest + '\n'
+
+
+class SegmentWriter:
+    """按大小或时间切分并流式压缩采集数据，同时维护索引文件"""
+
+    def __init__(self, directory, base='ProcessMemoryData', compression='gzip',
+                 max_bytes=None, max_seconds=None, keep=0, clock=time.monotonic):
+        if compression not in COMPRESS_SUFFIXES:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        if compression == 'zstd':
+            self._zstandard = _import_zstandard()
+        self.directory = directory
+        self.base = base
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.keep = keep
+        self.clock = clock
+        self.index_path = os.path.join(directory, base + INDEX_SUFFIX)
+        self.segments = read_index(self.index_path) if os.path.exists(self.index_path) else []
+        self.segments = [(os.path.basename(path), seg_start, seg_end, count)
+                         for path, seg_start, seg_end, count in self.segments]
+        self._raw = None
+        self._stream = None
+        self._opened_at = None
+
+    def _open_segment(self, timestamp):
+        stem = f"{self.base}-{timestamp:%Y%m%d-%H%M%S}"
+        extension = '.txt' + COMPRESS_SUFFIXES[self.compression]
+        path = os.path.join(self.directory, stem + extension)
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{stem}-{suffix}{extension}")
+            suffix += 1
+        self._raw = open(path, 'wb')
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(filename='', mode='wb', fileobj=self._raw)
+        elif self.compression == 'zstd':
+            self._stream = self._zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._opened_at = self.clock()
+        self.segments.append((os.path.basename(path), timestamp, timestamp, 0))
+
+    def _close_segment(self):
+        if self._stream is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._raw = self._stream = None
+
+    def _flush(self):
+        if self.compression == 'zstd':
+            self._stream.flush(self._zstandard.FLUSH_BLOCK)
+        else:
+            self._stream.flush()
+        self._raw.flush()
+
+    def _should_rotate(self):
+        if self.max_bytes and self._raw.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_seconds) and self.clock() - self._opened_at >= self.max_seconds
+
+    def _prune(self):
+        while self.keep and len(self.segments) > self.keep:
+            name = self.segments.pop(0)[0]
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def write_index(self):
+        """原子地重写索引文件"""
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write("# segment\tstart\tend\tsnapshots\n")
+            for name, seg_start, seg_end, count in self.segments:
+                start_text = seg_start.strftime(TIME_FORMAT) if seg_start else '-'
+                end_text = seg_end.strftime(TIME_FORMAT) if seg_end else '-'
+                f.write(f"{name}\t{start_text}\t{end_text}\t{count}\n")
+        os.replace(temp_path, self.index_path)
+
+    def starts_segment(self):
+        """下一次 write 是否会写入新的分段"""
+        return self._stream is None or self._should_rotate()
+
+    def write(self, timestamp, text):
+        """写入一个快照，必要时切换到新的分段"""
+        if self._stream is not None and self._should_rotate():
+            self._close_segment()
+        if self._stream is None:
+            self._open_segment(timestamp)
+            self._prune()
+        self._stream.write(text.encode('utf-8'))
+        self._flush()
+        name, seg_start, _, count = self.segments[-1]
+        self.segments[-1] = (name, seg_start, timestamp, count + 1)
+        self.write_index()
+
+    def close(self):
+        self._close_segment()
+
+
+def index_time_range(index_path):
+    """返回索引中所有分段的整体 (开始时间, 结束时间)"""
+    segments = read_index(index_path)
+    starts = [seg_start for _, seg_start, _, _ in segments if seg_start]
+    ends = [seg_end for _, _, seg_end, _ in segments if seg_end]
+    return (min(starts) if starts else None), (max(ends) if ends else None)
+
+
+def format_window(start, end):
+    """将时间范围格式化为 'YYYY-MM-DD HH:MM:SS ~ YYYY-MM-DD HH:MM:SS'"""
+    return f"{start.strftime(TIME_FORMAT) if start else ''} ~ {end.strftime(TIME_FORMAT) if end else ''}"
+
+
+def parse_window(text):
+    """解析 format_window 格式的时间范围，任一端留空表示不限制；格式错误时抛出 ValueError"""
+    if not text or not text.strip():
+        return None, None
+    start_text, _, end_text = text.partition('~')
+    start = datetime.strptime(start_text.strip(), TIME_FORMAT) if start_text.strip() else None
+    end = datetime.strptime(end_text.strip(), TIME_FORMAT) if end_text.strip() else None
+    return start, end
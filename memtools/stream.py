@@ -0,0 +1,462 @@
+"""采集器到分析工具的本地实时推送
+
+采集器加上 --publish 地址 后，每个快照除写入采集文件外，还编码为一个二进制帧推送给所有
+已连接的订阅者（分析工具的"实时连接"、memtools stream），不经过磁盘：
+
+    memtools collect -i 1 --publish unix:/tmp/memtools.sock
+    memtools stream unix:/tmp/memtools.sock
+
+地址为 unix:<路径>（Unix 域套接字）或 [tcp:]<主机>:<端口>（本地 TCP 端口，可配合
+adb forward / ssh -L 从设备转发到主机）。
+
+帧格式（小端）：
+- 帧头：'MT'、版本 u8、类型 u8（0 进程 / 1 cgroup）、序号 u64、快照时间 f64、发送时间 f64、负载长度 u32
+- 系统内存：free 命令的 Mem 六列和 Swap 三列，u64 × 9，单位 KB
+- 数据行：行数 u32，每行 PID u32、三个指标 f32 × 3（MB）、标志 u8（1 = 沿用）、名称长度 u8、名称
+- 进程字典：条数 u32，每条 PID u32、启动时间 19 字节、命令行长度 u16、命令行
+- 告警：条数 u32，每条长度 u16、ALERT 行
+
+背压：每个订阅者有固定长度的发送队列，由独立线程发送，订阅者跟不上时丢弃最旧的帧，
+采集循环从不阻塞；订阅者根据序号的间隔统计丢失的帧数。新订阅者收到的第一帧，以及队列已满、
+会挤掉旧帧时加入的帧都包含所有存活进程的字典，被丢弃的帧中新进程的字典不会丢失。
+采集器重启后序号从 1 重新开始，订阅者把之后的序号接在已收到的序号之后，保证序号递增。
+"""
+import argparse
+import os
+import socket
+import stat
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from memtools.process_data import ALERT_PATTERN, CGROUP_METRICS, METRICS
+
+MAGIC = b'MT'
+VERSION = 1
+KIND_PROCESS = 0
+KIND_CGROUP = 1
+KIND_METRICS = (METRICS, CGROUP_METRICS)
+DEFAULT_ADDRESS = 'unix:/tmp/memtools.sock'
+CARRIED = 1
+
+HEADER = struct.Struct('<2sBBQddI')
+MEMORY = struct.Struct('<9Q')
+COUNT = struct.Struct('<I')
+ROW = struct.Struct('<IfffBB')
+IDENTITY = struct.Struct('<I19sH')
+TEXT = struct.Struct('<H')
+
+
+def parse_address(text):
+    """解析 unix:<路径> 或 [tcp:]<主机>:<端口>，返回 (地址族, 地址)"""
+    if text.startswith('unix:'):
+        return socket.AF_UNIX, text[5:]
+    host, sep, port = (text[4:] if text.startswith('tcp:') else text).rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"无效的地址 '{text}'，应为 unix:<路径> 或 [tcp:]<主机>:<端口>")
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+class Snapshot:
+    """解码后的一帧，rows 为 [(名称, 指标1, 指标2, 指标3, 是否沿用, PID)]，指标单位 MB"""
+
+    __slots__ = ('kind', 'sequence', 'timestamp', 'sent', 'received', 'mem', 'swap', 'rows', 'identities',
+                 'alerts', 'restarted')
+
+    def __init__(self, kind, sequence, timestamp, sent, mem, swap, rows, identities, alerts):
+        self.kind = kind
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.sent = sent
+        self.received = None
+        self.mem = mem
+        self.swap = swap
+        self.rows = rows
+        self.identities = identities
+        self.alerts = alerts
+        self.restarted = False  # 采集器重启后收到的第一帧
+
+    @property
+    def metrics(self):
+        return KIND_METRICS[self.kind]
+
+    @property
+    def latency(self):
+        """从采集器发送到收到的耗时（秒）"""
+        return self.received - self.sent if self.received is not None else None
+
+
+def encode_frame(kind, sequence, timestamp, memory, rows, identities=(), alerts=()):
+    """编码一个快照帧；memory 为 free_data.read_free 的结果，identities 为 [(PID, 启动时间, 命令行)]，
+    alerts 为 ALERT 行"""
+    mem, swap = memory
+    parts = [MEMORY.pack(*mem, *swap), COUNT.pack(len(rows))]
+    for name, first, second, third, carried, pid in rows:
+        name = name.encode('utf-8')[:255]
+        parts.append(ROW.pack(pid, first, second, third, CARRIED if carried else 0, len(name)))
+        parts.append(name)
+    parts.append(COUNT.pack(len(identities)))
+    for pid, started, command in identities:
+        command = command.encode('utf-8')[:0xffff]
+        parts.append(IDENTITY.pack(pid, started.encode('ascii'), len(command)))
+        parts.append(command)
+    parts.append(COUNT.pack(len(alerts)))
+    for line in alerts:
+        line = line.encode('utf-8')[:0xffff]
+        parts.append(TEXT.pack(len(line)))
+        parts.append(line)
+    payload = b''.join(parts)
+    return HEADER.pack(MAGIC, VERSION, kind, sequence, timestamp.timestamp(), time.time(), len(payload)) + payload
+
+
+def decode_header(data):
+    """解析帧头，返回 (类型, 序号, 快照时间, 发送时间, 负载长度)"""
+    magic, version, kind, sequence, timestamp, sent, length = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or kind >= len(KIND_METRICS):
+        raise ValueError("不是 memtools 数据帧或版本不兼容")
+    return kind, sequence, timestamp, sent, length
+
+
+def decode_payload(kind, sequence, timestamp, sent, payload):
+    """解析帧的负载，返回 Snapshot"""
+    values = MEMORY.unpack_from(payload)
+    offset = MEMORY.size
+    (count,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+    rows = []
+    for _ in range(count):
+        pid, first, second, third, flags, length = ROW.unpack_from(payload, offset)
+        offset += ROW.size
+        name = bytes(payload[offset:offset + length]).decode('utf-8', 'replace')
+        offset += length
+        # 与采集文件一致保留一位小数
+        rows.append((name, round(first, 1), round(second, 1), round(third, 1), bool(flags & CARRIED), pid))
+    (count,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+    identities = []
+    for _ in range(count):
+        pid, started, length = IDENTITY.unpack_from(payload, offset)
+        offset += IDENTITY.size
+        command = bytes(payload[offset:offset + length]).decode('utf-8', 'replace')
+        identities.append((pid, started.decode('ascii'), command))
+        offset += length
+    (count,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+    alerts = []
+    for _ in range(count):
+        (length,), offset = TEXT.unpack_from(payload, offset), offset + TEXT.size
+        alerts.append(bytes(payload[offset:offset + length]).decode('utf-8', 'replace'))
+        offset += length
+    return Snapshot(kind, sequence, datetime.fromtimestamp(timestamp), sent, values[:6], values[6:],
+                    rows, identities, alerts)
+
+
+def process_stream_rows(rows):
+    """将 TieredSampler.collect 的行（KB）转换为帧中的数据行（MB），与 format_snapshot 一样跳过全为 0 的行"""
+    return [(name, pss / 1024, rss / 1024, vss / 1024, carried, pid)
+            for name, pss, rss, vss, carried, pid in rows if pss > 0 or rss > 0 or vss > 0]
+
+
+def cgroup_stream_rows(rows):
+    """将 CgroupSampler.collect 的行（字节）转换为帧中的 CURRENT/ANON/SWAP 数据行（MB）"""
+    return [(name, current / 1048576, anon / 1048576, swap / 1048576, False, 0)
+            for name, current, anon, swap, *_ in rows]
+
+
+def snapshot_rows(snapshot, identities, started):
+    """转换为与 iter_process_rows(数据, 告警, 进程字典) 相同格式的行
+
+    identities 为 (PID, 启动时间) -> 命令行，started 为 PID -> 启动时间，由调用方在各帧之间保存；
+    cgroup 帧没有 PID，PID 和启动时间为 None。
+    """
+    for pid, start, command in snapshot.identities:
+        started[pid] = start
+        identities[(pid, start)] = command
+    return [(snapshot.timestamp, snapshot.sequence, name, first, second, third, carried,
+             pid or None, started.get(pid))
+            for name, first, second, third, carried, pid in snapshot.rows]
+
+
+def snapshot_alerts(snapshot):
+    """转换为与 iter_process_rows 收集的告警相同格式的 (时间, 序号, 检测器, 名称, 指标, 值, 说明)"""
+    alerts = []
+    for line in snapshot.alerts:
+        if alert_match := ALERT_PATTERN.match(line):
+            alerts.append((snapshot.timestamp, snapshot.sequence, alert_match.group(1), alert_match.group(2),
+                           alert_match.group(3), float(alert_match.group(4)), alert_match.group(5)))
+    return alerts
+
+
+class _Subscriber:
+    """发布端的单个订阅者：固定长度的发送队列和发送线程，队列满时丢弃最旧的帧"""
+
+    def __init__(self, connection, queue_size, timeout):
+        connection.settimeout(timeout)
+        self.connection = connection
+        self.queue = deque(maxlen=queue_size)
+        self.ready = threading.Condition()
+        self.fresh = True      # 下一帧需要包含完整的进程字典（尚未发送过帧，或丢过帧）
+        self.closed = False
+        self.dropped = 0
+        threading.Thread(target=self._send, name='memtools-stream-send', daemon=True).start()
+
+    @property
+    def congested(self):
+        """发送队列已满，再加入一帧就会丢弃最旧的帧"""
+        return len(self.queue) == self.queue.maxlen
+
+    def put(self, frame, complete=False):
+        """加入发送队列；complete 表示帧中包含完整的进程字典"""
+        with self.ready:
+            if complete:
+                self.fresh = False
+            if self.congested:
+                self.dropped += 1
+                # 被丢弃的帧中可能有新进程的字典，下一帧重新发送完整的字典
+                self.fresh = self.fresh or not complete
+            self.queue.append(frame)
+            self.ready.notify()
+
+    def _send(self):
+        try:
+            while True:
+                with self.ready:
+                    while not self.queue and not self.closed:
+                        self.ready.wait()
+                    if self.closed:
+                        return
+                    frame = self.queue.popleft()
+                self.connection.sendall(frame)
+        except OSError:
+            # 订阅者断开，或长时间不读取导致发送超时
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class SnapshotPublisher:
+    """在后台线程中接受订阅者连接，把每个快照编码为一帧推送给所有订阅者"""
+
+    def __init__(self, address, queue_size=64, max_subscribers=8, send_timeout=5.0):
+        self.family, self.address = parse_address(address)
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.send_timeout = send_timeout
+        self.sequence = 0
+        self.identities = {}   # pid -> (启动时间, 命令行)，只保留存活进程
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.closed = False
+        self.server = self._listen()
+        threading.Thread(target=self._accept, name='memtools-stream-accept', daemon=True).start()
+
+    def _listen(self):
+        server = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_UNIX:
+            # 上次未正常退出时留下的套接字文件
+            try:
+                if stat.S_ISSOCK(os.stat(self.address).st_mode):
+                    os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+        else:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(self.address)
+        server.listen(self.max_subscribers)
+        server.settimeout(0.5)
+        return server
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                connection, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            with self.lock:
+                if len(self.subscribers) >= self.max_subscribers:
+                    connection.close()
+                else:
+                    self.subscribers.append(_Subscriber(connection, self.queue_size, self.send_timeout))
+
+    @property
+    def dropped(self):
+        """因订阅者跟不上而丢弃的帧数"""
+        return sum(subscriber.dropped for subscriber in self.subscribers)
+
+    def publish(self, kind, timestamp, memory, rows, identities=(), alerts=()):
+        """推送一个快照，不会阻塞；rows 为 [(名称, 指标1, 指标2, 指标3, 是否沿用, PID)]（MB）"""
+        self.sequence += 1
+        for pid, started, command in identities:
+            self.identities[pid] = (started, command)
+        alive = {row[5] for row in rows}
+        self.identities = {pid: identity for pid, identity in self.identities.items() if pid in alive}
+        with self.lock:
+            self.subscribers = [subscriber for subscriber in self.subscribers if not subscriber.closed]
+            subscribers = list(self.subscribers)
+        frame = full = None
+        for subscriber in subscribers:
+            # 将要丢帧时直接发送带完整字典的帧，被挤掉的帧中新进程的字典不会丢失
+            if subscriber.fresh or subscriber.congested:
+                if full is None:
+                    full = encode_frame(kind, self.sequence, timestamp, memory, rows,
+                                        [(pid,) + identity for pid, identity in self.identities.items()], alerts)
+                subscriber.put(full, complete=True)
+            else:
+                if frame is None:
+                    frame = encode_frame(kind, self.sequence, timestamp, memory, rows, identities, alerts)
+                subscriber.put(frame)
+
+    def close(self):
+        self.closed = True
+        self.server.close()
+        with self.lock:
+            for subscriber in self.subscribers:
+                subscriber.close()
+            self.subscribers = []
+        if self.family == socket.AF_UNIX:
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+
+class SnapshotSubscriber:
+    """在后台线程中连接采集器并接收快照，断开后自动重连；drain() 取出已收到的快照"""
+
+    def __init__(self, address, retry=1.0):
+        self.family, self.address = parse_address(address)
+        self.retry = retry
+        self.snapshots = deque()
+        self.received = 0
+        self.lost = 0
+        self.restarts = 0
+        self.last_sequence = None   # 采集器最近一帧的原始序号
+        self.offset = 0             # 采集器重启后加在原始序号上的偏移
+        self.last_latency = None
+        self.connected = False
+        self.error = None
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='memtools-stream-receive', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with socket.socket(self.family, socket.SOCK_STREAM) as connection:
+                    connection.settimeout(self.retry)
+                    connection.connect(self.address)
+                    self.connected, self.error = True, None
+                    self._receive(connection)
+            except (OSError, ValueError) as e:
+                self.error = str(e)
+            self.connected = False
+            self._stop.wait(self.retry)
+
+    def _recv_into(self, connection, buffer):
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(buffer):
+            if self._stop.is_set():
+                return False
+            try:
+                count = connection.recv_into(view[offset:])
+            except socket.timeout:
+                continue
+            if count == 0:
+                return False
+            offset += count
+        return True
+
+    def _receive(self, connection):
+        header = bytearray(HEADER.size)
+        while self._recv_into(connection, header):
+            kind, sequence, timestamp, sent, length = decode_header(header)
+            payload = bytearray(length)
+            if not self._recv_into(connection, payload):
+                return
+            snapshot = decode_payload(kind, sequence, timestamp, sent, payload)
+            snapshot.received = time.time()
+            if self.last_sequence is not None and sequence <= self.last_sequence:
+                # 采集器已重启，序号从 1 重新开始：接在已收到的序号之后，避免与之前的快照重复
+                self.offset += self.last_sequence
+                self.restarts += 1
+                snapshot.restarted = True
+            elif self.last_sequence is not None and sequence > self.last_sequence + 1:
+                self.lost += sequence - self.last_sequence - 1
+            self.last_sequence = sequence
+            snapshot.sequence = sequence + self.offset
+            self.last_latency = snapshot.latency
+            self.received += 1
+            self.snapshots.append(snapshot)
+
+    def drain(self):
+        """取出目前已收到的全部快照"""
+        snapshots = []
+        while self.snapshots:
+            snapshots.append(self.snapshots.popleft())
+        return snapshots
+
+    def status(self):
+        """连接状态说明，用于界面显示"""
+        if not self.connected:
+            return f"未连接（{self.error}）" if self.error else "连接中..."
+        latency = f" 延迟 {self.last_latency * 1000:.0f}ms" if self.last_latency is not None else ''
+        restarts = f" 重启 {self.restarts}" if self.restarts else ''
+        return f"已连接 序号 {(self.last_sequence or 0) + self.offset} 丢失 {self.lost}{restarts}{latency}"
+
+    def close(self):
+        self._stop.set()
+        self.thread.join(self.retry + 1)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='订阅采集器推送的实时快照并逐帧输出摘要')
+    parser.add_argument('address', nargs='?', default=DEFAULT_ADDRESS,
+                        help=f'采集器 --publish 的地址，unix:<路径> 或 [tcp:]<主机>:<端口>（默认 {DEFAULT_ADDRESS}）')
+    parser.add_argument('-n', '--count', type=int, default=0, help='收到 N 帧后退出，0 表示持续运行')
+    parser.add_argument('--top', type=int, default=0, help='同时输出第一个指标最大的 N 行')
+    args = parser.parse_args(argv)
+    try:
+        parse_address(args.address)
+    except ValueError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        sys.exit(1)
+
+    subscriber = SnapshotSubscriber(args.address)
+    count = 0
+    try:
+        while not args.count or count < args.count:
+            for snapshot in subscriber.drain():
+                count += 1
+                if snapshot.restarted:
+                    print("采集器已重启", flush=True)
+                print(f"#{snapshot.sequence} {snapshot.timestamp:%Y-%m-%d %H:%M:%S} 行数 {len(snapshot.rows)} "
+                      f"字典 {len(snapshot.identities)} 告警 {len(snapshot.alerts)} "
+                      f"可用 {snapshot.mem[5] / 1024:.1f}MB 延迟 {snapshot.latency * 1000:.1f}ms "
+                      f"丢失 {subscriber.lost}", flush=True)
+                for name, *values, carried, pid in sorted(snapshot.rows, key=lambda row: row[1],
+                                                          reverse=True)[:args.top]:
+                    print(f"  {name:<30} " + ' '.join(f"{value:10.1f}" for value in values) + f" {pid:>7}")
+                if count == args.count:
+                    break
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from memtools.alerts import AlertMonitor, GrowthDetector, SpikeDetector, ThresholdDetector, load_config
+
+
+def test_spike_waits_for_warmup():
+    detector = SpikeDetector(alpha=0.1, z=3.0, warmup=3, min_delta=5.0)
+    assert [detector.update('hmi', value, 0) for value in (100, 100, 200)] == [None, None, None]
+
+
+def test_spike_alerts_once_per_spike():
+    detector = SpikeDetector(alpha=0.1, z=3.0, warmup=3, min_delta=5.0)
+    for _ in range(5):
+        assert detector.update('hmi', 100, 0) is None
+    # 偏离持续期间只告警一次，回到均值附近后的下一次突变再告警
+    messages = [detector.update('hmi', value, 0) for value in (200, 200, 100, 100, 100, 300)]
+    assert [message is not None for message in messages] == [True, False, False, False, False, True]
+    assert messages[0].startswith('z=inf')
+    # 小于 min_delta 的波动不算突变
+    detector = SpikeDetector(warmup=1, min_delta=5.0)
+    assert detector.update('a', 100, 0) is None
+    assert detector.update('a', 104, 0) is None
+    assert detector.update('a', 110, 0) is not None
+
+
+def test_growth_needs_window_and_min_growth():
+    detector = GrowthDetector(window=60, min_growth=10.0, tolerance=2.0, smoothing=1.0)
+    assert detector.update('hmi', 100, 0) is None
+    assert detector.update('hmi', 120, 30) is None      # 增长足够但未持续 window 秒
+    assert detector.update('hmi', 120, 60) == "1分钟增长 20.0MB"
+    # 告警后以当前值作为新的起点
+    assert detector.update('hmi', 125, 130) is None
+
+
+def test_growth_restarts_after_drop_beyond_tolerance():
+    detector = GrowthDetector(window=60, min_growth=10.0, tolerance=2.0, smoothing=1.0)
+    detector.update('hmi', 100, 0)
+    assert detector.update('hmi', 99, 10) is None       # 回落在 tolerance 之内，起点不变
+    assert detector.state['hmi'][:2] == [0, 100]
+    assert detector.update('hmi', 95, 30) is None       # 明显回落，起点重新计算
+    assert detector.state['hmi'][:2] == [30, 95]
+    assert detector.update('hmi', 110, 70) is None      # 自新起点只过了 40 秒
+    assert detector.update('hmi', 110, 90) == "1分钟增长 15.0MB"
+
+
+def test_threshold_rearms_after_recovery():
+    detector = ThresholdDetector([{'series': 'hmi*', 'metric': 'PSS', 'max': 200},
+                                  {'metric': 'PSS', 'min': 10}])
+    updates = [detector.update(1, 'hmi', 'PSS', value) for value in (250, 260, 150, 250)]
+    assert updates == ["超过上限 200MB", None, None, "超过上限 200MB"]
+    # 第一条匹配的规则生效，其他序列使用通配规则
+    assert detector.update(2, 'hmi-worker', 'PSS', 5) is None
+    assert detector.update(3, 'launcher', 'PSS', 5) == "低于下限 10MB"
+    assert detector.update(3, 'launcher', 'RSS', 5) is None
+
+
+def test_forget_drops_state_of_exited_series():
+    config = load_config()
+    config['thresholds'] = [{'metric': 'PSS', 'max': 200}]
+    monitor = AlertMonitor(config)
+    monitor.forget([1, 2])
+    alerts = monitor.observe(datetime(2025, 4, 25, 16), [(1, 'hmi', (250.0,)), (2, 'worker', (300.0,))], ['PSS'])
+    assert [(alert['pid'], alert['series']) for alert in alerts] == [(1, 'hmi'), (2, 'worker')]
+
+    monitor.forget([1])
+    for detector in monitor.detectors:
+        assert set(detector.state) == {(1, 'PSS')}
+    assert monitor.thresholds.state == {(1, 'PSS')}
+    # 同一键再次出现时按新序列处理
+    monitor.forget([1, 2])
+    alerts = monitor.observe(datetime(2025, 4, 25, 16, 0, 5), [(2, 'worker', (300.0,))], ['PSS'])
+    assert [alert['detector'] for alert in alerts] == ['threshold']
+
+
+def test_load_config_merges_user_values(tmp_path):
+    path = tmp_path / 'alerts.json'
+    path.write_text(json.dumps({'spike': {'z': 3}, 'thresholds': [{'metric': 'PSS', 'max': 200}]}))
+    config = load_config(str(path))
+    assert config['spike'] == {'alpha': 0.1, 'z': 3, 'warmup': 12, 'min_delta': 5.0}
+    assert config['thresholds'] == [{'metric': 'PSS', 'max': 200}]
+    AlertMonitor(config)
+
+
+@pytest.mark.parametrize('user_config', [
+    [],
+    {'unknown': 1},
+    {'spike': {'alfa': 0.2}},
+    {'spike': 0.2},
+    {'growth': {'window': '10m'}},
+    {'metrics': 'PSS'},
+    {'thresholds': {'metric': 'PSS', 'max': 200}},
+    {'thresholds': [{'series': 'hmi', 'max': 200}]},
+    {'thresholds': [{'metric': 'PSS'}]},
+    {'thresholds': [{'metric': 'PSS', 'max': '200'}]},
+    {'thresholds': [{'metric': 'PSS', 'max': 200, 'maximum': 300}]},
+])
+def test_load_config_rejects_bad_input(tmp_path, user_config):
+    path = tmp_path / 'alerts.json'
+    path.write_text(json.dumps(user_config))
+    with pytest.raises(ValueError):
+        load_config(str(path))
+
+
+def test_load_config_rejects_invalid_json(tmp_path):
+    path = tmp_path / 'alerts.json'
+    path.write_text('{"spike": ')
+    with pytest.raises(ValueError):
+        load_config(str(path))
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from memtools.capture import Capture
+from memtools.collector import format_snapshot
+from memtools.process_data import iter_process_rows
+
+T0 = datetime(2025, 4, 25, 16)
+
+
+def _capture_text(count, start=0, names=('hmi', 'launcher', 'worker')):
+    """生成 count 个快照的采集文本，进程的内存随快照序号变化（单位 KB）"""
+    snapshots = []
+    for i in range(start, start + count):
+        rows = [(name, (i + 1) * 1024 * (k + 1), 2048 * (k + 1), 4096 * (k + 1), i % 3 == 1, 100 + k)
+                for k, name in enumerate(names)]
+        snapshots.append(format_snapshot(T0 + timedelta(seconds=5 * i), rows))
+    return ''.join(snapshots)
+
+
+def _full_parse(path, t0=None, t1=None):
+    with open(path, encoding='utf-8') as f:
+        rows = list(iter_process_rows(f.read()))
+    return [row for row in rows if (t0 is None or row[0] >= t0) and (t1 is None or row[0] <= t1)]
+
+
+def test_range_matches_full_parse(tmp_path):
+    path = tmp_path / 'ProcessMemoryData.txt'
+    path.write_text(_capture_text(40), encoding='utf-8')
+    capture = Capture(str(path), block_size=512)
+    assert capture.snapshots == 40 and len(capture.blocks) > 5
+    assert (tmp_path / 'ProcessMemoryData.txt.idx').exists()
+
+    windows = [(None, None), (T0 + timedelta(seconds=17), T0 + timedelta(seconds=93)),
+               (T0 + timedelta(seconds=195), None), (None, T0), (T0 + timedelta(hours=1), None)]
+    for t0, t1 in windows:
+        assert list(capture.iter_rows(t0, t1)) == _full_parse(str(path), t0, t1)
+
+    df = capture.range('2025-04-25 16:00:10', '2025-04-25 16:00:20', processes=['hmi'], metrics=['PSS'])
+    assert df['sequence'].tolist() == [3, 4, 5]
+    assert df['PSS'].tolist() == [3.0, 4.0, 5.0]
+    assert df.columns.tolist() == ['timestamp', 'sequence', 'process', 'PSS', 'carried']
+
+
+def test_append_rescans_only_new_data(tmp_path, monkeypatch):
+    path = tmp_path / 'ProcessMemoryData.txt'
+    path.write_text(_capture_text(20), encoding='utf-8')
+    first = Capture(str(path), block_size=512)
+    blocks, scanned = [list(block) for block in first.blocks], first.scanned_size
+    # 记录每次扫描的起点
+    starts = []
+    scan = Capture._scan
+    monkeypatch.setattr(Capture, '_scan', lambda self, size: (starts.append(self.scanned_size), scan(self, size)))
+
+    # 追加的内容最后一行还没写完：只扫描到最后一个完整行
+    appended = _capture_text(10, start=20)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(appended[:-5])
+    second = Capture(str(path), block_size=512)
+    assert second.blocks[:len(blocks) - 1] == blocks[:-1]
+    assert scanned < second.scanned_size < path.stat().st_size
+    assert starts == [scanned]
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(appended[-5:])
+    second.refresh()
+    assert starts[1:] == [starts[0] + len(appended[:-5].encode('utf-8').rsplit(b'\n', 1)[0]) + 1]
+    assert second.scanned_size == path.stat().st_size
+    assert second.snapshots == 30
+    assert list(second.iter_rows()) == _full_parse(str(path))
+
+    # 重新打开时直接加载保存的索引
+    third = Capture(str(path), block_size=512)
+    assert third.blocks == second.blocks and third.snapshots == 30
+    assert len(starts) == 2
+
+
+def test_replaced_file_rebuilds_index(tmp_path):
+    path = tmp_path / 'ProcessMemoryData.txt'
+    path.write_text(_capture_text(20), encoding='utf-8')
+    Capture(str(path), block_size=512)
+
+    # 替换为更长的不同内容：开头的指纹不同，不能当作追加处理
+    path.write_text(_capture_text(30, start=100, names=('sh', 'hmi')), encoding='utf-8')
+    capture = Capture(str(path), block_size=512)
+    assert capture.snapshots == 30
+    assert capture.time_range() == (T0 + timedelta(seconds=500), T0 + timedelta(seconds=645))
+    assert list(capture.iter_rows()) == _full_parse(str(path))
+
+    # 替换为更短的文件
+    path.write_text(_capture_text(3), encoding='utf-8')
+    capture = Capture(str(path), block_size=512)
+    assert capture.snapshots == 3
+    assert list(capture.iter_rows()) == _full_parse(str(path))
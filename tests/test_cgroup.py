@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from memtools.cgroup import format_cgroup_snapshot, read_cgroup, walk_cgroups
+from memtools.process_data import CGROUP_METRICS, iter_process_rows, table_metrics
+
+MB = 1048576
+
+
+def _cgroup(root, group, current, anon=0, file=0, swap=None, pressure=None):
+    path = root.joinpath(*group.split('/'))
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'memory.current').write_text(f"{current}\n")
+    (path / 'memory.stat').write_text(f"anon {anon}\nfile {file}\nkernel 4096\nshmem 0\n")
+    if swap is not None:
+        (path / 'memory.swap.current').write_text(f"{swap}\n")
+    if pressure is not None:
+        (path / 'memory.pressure').write_text(pressure)
+    return path
+
+
+def _fake_cgroupfs(root):
+    (root / 'cgroup.controllers').write_text("cpu memory pids\n")
+    (root / 'memory.stat').write_text("anon 0\n")
+    _cgroup(root, 'system.slice', 300 * MB, anon=200 * MB, file=90 * MB, swap=8 * MB,
+            pressure="some avg10=1.50 avg60=0.80 avg300=0.10 total=12345\n"
+                     "full avg10=0.25 avg60=0.10 avg300=0.00 total=2345\n")
+    _cgroup(root, 'system.slice/foo.service', 120 * MB, anon=100 * MB, file=20 * MB)
+    _cgroup(root, 'system.slice/foo.service/worker', 10 * MB)
+    _cgroup(root, 'user.slice', 50 * MB, anon=40 * MB)
+    # 未启用内存控制器的 cgroup 没有 memory.current，但其子 cgroup 仍需遍历
+    (root / 'init.scope').mkdir()
+    _cgroup(root, 'init.scope/child', 1 * MB)
+    (root / 'not-a-dir').write_text("")
+    return root
+
+
+def test_walk_cgroups_respects_depth(tmp_path):
+    root = str(_fake_cgroupfs(tmp_path))
+    assert walk_cgroups(root, depth=1) == ['system.slice', 'user.slice']
+    assert walk_cgroups(root, depth=2) == ['init.scope/child', 'system.slice', 'system.slice/foo.service',
+                                           'user.slice']
+    assert 'system.slice/foo.service/worker' in walk_cgroups(root, depth=0)
+
+
+def test_walk_cgroups_missing_root(tmp_path):
+    assert walk_cgroups(str(tmp_path / 'missing')) == []
+
+
+def test_read_cgroup(tmp_path):
+    root = str(_fake_cgroupfs(tmp_path))
+    assert read_cgroup(root, 'system.slice') == ('system.slice', 300 * MB, 200 * MB, 8 * MB, 90 * MB, 1.5, 0.25)
+    # 没有 swap / pressure 文件时按 0 计
+    assert read_cgroup(root, 'user.slice') == ('user.slice', 50 * MB, 40 * MB, 0, 0, 0.0, 0.0)
+
+
+def test_read_cgroup_removed(tmp_path):
+    assert read_cgroup(str(_fake_cgroupfs(tmp_path)), 'system.slice/gone.service') is None
+
+
+def test_format_cgroup_snapshot(tmp_path):
+    root = str(_fake_cgroupfs(tmp_path))
+    rows = [read_cgroup(root, group) for group in walk_cgroups(root, depth=2)]
+    text = format_cgroup_snapshot(datetime(2025, 4, 25, 16, 0, 0), rows)
+    lines = text.splitlines()
+    assert lines[0] == "统计时间: 2025-04-25 16:00:00"
+    assert table_metrics(text) == CGROUP_METRICS
+    # 按 CURRENT 降序输出
+    names = [line.split()[0] for line in lines[4:8]]
+    assert names == ['system.slice', 'system.slice/foo.service', 'user.slice', 'init.scope/child']
+    assert lines[4].split()[1:] == ['300.0', '200.0', '8.0', '90.0', '1.50', '0.25']
+    # TOTAL 只累加顶层 cgroup
+    total = next(line for line in lines if line.startswith('TOTAL:'))
+    assert total.split()[1:] == ['350.0', '240.0', '8.0', '90.0']
+    parsed = {row[2]: row[3:6] for row in iter_process_rows(text)}
+    assert parsed['system.slice/foo.service'] == (120.0, 100.0, 0.0)
+    assert len(parsed) == 4
@@ -0,0 +1,47 @@
+"""批量渲染的正确性与吞吐量基准"""
+import os
+import time
+import warnings
+
+from memtools.charts import INDEX_NAME, build_jobs, render_charts, write_html_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTURE = os.path.join(ROOT, 'ProcessMemoryMonitor', 'TestData', 'ProcessMemoryData.txt')
+
+# 吞吐量目标：500 张图在 8 核机器上 30 秒内完成（按本机核数线性折算）
+TARGET_CHARTS = 500
+TARGET_CORES = 8
+TARGET_SECONDS = 30.0
+
+
+def _jobs(output_dir, count):
+    subsets = [None, ['hmi'], ['hmi', 'launcher'], ['systemd', 'carplayservice']]
+    jobs = []
+    while len(jobs) < count:
+        jobs += build_jobs([CAPTURE], ['process'], ['PSS', 'RSS', 'VSS'], subsets,
+                           (str(output_dir), ['png'], 10, False))
+    return [(number, *job[1:]) for number, job in enumerate(jobs[:count], 1)]
+
+
+def test_render_charts_writes_files_and_index(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = render_charts(_jobs(tmp_path, 3), workers=1)
+    assert [error for _, _, error in results] == [None, None, None]
+    for _, files, _ in results:
+        assert os.path.getsize(tmp_path / files[0]) > 0
+    write_html_index(str(tmp_path), results)
+    assert 'ProcessMemoryData.txt' in (tmp_path / INDEX_NAME).read_text(encoding='utf-8')
+
+
+def test_parallel_render_throughput(tmp_path):
+    cores = os.cpu_count() or 1
+    count = 8 * cores
+    jobs = _jobs(tmp_path, count)
+    started = time.perf_counter()
+    results = render_charts(jobs)
+    elapsed = time.perf_counter() - started
+    assert all(error is None for _, _, error in results)
+    projected = TARGET_CHARTS * elapsed / count * cores / TARGET_CORES
+    assert projected < TARGET_SECONDS, (
+        f"{count} 张图 {elapsed:.1f}s（{cores} 核），折算 {TARGET_CHARTS} 张图在 {TARGET_CORES} 核上需 {projected:.1f}s")
@@ -0,0 +1,216 @@
+from datetime import datetime
+
+import pytest
+
+from memtools.alerts import AlertMonitor, load_config
+from memtools.collector import (CollectorScheduler, TieredSampler, format_snapshot, observe_processes,
+                                read_start_ticks)
+from memtools.process_data import iter_process_rows
+
+
+class FakeProc:
+    """可控的 /proc：pid -> (名称, PSS, RSS, VSS)、启动时间（滴答数）和命令行"""
+
+    def __init__(self):
+        self.processes = {}
+        self.reads = []
+        self.identified = []
+
+    def spawn(self, pid, name, pss, ticks, command=None):
+        self.processes[pid] = ((name, pss, pss, pss), ticks, command or f"/usr/bin/{name}")
+
+    def sampler(self, **kwargs):
+        return TieredSampler(reader=self.read, lister=lambda: sorted(self.processes), identify=self.identify,
+                             starter=lambda pid: self.processes[pid][1] if pid in self.processes else None,
+                             **kwargs)
+
+    def read(self, pid):
+        self.reads.append(pid)
+        return self.processes[pid][0] if pid in self.processes else None
+
+    def identify(self, pid):
+        self.identified.append(pid)
+        _, ticks, command = self.processes[pid]
+        return f"2025-04-25 16:00:{ticks % 60:02d}", command
+
+
+def test_idle_processes_are_carried():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    proc.spawn(200, 'worker', 10, ticks=2)
+    sampler = proc.sampler(top_n=1, idle_every=3)
+    sampler.collect()
+    rows = sampler.collect()
+    assert rows == [('hmi', 50000, 50000, 50000, False, 100), ('worker', 10, 10, 10, True, 200)]
+    assert sampler.identity_entries() == []
+
+
+def test_pid_reuse_with_same_name_is_detected_while_carried():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    proc.spawn(200, 'worker', 10, ticks=2, command='worker --id 1')
+    sampler = proc.sampler(top_n=1, idle_every=10)
+    sampler.collect()
+    assert [entry[0] for entry in sampler.identity_entries()] == [100, 200]
+
+    # worker 退出后同名的新进程复用了 PID 200：不能沿用旧进程的值，需要重新读取进程字典
+    proc.spawn(200, 'worker', 4096, ticks=900, command='worker --id 2')
+    proc.reads.clear()
+    rows = sampler.collect()
+    assert rows[1] == ('worker', 4096, 4096, 4096, False, 200)
+    assert 200 in proc.reads
+    assert sampler.identity_entries() == [(200, '2025-04-25 16:00:00', 'worker --id 2')]
+
+    # 之后恢复正常的分级采样
+    rows = sampler.collect()
+    assert rows[1] == ('worker', 4096, 4096, 4096, True, 200)
+    assert sampler.identity_entries() == []
+
+
+def test_pid_reuse_with_same_name_is_detected_when_sampled():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    sampler = proc.sampler()
+    sampler.collect()
+    proc.spawn(100, 'hmi', 50000, ticks=7200, command='/usr/bin/hmi --restarted')
+    sampler.collect()
+    assert sampler.identity_entries() == [(100, '2025-04-25 16:00:00', '/usr/bin/hmi --restarted')]
+    assert sampler.started == {100: 7200}
+
+
+def test_pid_reuse_resets_alert_state():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 300 * 1024, ticks=1)
+    sampler = proc.sampler()
+    config = load_config()
+    config['thresholds'] = [{'series': 'hmi', 'metric': 'PSS', 'max': 200}]
+    monitor = AlertMonitor(config)
+    sampler.collect()
+    assert [alert['detector'] for alert in observe_processes(monitor, sampler, datetime(2025, 4, 25, 16))] == [
+        'threshold']
+
+    # 新进程复用 PID 100 且同样超限：旧进程的超限状态不能压制新进程的告警
+    proc.spawn(100, 'hmi', 300 * 1024, ticks=7200)
+    sampler.collect()
+    assert sampler.reused == [100]
+    alerts = observe_processes(monitor, sampler, datetime(2025, 4, 25, 16, 0, 5))
+    assert [(alert['detector'], alert['pid']) for alert in alerts] == [('threshold', 100)]
+    assert monitor.detectors[0].state[(100, 'PSS')][2] == 1
+
+    sampler.collect()
+    assert sampler.reused == []
+    assert observe_processes(monitor, sampler, datetime(2025, 4, 25, 16, 0, 10)) == []
+
+
+def test_exited_processes_are_forgotten():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    proc.spawn(200, 'worker', 10, ticks=2)
+    sampler = proc.sampler()
+    sampler.collect()
+    del proc.processes[200]
+    sampler.collect()
+    assert set(sampler.last) == set(sampler.started) == set(sampler.identities) == {100}
+
+
+def test_read_start_ticks(tmp_path):
+    (tmp_path / '42').mkdir()
+    # 进程名中可以包含空格和括号
+    (tmp_path / '42' / 'stat').write_bytes(
+        b"42 (my (odd) proc) S 1 42 42 0 -1 4194560 100 0 0 0 5 3 0 0 20 0 1 0 123456 1000000 200 "
+        b"18446744073709551615 1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0\n")
+    assert read_start_ticks(42, str(tmp_path)) == 123456
+    assert read_start_ticks(43, str(tmp_path)) is None
+
+
+class FakeClock:
+    """墙钟和CPU时钟：每次读取进程消耗 cost 秒，sleep 推进墙钟"""
+
+    def __init__(self, proc, cost):
+        self.now = 1000.0
+        self.cpu = 0.0
+        self.sleeps = []
+        read = proc.read
+
+        def timed_read(pid):
+            self.now += cost
+            self.cpu += cost
+            return read(pid)
+        proc.read = timed_read
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+def _scheduler(proc, clock, sampler, **kwargs):
+    return CollectorScheduler(sampler, clock=lambda: clock.now, cpu_clock=lambda: clock.cpu, sleep=clock.sleep,
+                              **kwargs)
+
+
+def test_idle_tier_cadence_and_carried_flag():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    proc.spawn(200, 'worker', 10, ticks=2)
+    clock = FakeClock(proc, cost=0.01)
+    sampler = proc.sampler(top_n=1, idle_every=3)
+    rounds = []
+
+    def on_snapshot(timestamp, rows):
+        rounds.append((list(proc.reads), rows, format_snapshot(timestamp, rows)))
+        proc.reads.clear()
+
+    _scheduler(proc, clock, sampler, interval=5.0, cpu_budget=0.5).run(on_snapshot, times=7)
+
+    # 热点进程每轮采样；空闲进程每 3 轮采样一次，其余轮次沿用上次的值且不读取
+    assert [reads for reads, _, _ in rounds] == [[100, 200], [100], [100], [100, 200], [100], [100], [100, 200]]
+    assert [rows[1][4] for _, rows, _ in rounds] == [False, True, True, False, True, True, False]
+    # 进程字典只在进程首次出现时读取一次
+    assert proc.identified == [100, 200]
+
+    # 沿用值在 FLAG 列标记为 *，解析后 carried 为 True，数值与上次采样相同
+    parsed = [list(iter_process_rows(text)) for _, _, text in rounds[:2]]
+    assert [row[2:] for row in parsed[1]] == [('hmi', 48.8, 48.8, 48.8, False), ('worker', 0.0, 0.0, 0.0, True)]
+    worker_line = next(line for line in rounds[1][2].splitlines() if line.startswith('worker'))
+    assert worker_line.split()[-2:] == ['*', '200']
+
+
+def test_scheduler_compensates_collection_time():
+    proc = FakeProc()
+    proc.spawn(100, 'hmi', 50000, ticks=1)
+    clock = FakeClock(proc, cost=0.25)
+    scheduler = _scheduler(proc, clock, proc.sampler(), interval=5.0, cpu_budget=0.1)
+    scheduler.run(lambda timestamp, rows: None, times=4)
+    # 每轮采集耗时 0.25 秒，休眠时间相应缩短以保持固定周期
+    assert clock.sleeps == [4.75, 4.75, 4.75]
+    assert clock.now == 1000.0 + 15 + 0.25
+    assert scheduler.missed == 0
+
+
+def _busy_proc():
+    proc = FakeProc()
+    for pid in range(100, 110):
+        proc.spawn(pid, f"p{pid}", 1000 * pid, ticks=pid)
+    return proc
+
+
+def test_scheduler_backs_off_over_budget():
+    proc = _busy_proc()
+    clock = FakeClock(proc, cost=0.1)
+    sampler = proc.sampler(top_n=2, idle_every=2)
+    scheduler = _scheduler(proc, clock, sampler, interval=5.0, cpu_budget=0.1, max_idle_every=8)
+    idle_every = []
+    scheduler.run(lambda timestamp, rows: idle_every.append(sampler.idle_every), times=2)
+    # 首轮读取全部 10 个进程耗时 1 秒，超过 0.5 秒的预算：先拉长空闲进程的采样间隔，周期不变
+    assert idle_every == [2, 4]
+    assert scheduler.interval == 5.0
+
+    # 空闲间隔已到上限时拉长采集周期
+    proc = _busy_proc()
+    clock = FakeClock(proc, cost=0.1)
+    sampler = proc.sampler(top_n=2, idle_every=2)
+    scheduler = _scheduler(proc, clock, sampler, interval=5.0, cpu_budget=0.1, max_idle_every=2)
+    scheduler.run(lambda timestamp, rows: None, times=2)
+    assert sampler.idle_every == 2
+    assert scheduler.interval == pytest.approx(10.0)
+    assert clock.sleeps == [pytest.approx(9.0)]
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from memtools.compare import align_captures, rank_regressions
+from memtools.fleet import merge_captures
+from memtools.process_data import ProcessArrays
+
+
+def _arrays(processes, start, interval, pss):
+    """每 interval 秒一个快照，pss 为 [快照, 进程]（MB），RSS / VSS 与 PSS 相同"""
+    pss = np.asarray(pss, dtype=np.float32)
+    times = np.datetime64(start, 's') + np.arange(len(pss)) * np.timedelta64(interval, 's')
+    return ProcessArrays(list(processes), times, np.stack([pss] * 3, axis=-1))
+
+
+def _fleet(a, b):
+    return merge_captures(['A', 'B'], ['A', 'B'], [a, b])
+
+
+def test_time_alignment_truncates_to_common_duration():
+    # A：每 5 秒一个快照，共 45 秒；B：每 10 秒一个快照，共 70 秒
+    a = _arrays(['hmi'], '2025-04-25T16:00:00', 5, np.arange(10)[:, None])
+    b = _arrays(['hmi'], '2025-04-26T09:00:00', 10, np.arange(8)[:, None])
+    comparison = align_captures(_fleet(a, b), 'time')
+    assert comparison.counts == [10, 5]
+    assert comparison.x[0].tolist() == [i * 5 / 60 for i in range(10)]
+    assert comparison.x[1].tolist() == [i * 10 / 60 for i in range(5)]
+    # B 的时间对齐到 A 的起点
+    assert comparison.timestamps[1].tolist()[-1] == np.datetime64('2025-04-25T16:00:40').tolist()
+    assert comparison.samples(1)[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_sequence_alignment_truncates_to_common_count():
+    a = _arrays(['hmi'], '2025-04-25T16:00:00', 5, np.arange(10)[:, None])
+    b = _arrays(['hmi', 'sh'], '2025-04-26T09:00:00', 10, np.ones((8, 2)))
+    comparison = align_captures(_fleet(a, b), 'sequence')
+    assert comparison.counts == [8, 8]
+    assert comparison.x[0].tolist() == comparison.x[1].tolist() == list(range(1, 9))
+    assert comparison.samples(0).shape == (8, 2)
+    assert np.isnan(comparison.samples(0)[:, 1]).all()
+
+    with pytest.raises(ValueError):
+        align_captures(_fleet(a, b), 'index')
+
+
+def test_identical_inputs_are_not_significant():
+    rng = np.random.default_rng(1)
+    pss = 100 + rng.normal(0, 2, (40, 1))
+    comparison = align_captures(_fleet(_arrays(['hmi'], '2025-04-25T16:00:00', 5, pss),
+                                       _arrays(['hmi'], '2025-04-26T09:00:00', 5, pss)), 'sequence')
+    stats = comparison.statistics(blocks=4)
+    assert stats['t'].tolist() == [0.0] and stats['p'].tolist() == [1.0]
+    assert stats['median'][0].tolist() == stats['median'][1].tolist()
+    assert stats['present'].tolist() == [[40], [40]]
+
+
+def test_shifted_series_is_significant():
+    rng = np.random.default_rng(2)
+    a = 100 + rng.normal(0, 2, (40, 2))
+    b = 100 + rng.normal(0, 2, (40, 2))
+    b[:, 0] += 5
+    comparison = align_captures(_fleet(_arrays(['hmi', 'launcher'], '2025-04-25T16:00:00', 5, a),
+                                       _arrays(['hmi', 'launcher'], '2025-04-26T09:00:00', 5, b)), 'sequence')
+    stats = comparison.statistics(blocks=4)
+    assert stats['p'][0] < 0.001 and stats['t'][0] > 0
+    assert stats['p'][1] > 0.05
+    rows = rank_regressions(comparison, blocks=4)
+    assert [row[0] for row in rows] == ['hmi', 'launcher']
+    assert rows[0][4] == pytest.approx(5, abs=1.5)
+
+
+def test_block_count():
+    # 40 个快照分为 4 个批次（每批 10 个），只在第一个批次中出现的进程无法检验
+    a = np.full((40, 2), 100.0)
+    a[5:, 1] = np.nan
+    b = np.full((40, 2), 100.0)
+    b[:, 0] += np.tile([0, 1], 20)
+    comparison = align_captures(_fleet(_arrays(['hmi', 'sh'], '2025-04-25T16:00:00', 5, a),
+                                       _arrays(['hmi', 'sh'], '2025-04-26T09:00:00', 5, b)), 'sequence')
+    stats = comparison.statistics(blocks=4)
+    assert stats['present'][:, 1].tolist() == [5, 40]
+    assert math.isnan(stats['t'][1]) and math.isnan(stats['p'][1])
+    # 批次均值没有波动时，差值不为 0 即视为显著
+    assert stats['t'][0] == math.inf and stats['p'][0] == 0.0
+
+    # 批次数超过快照数时每个快照为一批
+    short = align_captures(_fleet(_arrays(['hmi'], '2025-04-25T16:00:00', 5, [[1], [2], [3]]),
+                                  _arrays(['hmi'], '2025-04-26T09:00:00', 5, [[1], [2], [3]])), 'sequence')
+    assert short.statistics(blocks=20)['t'].tolist() == [0.0]
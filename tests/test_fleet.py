@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import numpy as np
+
+from memtools.collector import format_snapshot
+from memtools.fleet import load_fleet, merge_captures
+from memtools.process_data import ProcessArrays
+
+
+def _arrays(processes, times, pss):
+    """pss 为 [快照, 进程] 的 PSS（MB），RSS / VSS 分别为 PSS 的 2 倍和 4 倍"""
+    pss = np.asarray(pss, dtype=np.float32)
+    return ProcessArrays(list(processes), np.array(times, dtype='datetime64[s]'),
+                         np.stack([pss, pss * 2, pss * 4], axis=-1))
+
+
+def test_merge_captures_unions_processes():
+    a = _arrays(['hmi', 'launcher'], ['2025-04-25T16:00:00', '2025-04-25T16:00:05'], [[10, 20], [11, np.nan]])
+    b = _arrays(['sh', 'hmi'], ['2025-04-25T17:00:00', '2025-04-25T17:00:05', '2025-04-25T17:00:10'],
+                [[1, 12], [2, 13], [3, 14]])
+    fleet = merge_captures(['unit01', 'unit02'], ['A', 'B'], [a, b])
+
+    assert fleet.processes == ['hmi', 'launcher', 'sh']
+    assert fleet.values.shape == (2, 3, 3, 3)
+    assert np.isnat(fleet.timestamps[0, 2]) and not np.isnat(fleet.timestamps[1, 2])
+    np.testing.assert_array_equal(fleet.device_series('hmi'), [[10, 11, np.nan], [12, 13, 14]])
+    assert np.isnan(fleet.device_series('sh')[0]).all()
+    assert fleet.device_series('launcher', 'VSS')[0, 0] == 80
+    stats, present = fleet.aggregate()['B']
+    assert present.tolist() == [1, 0, 1]
+    assert stats[0].tolist() == [13, 13.9]
+
+
+def test_load_fleet_from_files(tmp_path):
+    paths = []
+    for unit, names in (('unit01', ['hmi', 'launcher']), ('unit02', ['hmi', 'sh'])):
+        path = tmp_path / unit / 'ProcessMemoryData.txt'
+        path.parent.mkdir()
+        path.write_text(''.join(
+            format_snapshot(datetime(2025, 4, 25, 16, 0, second), [
+                (name, 1024 * (k + 1), 2048, 4096, False, 100 + k) for k, name in enumerate(names)])
+            for second in (0, 5)), encoding='utf-8')
+        paths.append(str(path))
+    fleet = load_fleet(paths, workers=1)
+    assert fleet.labels == ['unit01', 'unit02']
+    # 快照中按 PSS 降序排列，进程字典按首次出现的顺序编号
+    assert fleet.processes == ['launcher', 'hmi', 'sh']
+    assert fleet.values.shape == (2, 2, 3, 3)
+    assert fleet.device_series('launcher').tolist()[0] == [2, 2]
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from memtools.free_data import FreeSeries, free_records
+from memtools.lifecycle import LiveSeries
+
+T0 = datetime(2025, 4, 25, 16)
+
+
+def test_live_series_grows_and_fills_gaps():
+    series = LiveSeries(fill_gaps=True, capacity=1, width=1)
+    assert series.append(1, T0, [('a', 1, 2, 3, False)])
+    assert series.append(2, T0 + timedelta(seconds=5), [('b', 4, 5, 6, True)])
+    assert not series.append(3, T0 + timedelta(seconds=10), [('a', 1, 1, 1, True), ('a', 2, 2, 2, False)])
+
+    assert len(series) == 3 and series.keys == ['a', 'b']
+    assert list(series.x()) == [1, 2, 3]
+    values, sampled = series.series(0)
+    # a 在第 2 帧缺失，重新出现时补 0；同一帧中的两行累加，只要有一行实际采样即视为采样点
+    assert values[:, 0].tolist() == [1, 0, 3]
+    assert sampled.tolist() == [True, True, True]
+    values, sampled = series.series(1)
+    # b 出现之前和之后的帧不在存活区间内，保持为 NaN
+    assert np.isnan(values[[0, 2], 0]).all() and values[1, 0] == 4
+    assert not sampled[1]
+
+    frame = series.to_frame(['a', 'b'])
+    assert frame['process'].tolist() == ['a', 'a', 'b', 'a']
+    assert frame['PSS'].tolist() == [1, 0, 4, 3]
+    assert frame['timestamp'].iloc[-1] == T0 + timedelta(seconds=10)
+
+
+def test_free_series_matches_free_records():
+    series = FreeSeries(capacity=1)
+    series.append(T0, (8, 3, 2, 0, 3, 5), (4, 1, 3))
+    assert not series.by_time() and series.x(swap=True).tolist() == [1]
+    series.append(T0 + timedelta(seconds=5), (8, 4, 1, 0, 3, 4), (4, 2, 2))
+
+    assert series.by_time()
+    assert series.mem_column('available').tolist() == [5, 4]
+    assert series.swap_column('used').tolist() == [1, 2]
+    assert series.records() == (free_records(T0, (8, 3, 2, 0, 3, 5), (4, 1, 3), 0) +
+                                free_records(T0 + timedelta(seconds=5), (8, 4, 1, 0, 3, 4), (4, 2, 2), 2))
@@ -0,0 +1,70 @@
+import os
+
+from memtools.pmap import parse_pmap_output, parse_pmap_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLUMNS = ['Address', 'Perm', 'Offset', 'Device', 'Inode', 'Size', 'Rss', 'Pss', 'Swap', 'VmFlags']
+
+
+def _pmap_xx(rows):
+    """按 pmap -XX 的格式生成输出：各列右对齐到表头与数据中最宽者，VmFlags 末尾带空格"""
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(COLUMNS)]
+    lines = ['1234:   /usr/bin/foo', ' '.join(column.rjust(width) for column, width in zip(COLUMNS, widths)) + ' Mapping']
+    for row in rows:
+        lines.append(' '.join(value.rjust(width) for value, width in zip(row, widths)) + ' ' + row[-1])
+    return '\n'.join(lines) + '\n'
+
+
+def _row(address, size, flags, mapping):
+    return [address, 'r--p', '00000000', 'fd:01', '1100', str(size), str(size), str(size // 2), '0',
+            flags + ' ', mapping]
+
+
+def test_pmap_xx_keeps_short_mapping_names():
+    text = _pmap_xx([
+        _row('55d4bf1e2000', 180, 'rd mr mw me dw sd', 'ls'),
+        _row('55d4bf20f000', 712, 'rd ex mr mw me dw sd', 'sh'),
+        _row('55d4c0b2a000', 264, 'rd wr mr mw me ac sd', '[heap]'),
+        _row('7f0000000000', 132, 'rd wr mr mw me ac sd', ''),
+        _row('7f1000000000', 40, 'rd mr sd', '/usr/lib/lib c.so (deleted)'),
+        _row('7f2000000000', 8, 'rd mr mw me sd', 'vi'),
+    ])
+    table = parse_pmap_table(text)
+    assert [str(mapping) for mapping in table.mappings] == [
+        'ls', 'sh', '[heap]', '', '/usr/lib/lib c.so (deleted)', 'vi']
+    assert table.column('Size').tolist() == [180, 712, 264, 132, 40, 8]
+    assert table.column('Pss').tolist() == [90, 356, 132, 66, 20, 4]
+
+
+def test_pmap_xx_headers_per_section():
+    # 多个进程的输出拼接在一起时，每段按自己的表头切分
+    first = _pmap_xx([_row('1000', 4, 'rd mr mw me ac sd', 'df')])
+    second = _pmap_xx([_row('2000', 8, 'rd', 'ls'), _row('3000', 16, 'rd wr mr mw me ac sd nr uw', 'sh')])
+    table = parse_pmap_table(first + second)
+    assert [str(mapping) for mapping in table.mappings] == ['df', 'ls', 'sh']
+
+
+def test_pmap_x_grouping():
+    with open(os.path.join(ROOT, 'pmap_analyzer', 'TestData', 'pmap_20250521_hmi.txt'), encoding='utf-8') as f:
+        text = f.read()
+    table = parse_pmap_table(text)
+    stats = parse_pmap_output(text)
+    assert len(table) == 2992
+    assert stats.values.sum(axis=0).tolist() == table.values.sum(axis=0).tolist()
+    assert stats.values[:, 0].tolist() == sorted(stats.values[:, 0].tolist(), reverse=True)
+
+
+def test_pmap_x_procps_bracketed_names():
+    # procps 的 pmap -x：方括号内带空格，没有 PSS 列
+    text = ("1234:   /usr/bin/foo\n"
+            "Address           Kbytes     RSS   Dirty Mode  Mapping\n"
+            "000055d4bf1e2000     180     120       0 r-x-- foo\n"
+            "000055d4c0b2a000     264     200     200 rw---   [ anon ]\n"
+            "00007ffd1a2b3000     132      12      12 rw---   [ stack ]\n"
+            "00007ffd1a3f0000       8       4       0 r-x--   [ vdso ]\n"
+            "---------------- ------- ------- -------\n"
+            "total kB             584     336     212\n")
+    stats = parse_pmap_output(text, by='category')
+    assert {key[0]: size for key, size in zip(stats.keys, stats.values[:, 0].tolist())} == {
+        'file': 180, 'anon': 264, 'stack': 132, 'vdso': 8}
+    assert sorted(str(key[1]) for key in parse_pmap_output(text).keys) == ['anon', 'foo', 'stack', 'vdso']
@@ -0,0 +1,66 @@
+import json
+import time
+import tracemalloc
+
+import pytest
+
+from memtools.profiling import StageProfiler
+
+
+@pytest.fixture
+def profiler():
+    tracing = tracemalloc.is_tracing()
+    profiler = StageProfiler()
+    yield profiler
+    profiler._dumped = True  # 测试中已检查报告，退出时不再输出
+    if not tracing:
+        tracemalloc.stop()
+
+
+def test_disabled_profiler_is_a_no_op(profiler):
+    @profiler.profiled()
+    def work(value):
+        return value * 2
+
+    assert work(21) == 42
+    with profiler.span('load'):
+        pass
+    assert profiler.span('load') is profiler.span('parse')  # 共享的空上下文
+    assert profiler.stats == {} and profiler.events == []
+    profiler.dump()
+    assert not profiler._dumped
+
+
+def test_stage_timing_aggregation(profiler, tmp_path):
+    report = tmp_path / 'report.txt'
+    trace = tmp_path / 'trace.json'
+    profiler.enable(str(report), str(trace))
+
+    @profiler.profiled('parse')
+    def parse(delay):
+        time.sleep(delay)
+        return delay
+
+    kept = []
+    with profiler.span('load'):
+        for delay in (0.01, 0.03):
+            parse(delay)
+        kept.append(bytearray(4 * 1048576))
+        temporary = bytearray(8 * 1048576)
+        del temporary
+
+    calls, total, longest, mem_delta, mem_peak = profiler.stats['parse']
+    assert calls == 2 and total >= 0.04 and 0.03 <= longest <= total
+    calls, total, longest, mem_delta, mem_peak = profiler.stats['load']
+    # 外层阶段包含内层阶段的耗时，峰值包含已释放的临时内存
+    assert calls == 1 and total >= profiler.stats['parse'][1]
+    assert 4 * 1048576 <= mem_delta < 5 * 1048576
+    assert mem_peak >= 12 * 1048576
+
+    profiler.dump()
+    lines = report.read_text(encoding='utf-8').splitlines()
+    assert lines[0].split() == ['STAGE', 'CALLS', 'TOTAL(ms)', 'MEAN(ms)', 'MAX(ms)', 'MEM(MB)', 'PEAK(MB)']
+    assert [line.split()[:2] for line in lines[2:]] == [['load', '1'], ['parse', '2']]
+    events = json.loads(trace.read_text(encoding='utf-8'))['traceEvents']
+    assert [event['name'] for event in events] == ['parse', 'parse', 'load']
+    assert all(event['ph'] == 'X' and event['dur'] > 0 for event in events)
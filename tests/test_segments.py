@@ -0,0 +1,46 @@
+import os
+
+from memtools.segments import parse_window, select_segments, text_time_range
+
+
+def _snapshot(timestamp):
+    return f"统计时间: {timestamp}\n\nPROCESS PSS(MB) RSS(MB) VSS(MB) FLAG     PID\n====\n"
+
+
+def _write_capture(tmp_path, active_times):
+    (tmp_path / 'ProcessMemoryData.index').write_text(
+        "# segment\tstart\tend\tsnapshots\n"
+        "ProcessMemoryData-20250425-150000.txt.gz\t2025-04-25 15:00:00\t2025-04-25 15:59:55\t720\n",
+        encoding='utf-8')
+    (tmp_path / 'ProcessMemoryData-20250425-150000.txt.gz').write_bytes(b'')
+    active = tmp_path / 'ProcessMemoryData.txt'
+    active.write_text(''.join(_snapshot(timestamp) for timestamp in active_times), encoding='utf-8')
+    return str(tmp_path / 'ProcessMemoryData.index'), str(active)
+
+
+def test_text_time_range_reads_first_and_last_snapshot(tmp_path):
+    _, active = _write_capture(tmp_path, ['2025-04-25 16:00:00', '2025-04-25 16:00:05', '2025-04-25 16:30:00'])
+    start, end = text_time_range(active, chunk_size=16)
+    assert (start, end) == parse_window('2025-04-25 16:00:00 ~ 2025-04-25 16:30:00')
+
+
+def test_text_time_range_without_snapshots(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_text('no data\n', encoding='utf-8')
+    assert text_time_range(str(path)) == (None, None)
+
+
+def test_unlisted_active_file_is_time_filtered(tmp_path):
+    index, active = _write_capture(tmp_path, ['2025-04-25 16:00:00', '2025-04-25 16:30:00'])
+    segment = os.path.join(str(tmp_path), 'ProcessMemoryData-20250425-150000.txt.gz')
+
+    assert select_segments(index) == [segment, active]
+    assert select_segments(index, *parse_window('2025-04-25 15:10:00 ~ 2025-04-25 15:20:00')) == [segment]
+    assert select_segments(index, *parse_window('2025-04-25 16:10:00 ~ 2025-04-25 16:20:00')) == [active]
+    assert select_segments(index, *parse_window('2025-04-25 17:00:00 ~')) == []
+
+
+def test_active_file_without_snapshots_is_skipped_when_filtering(tmp_path):
+    index, active = _write_capture(tmp_path, [])
+    assert select_segments(index, *parse_window('2025-04-25 15:10:00 ~')) == [
+        os.path.join(str(tmp_path), 'ProcessMemoryData-20250425-150000.txt.gz')]
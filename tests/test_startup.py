@@ -0,0 +1,29 @@
+"""无界面子命令的启动时间：-h 只应导入标准库和轻量模块，numpy / pandas / matplotlib 按需加载"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from memtools.cli import COMMANDS
+
+HEADLESS = [command for command, (module, _) in COMMANDS.items() if not module.endswith('_gui')]
+BUDGET = 0.150
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _elapsed(command):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-m', 'memtools', command, '-h'], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - started
+    assert result.returncode == 0, result.stderr.decode(errors='replace')
+    return elapsed
+
+
+@pytest.mark.parametrize('command', HEADLESS)
+def test_help_starts_within_budget(command):
+    # 取三次中的最小值，排除磁盘缓存和调度抖动
+    elapsed = min(_elapsed(command) for _ in range(3))
+    assert elapsed < BUDGET, f"memtools {command} -h 耗时 {elapsed * 1000:.0f}ms，超过 {BUDGET * 1000:.0f}ms"
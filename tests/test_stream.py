@@ -0,0 +1,149 @@
+import socket
+import time
+from datetime import datetime
+
+import pytest
+
+from memtools.stream import (HEADER, KIND_PROCESS, SnapshotPublisher, SnapshotSubscriber, decode_header,
+                             decode_payload, encode_frame, snapshot_rows)
+
+MEMORY = ((8000000, 3000000, 1000000, 20000, 4000000, 4500000), (2000000, 0, 2000000))
+TIMESTAMP = datetime(2025, 4, 25, 16, 0, 0)
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.01)
+
+
+def _read_frames(connection, count):
+    """从原始连接中读取 count 帧"""
+    def read(size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = connection.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    frames = []
+    for _ in range(count):
+        kind, sequence, timestamp, sent, length = decode_header(read(HEADER.size))
+        frames.append(decode_payload(kind, sequence, timestamp, sent, read(length)))
+    return frames
+
+
+@pytest.fixture
+def address(tmp_path):
+    return f"unix:{tmp_path / 'memtools.sock'}"
+
+
+def test_frame_round_trip():
+    rows = [('hmi', 138.25, 200.0, 4264.1, False, 100), ('worker', 1.0, 2.0, 3.0, True, 200)]
+    identities = [(100, '2025-04-25 15:00:00', '/app/bin/hmi --fullscreen')]
+    alerts = ['ALERT: spike hmi PSS 138.2 突增']
+    frame = encode_frame(KIND_PROCESS, 7, TIMESTAMP, MEMORY, rows, identities, alerts)
+    kind, sequence, timestamp, sent, length = decode_header(frame[:HEADER.size])
+    snapshot = decode_payload(kind, sequence, timestamp, sent, frame[HEADER.size:])
+    assert (snapshot.sequence, snapshot.timestamp, length) == (7, TIMESTAMP, len(frame) - HEADER.size)
+    assert (snapshot.mem, snapshot.swap) == MEMORY
+    assert snapshot.rows == [('hmi', 138.2, 200.0, 4264.1, False, 100), ('worker', 1.0, 2.0, 3.0, True, 200)]
+    assert snapshot.identities == identities
+    assert snapshot.alerts == alerts
+
+    known, started = {}, {}
+    rows = snapshot_rows(snapshot, known, started)
+    assert rows[0] == (TIMESTAMP, 7, 'hmi', 138.2, 200.0, 4264.1, False, 100, '2025-04-25 15:00:00')
+    assert rows[1][-2:] == (200, None)
+    assert known == {(100, '2025-04-25 15:00:00'): '/app/bin/hmi --fullscreen'}
+
+
+def test_publisher_to_subscriber(address):
+    publisher = SnapshotPublisher(address)
+    subscriber = SnapshotSubscriber(address, retry=0.1)
+    try:
+        _wait(lambda: publisher.subscribers)
+        publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, [('hmi', 1.0, 2.0, 3.0, False, 100)],
+                          [(100, '2025-04-25 15:00:00', 'hmi')])
+        publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY,
+                          [('hmi', 1.5, 2.0, 3.0, False, 100), ('sh', 0.5, 1.0, 2.0, False, 300)],
+                          [(300, '2025-04-25 16:00:00', 'sh -c true')])
+        _wait(lambda: subscriber.received == 2)
+        first, second = subscriber.drain()
+        assert [first.sequence, second.sequence] == [1, 2]
+        assert first.identities == [(100, '2025-04-25 15:00:00', 'hmi')]
+        # 之后的帧只带新出现进程的字典
+        assert second.identities == [(300, '2025-04-25 16:00:00', 'sh -c true')]
+        assert second.rows[1] == ('sh', 0.5, 1.0, 2.0, False, 300)
+        assert subscriber.lost == 0 and second.latency >= 0
+
+        # 后连接的订阅者第一帧收到所有存活进程的字典
+        late = SnapshotSubscriber(address, retry=0.1)
+        try:
+            _wait(lambda: len(publisher.subscribers) == 2)
+            publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY,
+                              [('hmi', 1.5, 2.0, 3.0, False, 100), ('sh', 0.5, 1.0, 2.0, False, 300)])
+            _wait(lambda: late.received == 1)
+            assert sorted(late.drain()[0].identities) == [(100, '2025-04-25 15:00:00', 'hmi'),
+                                                          (300, '2025-04-25 16:00:00', 'sh -c true')]
+        finally:
+            late.close()
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_dropped_frames_resend_identities(address):
+    publisher = SnapshotPublisher(address, queue_size=1, send_timeout=30.0)
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        connection.connect(address[5:])
+        _wait(lambda: publisher.subscribers)
+        # 第一帧远大于套接字缓冲区，客户端不读取时发送线程阻塞在这一帧上
+        filler = [('filler', 1.0, 1.0, 1.0, False, 0)] * 60000
+        publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, filler + [('hmi', 1.0, 1.0, 1.0, False, 100)],
+                          [(100, '2025-04-25 15:00:00', 'hmi')])
+        sender = publisher.subscribers[0]
+        _wait(lambda: not sender.queue)
+        # PID 200 的字典只在第 2 帧中，这一帧会因为队列已满被丢弃
+        rows = [('hmi', 1.0, 1.0, 1.0, False, 100), ('worker', 1.0, 1.0, 1.0, False, 200)]
+        publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, rows, [(200, '2025-04-25 16:00:00', 'worker')])
+        for _ in range(3):
+            publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, rows)
+        assert publisher.dropped == 3
+
+        frames = _read_frames(connection, 2)
+        assert [frame.sequence for frame in frames] == [1, 5]
+        assert (200, '2025-04-25 16:00:00', 'worker') in frames[1].identities
+        # 丢帧之后恢复为只发送新进程的字典
+        publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, rows)
+        assert _read_frames(connection, 1)[0].identities == []
+    finally:
+        connection.close()
+        publisher.close()
+
+
+def test_restarted_collector_continues_sequence(address):
+    subscriber = SnapshotSubscriber(address, retry=0.05)
+    try:
+        for restart in range(2):
+            publisher = SnapshotPublisher(address)
+            try:
+                _wait(lambda: publisher.subscribers)
+                for _ in range(3):
+                    publisher.publish(KIND_PROCESS, TIMESTAMP, MEMORY, [('hmi', 1.0, 1.0, 1.0, False, 100)],
+                                      [(100, '2025-04-25 15:00:00', 'hmi')])
+                _wait(lambda: subscriber.received == 3 * (restart + 1))
+            finally:
+                publisher.close()
+        snapshots = subscriber.drain()
+        assert [snapshot.sequence for snapshot in snapshots] == [1, 2, 3, 4, 5, 6]
+        assert [snapshot.restarted for snapshot in snapshots] == [False] * 3 + [True, False, False]
+        assert (subscriber.restarts, subscriber.lost) == (1, 0)
+    finally:
+        subscriber.close()